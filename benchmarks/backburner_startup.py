@@ -0,0 +1,108 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compare the engine startup time of a Backburner job when only the app or
+hook of the job is loaded and when every app is.
+
+The engine is started like backburner.py does, from the information of a job
+written by the engine: a job manifest reference (<base path>:<job index>) or
+the path to the pickle file of a job. A job manifest is removed once all its
+jobs ran, so copy its files from the Backburner temporary folder, or pause
+the Backburner server, before running the benchmark. Each run starts the
+engine in a new process, with the Python of Flame.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import harness
+
+backburner_startup_path = os.path.join(harness.repo_root, "python", "startup")
+
+
+def start_engine(job_reference, minimal, instance=None):
+    """
+    Start the engine for a job in this process.
+
+    :param job_reference: Job manifest reference or path to the pickle file.
+    :param minimal: Only load the app or hook of the job.
+    :param instance: App or hook instance name to start the engine for,
+        instead of the one of the job.
+    """
+    sys.path.insert(0, backburner_startup_path)
+    import backburner
+
+    data = backburner.load_job_data(job_reference)
+    if instance:
+        data["instance"] = instance
+    backburner.start_engine(data, minimal=minimal)
+
+
+def time_engine_startup(job_reference, minimal, instance, nb_runs):
+    """
+    Time the engine startups, each one in a new process.
+
+    :param job_reference: Job manifest reference or path to the pickle file.
+    :param minimal: Only load the app or hook of the job.
+    :param instance: App or hook instance name, None for the one of the job.
+    :param nb_runs: Number of engine startups.
+    :returns: Tuple (median, min) of the startup durations in seconds.
+    """
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--start-engine",
+        json.dumps([job_reference, minimal, instance]),
+    ]
+    return harness.time_runs(
+        lambda: subprocess.run(command, check=True, stdout=subprocess.DEVNULL),
+        nb_runs,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the engine startup time of the Backburner jobs."
+    )
+    parser.add_argument(
+        "job_reference",
+        nargs="?",
+        help="Job manifest reference or path to the pickle file of a job.",
+    )
+    parser.add_argument(
+        "--instance",
+        help="App or hook instance to start the engine for, "
+        "instead of the one of the job.",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Number of engine startups per mode."
+    )
+    parser.add_argument("--start-engine", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.start_engine:
+        start_engine(*json.loads(args.start_engine))
+        sys.exit(0)
+
+    if not args.job_reference:
+        parser.error("the job reference is required")
+
+    for minimal in (False, True):
+        median, fastest = time_engine_startup(
+            args.job_reference, minimal, args.instance, args.runs
+        )
+        print(
+            "%-8s startup: median %.3fs, min %.3fs over %d runs"
+            % ("minimal" if minimal else "full", median, fastest, args.runs)
+        )
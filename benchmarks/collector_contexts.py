@@ -0,0 +1,172 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Measure the collection time of a large export by the publisher collector,
+with the contexts built once per entity and once per item.
+
+The export information is synthetic and the collector runs against a
+stand-in publisher: the toolkit takes a given time to build a context, no
+query is sent and the items creation is skipped.
+"""
+
+import argparse
+import time
+
+import harness
+
+ASSET_TYPES = ["video", "openClip", "batch", "batchOpenClip", "audio"]
+
+
+class StubItem(object):
+    """
+    Stand-in for the publisher items.
+    """
+
+    def __init__(self):
+        self.properties = {}
+        self.context = None
+        self.context_change_allowed = True
+
+
+class StubToolkit(object):
+    """
+    Stand-in for the toolkit, building the contexts in a given time.
+    """
+
+    def __init__(self, context_time):
+        """
+        :param context_time: Seconds taken to build a context.
+        """
+        self.context_time = context_time
+        self.nb_contexts = 0
+
+    def context_from_entity_dictionary(self, entity):
+        time.sleep(self.context_time)
+        self.nb_contexts += 1
+        return {"entity": entity}
+
+
+class StubEntityCache(object):
+    """
+    Stand-in for the engine entity cache, finding no entity so they are all
+    created.
+    """
+
+    def __init__(self):
+        self._entity_id = 0
+
+    def find(self, entity_type, filters, fields=None, order=None):
+        return []
+
+    def batch(self, requests):
+        entities = []
+        for request in requests:
+            self._entity_id += 1
+            entities.append(
+                dict(request["data"], type=request["entity_type"], id=self._entity_id)
+            )
+        return entities
+
+
+def get_export_info(nb_sequences, nb_shots):
+    """
+    :param nb_sequences: Number of Sequences exported.
+    :param nb_shots: Number of Shots per Sequence.
+    :returns: Export information with an asset of each type per Shot.
+    """
+    export_info = {}
+    for sequence_index in range(nb_sequences):
+        sequence_info = export_info.setdefault("seq%03d" % sequence_index, {})
+        for shot_index in range(nb_shots):
+            sequence_info["shot%03d" % shot_index] = {
+                asset_type: {"%s%03d" % (asset_type, shot_index): [{}]}
+                for asset_type in ASSET_TYPES
+            }
+    return export_info
+
+
+def collect(collector, memoized):
+    """
+    Collect the export.
+
+    :param collector: Collector hook instance.
+    :param memoized: Build the context of each entity only once.
+    """
+    if memoized:
+        collector.__dict__.pop("_get_context", None)
+    else:
+        toolkit = collector.publisher.sgtk
+        collector._get_context = (
+            lambda entity, contexts: toolkit.context_from_entity_dictionary(entity)
+        )
+    collector.process_current_session({}, StubItem())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the collection time of a large export."
+    )
+    harness.add_core_argument(parser)
+    parser.add_argument(
+        "--sequences", type=int, default=10, help="Number of Sequences."
+    )
+    parser.add_argument(
+        "--shots", type=int, default=20, help="Number of Shots per Sequence."
+    )
+    parser.add_argument(
+        "--context-time",
+        type=float,
+        default=2,
+        help="Milliseconds taken by the toolkit to build a context.",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Number of runs.")
+    args = parser.parse_args()
+
+    toolkit = StubToolkit(args.context_time / 1000.0)
+    engine = harness.StubBundle(
+        shotgun=None,
+        export_info=get_export_info(args.sequences, args.shots),
+        entity_cache=StubEntityCache(),
+        thumbnail_generator=harness.StubBundle(reset=lambda: None),
+        show_busy=lambda title, details: None,
+        clear_busy=lambda: None,
+    )
+    publisher = harness.StubBundle(
+        engine=engine,
+        sgtk=toolkit,
+        context=harness.StubBundle(project={"type": "Project", "id": 1}),
+    )
+    collector = harness.load_hook(
+        "hooks/tk-multi-publish2/collector.py", publisher, args.core
+    )
+    for asset_type in ASSET_TYPES:
+        setattr(
+            collector,
+            "create_%s_items" % asset_type,
+            lambda parent_item, asset_info: [StubItem()],
+        )
+
+    nb_assets = args.sequences * args.shots * len(ASSET_TYPES)
+    for memoized in (False, True):
+        toolkit.nb_contexts = 0
+        median, fastest = harness.time_runs(
+            lambda: collect(collector, memoized), args.runs
+        )
+        print(
+            "%s: median %.2fs, min %.2fs, %d contexts built for %d assets"
+            % (
+                "once per entity" if memoized else "once per item",
+                median,
+                fastest,
+                toolkit.nb_contexts // args.runs,
+                nb_assets,
+            )
+        )
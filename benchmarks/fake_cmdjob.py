@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Stand-in for the Backburner cmdjob binary, running the jobs on this host.
+
+Point SHOTGUN_FLAME_CMDJOB_PATH to this script to have the engine submit its
+Backburner jobs to it. The tasks of a job, one per line of its -taskList
+file or a single one, are run in a process pool of
+SHOTGUN_FLAME_FAKE_CMDJOB_WORKERS processes, the number of cores by default.
+The %tp1, %tp2, ... task parameters of the command are replaced by the
+columns of the task line.
+
+A job is run before its submission is reported, so the jobs it depends on
+always ran before. The output of the tasks is written to a log file whose
+path is printed with the job id.
+"""
+
+import concurrent.futures
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+OPTION_REGEX = re.compile(r"^-(\w+)(?::(.*))?$")
+
+
+def parse_arguments(arguments):
+    """
+    Split the cmdjob arguments into its options and the command to run.
+
+    :param arguments: Command line arguments, without the program name.
+    :returns: Tuple (dictionary of the options, list of the command
+        arguments).
+    """
+    options = {}
+    for index, argument in enumerate(arguments):
+        match = OPTION_REGEX.match(argument)
+        if not match:
+            return options, arguments[index:]
+        options[match.group(1)] = match.group(2)
+    return options, []
+
+
+def get_task_parameters(options):
+    """
+    :param options: Dictionary of the cmdjob options.
+    :returns: List of the parameters of each task of the job.
+    """
+    task_list = options.get("taskList")
+    if not task_list:
+        return [[]]
+
+    with open(task_list) as fh:
+        return [line.rstrip("\n").split("\t") for line in fh if line.strip()]
+
+
+def run_task(command):
+    """
+    Run a task of a job.
+
+    :param command: List of the command arguments.
+    :returns: Tuple (return code, output, duration in seconds).
+    """
+    start_time = time.time()
+    process = subprocess.run(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    return process.returncode, process.stdout, time.time() - start_time
+
+
+def run_job(options, command, nb_workers):
+    """
+    Run the tasks of a job.
+
+    :param options: Dictionary of the cmdjob options.
+    :param command: List of the command arguments, with the task parameters.
+    :param nb_workers: Number of tasks run at the same time.
+    :returns: Tuple (job id, path to the log file).
+    """
+    job_id = int(time.time() * 1000) % 1000000000
+    tasks = []
+    for parameters in get_task_parameters(options):
+        task_command = []
+        for argument in command:
+            for index, parameter in reversed(list(enumerate(parameters))):
+                argument = argument.replace("%%tp%d" % (index + 1), parameter)
+            task_command.append(argument)
+        tasks.append(task_command)
+
+    log_path = os.path.join(tempfile.gettempdir(), "fake_cmdjob_%d.log" % job_id)
+    with open(log_path, "w") as log:
+        log.write("Job %s: %s\n" % (job_id, options.get("jobName", "")))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=nb_workers) as pool:
+            for index, (return_code, output, duration) in enumerate(
+                pool.map(run_task, tasks)
+            ):
+                log.write(
+                    "Task %d exited with %d in %.2fs: %s\n%s\n"
+                    % (index, return_code, duration, " ".join(tasks[index]), output)
+                )
+    return job_id, log_path
+
+
+if __name__ == "__main__":
+    options, command = parse_arguments(sys.argv[1:])
+    if not command:
+        sys.stderr.write("No command to run.\n")
+        sys.exit(1)
+
+    nb_workers = int(
+        os.environ.get("SHOTGUN_FLAME_FAKE_CMDJOB_WORKERS", os.cpu_count() or 1)
+    )
+    job_id, log_path = run_job(options, command, nb_workers)
+    print("Task output written to %s" % log_path)
+    print("Successfully submitted job %d" % job_id)
@@ -0,0 +1,120 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Helpers shared by the benchmarks of the engine.
+
+The hooks of the engine are loaded by Toolkit like in a Flame session, but
+their parent is a stand-in for the engine or the app, so that neither Flame,
+a site nor a pipeline configuration is needed.
+"""
+
+import os
+import statistics
+import sys
+import time
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def add_core_argument(parser):
+    """
+    Add the option locating tk-core to a benchmark command line parser.
+
+    :param parser: argparse.ArgumentParser of the benchmark.
+    """
+    parser.add_argument(
+        "--core",
+        help="Path to the python folder of tk-core, when sgtk is not importable.",
+    )
+
+
+def import_sgtk(core=None):
+    """
+    Import sgtk, from a given tk-core if needed.
+
+    :param core: Path to the python folder of tk-core, or None.
+    :returns: The sgtk module.
+    """
+    if core and core not in sys.path:
+        sys.path.insert(0, core)
+    import sgtk
+
+    return sgtk
+
+
+def load_hook(relative_path, parent, core=None):
+    """
+    Load a hook of the engine.
+
+    :param relative_path: Path of the hook file in the engine folder.
+    :param parent: Object the hook is created for, standing in for the
+        engine or the app.
+    :param core: Path to the python folder of tk-core, or None.
+    :returns: The hook instance.
+    """
+    import_sgtk(core)
+    from tank import hook
+
+    return hook.create_hook_instance([os.path.join(repo_root, relative_path)], parent)
+
+
+class StubBundle(object):
+    """
+    Stand-in for the engine or the app a hook is created for.
+    """
+
+    def __init__(self, settings=None, verbose=False, **attributes):
+        """
+        :param settings: Dictionary of the settings of the bundle.
+        :param verbose: Print the messages logged.
+        :param attributes: Other attributes of the bundle.
+        """
+        self._settings = dict(settings or {})
+        self._verbose = verbose
+        self.__dict__.update(attributes)
+
+    def get_setting(self, name, default=None):
+        return self._settings.get(name, default)
+
+    def set_setting(self, name, value):
+        self._settings[name] = value
+
+    def _log(self, level, message):
+        if self._verbose:
+            print("%s: %s" % (level, message))
+
+    def log_debug(self, message):
+        self._log("DEBUG", message)
+
+    def log_info(self, message):
+        self._log("INFO", message)
+
+    def log_warning(self, message):
+        self._log("WARNING", message)
+
+    def log_error(self, message):
+        self._log("ERROR", message)
+
+
+def time_runs(function, nb_runs):
+    """
+    Time the runs of a function.
+
+    :param function: Callable to time, called without arguments.
+    :param nb_runs: Number of runs.
+    :returns: Tuple (median, min) of the durations in seconds.
+    """
+    durations = []
+    for _ in range(nb_runs):
+        start_time = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start_time)
+    return statistics.median(durations), min(durations)
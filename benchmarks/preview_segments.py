@@ -0,0 +1,222 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compare the wall-clock time of the FFmpeg preview of a long clip encoded in
+one piece and encoded in parallel segments then concatenated.
+
+The frames of a synthetic clip are fed to the ffmpeg command lines built by
+the Backburner hooks, like read_frame does. The segments are encoded at the
+same time by a process pool standing in for the Backburner servers, then
+BackburnerHooks.concat_preview_segments stitches them. On a single host the
+segments share its cores: --segment-threads sets the number of threads of
+each segment encoding, as a server would have.
+"""
+
+import argparse
+import concurrent.futures
+import importlib.util
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import harness
+from preview_tiers import write_raw_frames
+
+
+def load_temp_artifacts_module():
+    """
+    :returns: The temp_artifacts module of the engine, loaded on its own.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "temp_artifacts",
+        os.path.join(harness.repo_root, "python", "tk_flame", "temp_artifacts.py"),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def execute_command(hook_name, method_name, command, shell=False):
+    """
+    Stand-in for the execute_command hook of the engine.
+
+    :returns: Tuple (return code, stdout, stderr).
+    """
+    process = subprocess.run(
+        command,
+        shell=shell,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    return process.returncode, process.stdout, process.stderr
+
+
+def encode(command, raw_path, first_frame, nb_frames, frame_size):
+    """
+    Encode a range of the raw frames of a clip.
+
+    :param command: ffmpeg command line, with the output path.
+    :param raw_path: Path to the raw frames of the clip.
+    :param first_frame: Index of the first frame to encode.
+    :param nb_frames: Number of frames to encode.
+    :param frame_size: Size in bytes of a frame.
+    """
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    with open(raw_path, "rb") as fh:
+        fh.seek(first_frame * frame_size)
+        for _ in range(nb_frames):
+            process.stdin.write(fh.read(frame_size))
+    process.stdin.close()
+    if process.wait():
+        raise RuntimeError("Encoding failed: %s" % " ".join(command))
+
+
+def benchmark_segments(
+    hook, tier, nb_segments, segment_threads, width, height, fps, nb_frames, directory
+):
+    """
+    Time the encoding of a clip in one piece, then in segments.
+
+    :param hook: Backburner hooks instance.
+    :param tier: Speed tier of the preview.
+    :param nb_segments: Number of segments, as many as Backburner servers.
+    :param segment_threads: Number of ffmpeg threads of each segment.
+    :param width: Width of the clip.
+    :param height: Height of the clip.
+    :param fps: Frame rate of the clip.
+    :param nb_frames: Number of frames of the clip.
+    :param directory: Folder of the files written.
+    """
+    width, height = hook._calculate_aspect_ratio(
+        hook.QUICKTIME_TIER_TARGET_HEIGHTS[tier], width, height
+    )
+    frame_size = width * height * 3
+    raw_path = os.path.join(directory, "clip.raw")
+    write_raw_frames(
+        hook.parent.get_ffmpeg_path(), raw_path, width, height, fps, nb_frames
+    )
+
+    # The single piece is encoded with all the cores of the host.
+    command = hook._get_ffmpeg_movie_cmd(fps, width, height, tier)
+    start_time = time.perf_counter()
+    encode(
+        command + [os.path.join(directory, "clip.mov")],
+        raw_path,
+        0,
+        nb_frames,
+        frame_size,
+    )
+    print("1 piece:     %.2fs" % (time.perf_counter() - start_time))
+
+    segment_command = list(command)
+    segment_command[segment_command.index("-threads") + 1] = str(segment_threads)
+
+    # Same split as the FFmpeg thumbnail generator: the remaining frames are
+    # spread on the first segments.
+    segments = []
+    first_frame = 0
+    for index in range(nb_segments):
+        segment_frames = nb_frames // nb_segments + (
+            1 if index < nb_frames % nb_segments else 0
+        )
+        segments.append(
+            (
+                os.path.join(directory, "segment_%d.mov" % index),
+                first_frame,
+                segment_frames,
+            )
+        )
+        first_frame += segment_frames
+
+    start_time = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nb_segments) as pool:
+        futures = [
+            pool.submit(
+                encode,
+                segment_command + [segment_path],
+                raw_path,
+                first_frame,
+                segment_frames,
+                frame_size,
+            )
+            for segment_path, first_frame, segment_frames in segments
+        ]
+        for future in futures:
+            future.result()
+    encode_duration = time.perf_counter() - start_time
+
+    # No targets, the movie is not uploaded.
+    hook.concat_preview_segments([segment[0] for segment in segments], [], "benchmark")
+    duration = time.perf_counter() - start_time
+    print(
+        "%d segments: %.2fs (encoding %.2fs, concatenation %.2fs)"
+        % (nb_segments, duration, encode_duration, duration - encode_duration)
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the preview encoding of a clip in one piece and "
+        "in parallel segments."
+    )
+    harness.add_core_argument(parser)
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="Path to ffmpeg.")
+    parser.add_argument("--tier", default="final", help="Speed tier of the preview.")
+    parser.add_argument(
+        "--segments", type=int, default=4, help="Number of segments (servers)."
+    )
+    parser.add_argument(
+        "--segment-threads",
+        type=int,
+        help="ffmpeg threads of each segment, "
+        "the number of cores divided by the number of segments by default.",
+    )
+    parser.add_argument("--width", type=int, default=1920, help="Clip width.")
+    parser.add_argument("--height", type=int, default=1080, help="Clip height.")
+    parser.add_argument("--fps", default="24", help="Clip frame rate.")
+    parser.add_argument(
+        "--frames", type=int, default=2400, help="Number of frames of the clip."
+    )
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        engine = harness.StubBundle(
+            get_ffmpeg_path=lambda: args.ffmpeg,
+            execute_hook_method=execute_command,
+            temp_artifacts=load_temp_artifacts_module().TempArtifactRegistry(directory),
+        )
+        hook = harness.load_hook("hooks/backburner_hooks.py", engine, args.core)
+        segment_threads = args.segment_threads or max(
+            hook._get_ffmpeg_threads() // args.segments, 1
+        )
+        benchmark_segments(
+            hook,
+            args.tier,
+            args.segments,
+            segment_threads,
+            args.width,
+            args.height,
+            args.fps,
+            args.frames,
+            directory,
+        )
+    finally:
+        shutil.rmtree(directory)
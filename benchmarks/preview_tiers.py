@@ -0,0 +1,155 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compare the encoding time of the FFmpeg previews of each speed tier.
+
+The frames of a synthetic clip are generated once per tier, at the size of
+the tier, and fed to the ffmpeg command line built by the Backburner hooks,
+like read_frame does.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+
+import harness
+
+
+def write_raw_frames(ffmpeg_path, path, width, height, fps, nb_frames):
+    """
+    Write the raw RGB frames of a synthetic clip.
+
+    :param ffmpeg_path: Path to ffmpeg.
+    :param path: Path of the file to write.
+    :param width: Width of the frames.
+    :param height: Height of the frames.
+    :param fps: Frame rate of the clip.
+    :param nb_frames: Number of frames to write.
+    """
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc2=size=%dx%d:rate=%s" % (width, height, fps),
+            "-frames:v",
+            str(nb_frames),
+            "-pix_fmt",
+            "rgb24",
+            "-f",
+            "rawvideo",
+            "-y",
+            path,
+        ],
+        check=True,
+    )
+
+
+def benchmark_tiers(hook, tiers, width, height, fps, nb_frames, nb_runs, directory):
+    """
+    Time the encoding of a clip for each tier.
+
+    :param hook: Backburner hooks instance.
+    :param tiers: List of the tiers to compare.
+    :param width: Width of the clip.
+    :param height: Height of the clip.
+    :param fps: Frame rate of the clip.
+    :param nb_frames: Number of frames of the clip.
+    :param nb_runs: Number of encodings per tier.
+    :param directory: Folder of the files written.
+    """
+    for tier in tiers:
+        tier_width, tier_height = hook._calculate_aspect_ratio(
+            hook.QUICKTIME_TIER_TARGET_HEIGHTS[tier], width, height
+        )
+        raw_path = os.path.join(directory, "%s.raw" % tier)
+        mov_path = os.path.join(directory, "%s.mov" % tier)
+        write_raw_frames(
+            hook.parent.get_ffmpeg_path(),
+            raw_path,
+            tier_width,
+            tier_height,
+            fps,
+            nb_frames,
+        )
+        command = hook._get_ffmpeg_movie_cmd(fps, tier_width, tier_height, tier) + [
+            mov_path
+        ]
+
+        def encode():
+            with open(raw_path, "rb") as fh:
+                subprocess.run(
+                    command,
+                    stdin=fh,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    check=True,
+                )
+
+        median, fastest = harness.time_runs(encode, nb_runs)
+        print(
+            "%-6s %4dx%-4d: median %.2fs, min %.2fs, %.1f fps, %.1f MB"
+            % (
+                tier,
+                tier_width,
+                tier_height,
+                median,
+                fastest,
+                nb_frames / median,
+                os.path.getsize(mov_path) / (1024.0 * 1024.0),
+            )
+        )
+        os.remove(raw_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the encoding time of the FFmpeg preview tiers."
+    )
+    harness.add_core_argument(parser)
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="Path to ffmpeg.")
+    parser.add_argument(
+        "--tiers",
+        nargs="+",
+        default=["draft", "review", "final"],
+        help="Tiers to compare.",
+    )
+    parser.add_argument("--width", type=int, default=1920, help="Clip width.")
+    parser.add_argument("--height", type=int, default=1080, help="Clip height.")
+    parser.add_argument("--fps", default="24", help="Clip frame rate.")
+    parser.add_argument(
+        "--frames", type=int, default=240, help="Number of frames of the clip."
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Encodings per tier.")
+    args = parser.parse_args()
+
+    engine = harness.StubBundle(get_ffmpeg_path=lambda: args.ffmpeg)
+    hook = harness.load_hook("hooks/backburner_hooks.py", engine, args.core)
+
+    directory = tempfile.mkdtemp()
+    try:
+        benchmark_tiers(
+            hook,
+            args.tiers,
+            args.width,
+            args.height,
+            args.fps,
+            args.frames,
+            args.runs,
+            directory,
+        )
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,192 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Measure the throughput of the uploads of a file to several targets by the
+Backburner hooks, for several backburner_upload_threads values.
+
+The uploads are sent to a local HTTP server standing in for the Flow
+Production Tracking site, which waits for a given latency and bandwidth
+before answering each upload.
+"""
+
+import argparse
+import http.server
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from unittest import mock
+
+import harness
+
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    """
+    HTTP server simulating the latency and bandwidth of the uploads to a
+    site.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, latency, bandwidth):
+        """
+        :param latency: Seconds waited before answering an upload.
+        :param bandwidth: Bytes per second of each upload, 0 for no limit.
+        """
+        super().__init__(("127.0.0.1", 0), _UploadHandler)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._lock = threading.Lock()
+        self._attachment_id = 0
+
+    @property
+    def url(self):
+        return "http://%s:%d/upload" % self.server_address
+
+    def next_attachment_id(self):
+        with self._lock:
+            self._attachment_id += 1
+            return self._attachment_id
+
+
+class _UploadHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        size = int(self.headers["Content-Length"])
+        self.rfile.read(size)
+        delay = self.server.latency
+        if self.server.bandwidth:
+            delay += size / float(self.server.bandwidth)
+        time.sleep(delay)
+
+        body = json.dumps({"id": self.server.next_attachment_id()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInConnection(object):
+    """
+    Connection uploading the files to the stand-in server.
+    """
+
+    def __init__(self, url):
+        """
+        :param url: Upload URL of the stand-in server.
+        """
+        self._url = url
+
+    def upload(self, entity_type, entity_id, path, field_name, display_name):
+        with open(path, "rb") as fh:
+            data = fh.read()
+        request = urllib.request.Request(
+            self._url, data=data, headers={"Content-Type": "application/octet-stream"}
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)["id"]
+
+
+def benchmark_uploads(hook, path, nb_targets, nb_threads_values, nb_runs):
+    """
+    Time the upload of a file to several targets.
+
+    :param hook: Backburner hooks instance.
+    :param path: File to upload.
+    :param nb_targets: Number of targets to upload the file for.
+    :param nb_threads_values: List of backburner_upload_threads values.
+    :param nb_runs: Number of runs per value.
+    """
+    targets = [{"type": "Version", "id": index + 1} for index in range(nb_targets)]
+    size = os.path.getsize(path)
+
+    for nb_threads in nb_threads_values:
+        hook.parent.set_setting("backburner_upload_threads", nb_threads)
+        median, fastest = harness.time_runs(
+            lambda: hook._upload_to_each_target(
+                path, targets, "sg_uploaded_movie", "benchmark"
+            ),
+            nb_runs,
+        )
+        print(
+            "%2d threads: median %.3fs, min %.3fs, %.1f uploads/s, %.1f MB/s"
+            % (
+                nb_threads,
+                median,
+                fastest,
+                nb_targets / median,
+                nb_targets * size / median / (1024 * 1024),
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the throughput of the uploads of the Backburner hooks."
+    )
+    harness.add_core_argument(parser)
+    parser.add_argument(
+        "--targets", type=int, default=8, help="Number of targets to upload to."
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8],
+        help="backburner_upload_threads values to compare.",
+    )
+    parser.add_argument(
+        "--size", type=float, default=5, help="Size in MB of the file to upload."
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.2,
+        help="Latency in seconds of the stand-in server.",
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=float,
+        default=20,
+        help="Bandwidth in MB/s of each upload, 0 for no limit.",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Number of runs.")
+    args = parser.parse_args()
+
+    sgtk = harness.import_sgtk(args.core)
+
+    server = StandInServer(args.latency, args.bandwidth * 1024 * 1024)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    engine = harness.StubBundle(
+        settings={"share_uploaded_media": False},
+        shotgun=StandInConnection(server.url),
+    )
+    hook = harness.load_hook("hooks/backburner_hooks.py", engine, args.core)
+
+    with tempfile.NamedTemporaryFile(suffix=".mov") as fh:
+        fh.write(os.urandom(int(args.size * 1024 * 1024)))
+        fh.flush()
+
+        # The upload threads create their own connection.
+        with mock.patch.object(
+            sgtk.util.shotgun,
+            "create_sg_connection",
+            lambda: StandInConnection(server.url),
+        ):
+            benchmark_uploads(hook, fh.name, args.targets, args.threads, args.runs)
+
+    server.shutdown()
@@ -17,13 +17,15 @@ import pwd
 import re
 import sys
 import uuid
-import sgtk.util.pickle as pickle
+import contextlib
+import concurrent.futures
 import logging
 import logging.handlers
 import pprint
 import traceback
 import socket
 import tempfile
+import threading
 
 import sgtk
 from sgtk import TankError
@@ -164,9 +166,70 @@ class FlameEngine(sgtk.platform.Engine):
         self._local_movie_generator = None
 
         self._cmdjob_supports_plugin_name = None
+        self._backburner_default_manager = None
+        self._backburner_probe_cache = None
+        self._backburner_job_manifest = None
+        self._temp_artifacts = None
+        self._media_cache = None
+        self._poster_frame_selector = None
+        self._entity_cache = None
+
+        # Guards the creation of the helpers above which are also used by the
+        # threads submitting the Backburner jobs.
+        self._helpers_lock = threading.RLock()
+
+        # Jobs queued by backburner_job_batch(), per thread since a batch only
+        # applies to the thread that opened it.
+        self._backburner_job_batch_state = threading.local()
+
+        # Thread pool used by submit_local_backburner_job(), created on first use
+        self._backburner_submission_executor = None
+        # Submissions still running in the thread pool
+        self._backburner_pending_submissions = set()
+
+        # When started for a backburner job, backburner.py tells us which app
+        # or hook the job needs. Only load this app, or none if it is a hook,
+        # since loading every app of the environment costs more than most jobs.
+        self._backburner_hooks_only = False
+        backburner_instance = os.environ.get("TOOLKIT_FLAME_BACKBURNER_INSTANCE")
+        if self._engine_mode == self.ENGINE_MODE_BACKBURNER and backburner_instance:
+            args, kwargs = self._get_backburner_init_args(
+                backburner_instance, args, kwargs
+            )
 
         super().__init__(*args, **kwargs)
 
+    def _get_backburner_init_args(self, backburner_instance, args, kwargs):
+        """
+        Replace the environment passed to the engine constructor by one only
+        exposing the app a backburner job needs.
+
+        :param backburner_instance: App or hook instance name of the job.
+        :param args: Positional arguments of the engine constructor,
+            (tk, context, engine_instance_name, env).
+        :param kwargs: Keyword arguments of the engine constructor.
+        :returns: Tuple of the updated (args, kwargs).
+        """
+        args = list(args)
+        if len(args) > 3:
+            engine_instance_name, env = args[2], args[3]
+        else:
+            engine_instance_name = (
+                args[2] if len(args) > 2 else kwargs["engine_instance_name"]
+            )
+            env = kwargs["env"]
+
+        if backburner_instance not in env.get_apps(engine_instance_name):
+            self._backburner_hooks_only = True
+
+        backburner_env = _BackburnerEnvironment(env, backburner_instance)
+        if len(args) > 3:
+            args[3] = backburner_env
+        else:
+            kwargs["env"] = backburner_env
+
+        return args, kwargs
+
     def pre_app_init(self):
         """
         Engine construction/setup done before any apps are initialized
@@ -408,6 +471,16 @@ class FlameEngine(sgtk.platform.Engine):
         if self._engine_mode != self.ENGINE_MODE_DCC:
             return
 
+        self.register_command(
+            "Clean Backburner Temporary Files",
+            self.sweep_backburner_tmp,
+            {
+                "short_name": "sweep_backburner_tmp",
+                "description": "Remove the stale temporary files from the "
+                "Backburner temporary folder.",
+            },
+        )
+
         # run any commands registered via run_at_startup
         commands_to_start = self._get_commands_matching_setting("run_at_startup")
         for instance_name, command_name, callback in commands_to_start:
@@ -431,6 +504,16 @@ class FlameEngine(sgtk.platform.Engine):
         os.environ[env_var_name] = env_var_sep.join(paths)
         self.log_debug("Removed to hook paths: %s" % flame_hooks_folder)
 
+        # Wait for the backburner jobs still being submitted
+        if self._backburner_submission_executor is not None:
+            self._backburner_submission_executor.shutdown(wait=True)
+            self._backburner_submission_executor = None
+
+        # The job manifest is removed by its last job
+        if self._backburner_job_manifest is not None:
+            self._backburner_job_manifest.close()
+            self._backburner_job_manifest = None
+
         # Close every app windows
         self.close_windows()
 
@@ -574,6 +657,33 @@ class FlameEngine(sgtk.platform.Engine):
             self.get_setting("previews_preset_path"), flame.PyExporter.PresetType.Movie
         )
 
+    def get_previews_preset_path(self, tier=None):
+        """
+        The location of the flame export preset to use to generate previews
+        of a given speed tier.
+
+        :param tier: "draft", "review" or "final". Use the preview_tier
+            setting if None.
+        :returns: Path as string
+        """
+        import flame
+
+        if tier is None:
+            tier = self.get_setting("preview_tier")
+
+        preset_path = None
+        if tier in ("draft", "review"):
+            preset_path = self.get_setting("%s_previews_preset_path" % tier)
+        elif tier != "final":
+            raise TankError("Unknown preview tier '%s'." % tier)
+
+        if not preset_path:
+            return self.previews_preset_path
+
+        return self._get_full_preset_path(
+            preset_path, flame.PyExporter.PresetType.Movie
+        )
+
     @property
     def local_movies_preset_path(self):
         """
@@ -591,6 +701,27 @@ class FlameEngine(sgtk.platform.Engine):
             flame.PyExporter.PresetType.Movie,
         )
 
+    def local_movies_match_previews(self, previews_preset_path):
+        """
+        Tell if the local movies can be used as the previews generated with a
+        given preset, so that the same frames are not encoded twice.
+
+        :param previews_preset_path: Path to the preset used to generate the
+            previews.
+        :returns: True if the local movies can be used as previews.
+        """
+        mode = self.get_setting("local_movies_as_previews")
+        if mode == "never":
+            return False
+        elif mode == "always":
+            return True
+        elif mode != "auto":
+            raise TankError("Unknown local_movies_as_previews value '%s'." % mode)
+
+        return self.transcoder.are_presets_equivalent(
+            previews_preset_path, self.local_movies_preset_path
+        )
+
     @property
     def wiretap_tools_root(self):
         """
@@ -1004,6 +1135,12 @@ class FlameEngine(sgtk.platform.Engine):
         """
         Define QT behaviour. Subclassed from base class.
         """
+        if self._backburner_hooks_only:
+            # The backburner job only runs an engine hook, none of which
+            # have a UI. Do not spend time importing Qt.
+            self.log_debug("Skipping Qt initialization for Backburner hook job")
+            return {"qt_core": None, "qt_gui": None, "dialog_base": None}
+
         if self._engine_mode in (self.ENGINE_MODE_DCC, self.ENGINE_MODE_BACKBURNER):
             # We are running the engine inside of the Flame Application.
             # alternatively, we are running the engine in backburner
@@ -1393,6 +1530,52 @@ class FlameEngine(sgtk.platform.Engine):
             self._thumbnail_generator = tk_flame.LocalMovieGeneratorFFmpeg(engine=self)
         return self._thumbnail_generator
 
+    @property
+    def backburner_probe_cache(self):
+        """
+        :return: Cache of the Backburner binaries probes shared by the Flame
+            session and the Backburner jobs of this host.
+        """
+        if self._backburner_probe_cache is None:
+            tk_flame = self.import_module("tk_flame")
+            self._backburner_probe_cache = tk_flame.BackburnerProbeCache(
+                cache_path=os.path.join(
+                    self.cache_location,
+                    "backburner_probes_%s.json" % socket.gethostname(),
+                ),
+                ttl=self.get_setting("backburner_probe_cache_ttl"),
+            )
+        return self._backburner_probe_cache
+
+    @property
+    def backburner_default_manager(self):
+        """
+        Return the Backburner manager the local backburnerServer is using.
+        :return: Manager host name, empty if none is defined.
+        """
+        if self._backburner_default_manager is not None:
+            return self._backburner_default_manager
+
+        backburner_server_cmd = os.path.join(
+            self._install_root, "backburner", "backburnerServer"
+        )
+        found, bb_manager = self.backburner_probe_cache.get(
+            "manager", backburner_server_cmd
+        )
+        if not found:
+            _, bb_manager, _ = self.execute_hook_method(
+                "execute_command_hooks",
+                "execute_command",
+                command=[backburner_server_cmd, "-q", "MANAGER"],
+            )
+            bb_manager = (bb_manager or "").strip("\n")
+            self.backburner_probe_cache.set(
+                "manager", backburner_server_cmd, bb_manager
+            )
+
+        self._backburner_default_manager = bb_manager
+        return self._backburner_default_manager
+
     @property
     def cmdjob_supports_plugin_name(self):
         """
@@ -1404,14 +1587,23 @@ class FlameEngine(sgtk.platform.Engine):
             return self._cmdjob_supports_plugin_name
 
         backburner_job_cmd = os.path.join(self._install_root, "backburner", "cmdjob")
-        _, backburner_job_cmd_usage, _ = self.execute_hook_method(
-            "execute_command_hooks", "execute_command", command=[backburner_job_cmd]
+        found, supports_plugin_name = self.backburner_probe_cache.get(
+            "supports_plugin_name", backburner_job_cmd
         )
-        self._cmdjob_supports_plugin_name = False
-        for line in backburner_job_cmd_usage.split("\n"):
-            if "-pluginName:" in line:
-                self._cmdjob_supports_plugin_name = True
-                break
+        if not found:
+            _, backburner_job_cmd_usage, _ = self.execute_hook_method(
+                "execute_command_hooks", "execute_command", command=[backburner_job_cmd]
+            )
+            supports_plugin_name = False
+            for line in (backburner_job_cmd_usage or "").split("\n"):
+                if "-pluginName:" in line:
+                    supports_plugin_name = True
+                    break
+            self.backburner_probe_cache.set(
+                "supports_plugin_name", backburner_job_cmd, supports_plugin_name
+            )
+
+        self._cmdjob_supports_plugin_name = supports_plugin_name
         return self._cmdjob_supports_plugin_name
 
     @staticmethod
@@ -1505,38 +1697,36 @@ class FlameEngine(sgtk.platform.Engine):
             return splited_hostname[0] + ".local"
         return splited_hostname[0]
 
-    def create_local_backburner_job(
-        self,
-        job_name,
-        description,
-        dependencies,
-        instance,
-        method_name,
-        args,
-        backburner_server_host=None,
+    def get_backburner_server_count(self):
+        """
+        Return the number of Backburner servers the jobs can be dispatched
+        to, to size the work that can run in parallel.
+
+        :return: Number of servers, 1 if unknown.
+        """
+        if self.get_setting("backburner_server_group"):
+            return max(self.get_setting("backburner_server_group_size"), 1)
+
+        bb_servers = self.get_setting("backburner_servers")
+        if bb_servers:
+            return len([server for server in bb_servers.split(",") if server.strip()])
+
+        return 1
+
+    def _get_backburner_job_args(
+        self, job_name, description, dependencies, backburner_server_host=None
     ):
         """
-        Run a method in the local backburner queue.
+        Build the cmdjob arguments shared by every kind of backburner job
+        submitted by the engine.
 
         :param job_name: Name of the backburner job
         :param description: Description of the backburner job
-        :param dependencies: None if the backburner job should execute arbitrarily. If you
-                             want to set the job up so that it executes after another known task,
-                             pass the backburner id or a list of ids here. This is typically used
-                             in conjunction with a postExportAsset hook where the export task runs
-                             on backburner. In this case, the hook will return the backburner id.
-                             By passing that id into this method, you can create a job which
-                             only executes after the main export task has completed.
-        :param instance: App or hook to remotely call up
-        :param method_name: Name of method to remotely execute
-        :param args: dictionary or args (**argv style) to pass to method at remote execution
+        :param dependencies: None, a backburner job id or a list of ids the job
+                             should wait for.
         :param backburner_server_host: Name of the backburner server host.
-        :return backburner_job_id: Id of the backburner job created
+        :return: List of cmdjob arguments.
         """
-
-        # the backburner executable
-        backburner_job_cmd = os.path.join(self._install_root, "backburner", "cmdjob")
-
         # pass some args - most importantly tell it to run on the local host
         # looks like : chars are not valid so replace those
         backburner_args = []
@@ -1575,15 +1765,7 @@ class FlameEngine(sgtk.platform.Engine):
                 # No backburner manager speficied in settings. Ask local backburnerServer
                 # which manager to choose from. (They might be none running locally)
                 # Before 2018, you needed root privileges to execute this command.
-                backburner_server_cmd = os.path.join(
-                    self._install_root, "backburner", "backburnerServer"
-                )
-                _, bb_manager, _ = self.execute_hook_method(
-                    "execute_command_hooks",
-                    "execute_command",
-                    command=[backburner_server_cmd, "-q", "MANAGER"],
-                )
-                bb_manager = bb_manager.strip("\n")
+                bb_manager = self.backburner_default_manager
 
             if bb_manager:
                 backburner_args.append('-manager:"%s"' % bb_manager)
@@ -1669,38 +1851,191 @@ class FlameEngine(sgtk.platform.Engine):
             else:
                 backburner_args.append("-dependencies:%s" % dependencies)
 
-        # call the bootstrap script
-        backburner_bootstrap = os.path.join(
-            self.disk_location, "python", "startup", "backburner.py"
+        return backburner_args
+
+    @property
+    def backburner_job_manifest(self):
+        """
+        :return: Manifest storing the information of the backburner jobs
+            submitted by this session.
+        """
+        with self._helpers_lock:
+            backburner_tmp = self.get_backburner_tmp()
+            if self._backburner_job_manifest is None or (
+                os.path.dirname(self._backburner_job_manifest.base_path)
+                != backburner_tmp
+            ):
+                if self._backburner_job_manifest is not None:
+                    self._backburner_job_manifest.close()
+                tk_flame = self.import_module("tk_flame")
+                self._backburner_job_manifest = tk_flame.BackburnerJobManifest(
+                    backburner_tmp
+                )
+            return self._backburner_job_manifest
+
+    @property
+    def temp_artifacts(self):
+        """
+        :return: Registry of the temporary files created by this session in
+            the Backburner temporary folder.
+        """
+        with self._helpers_lock:
+            backburner_tmp = self.get_backburner_tmp()
+            if (
+                self._temp_artifacts is None
+                or self._temp_artifacts.directory != backburner_tmp
+            ):
+                tk_flame = self.import_module("tk_flame")
+                self._temp_artifacts = tk_flame.TempArtifactRegistry(backburner_tmp)
+            return self._temp_artifacts
+
+    @property
+    def media_cache(self):
+        """
+        :return: Index of the thumbnails and previews uploaded, shared by the
+            Flame sessions and the Backburner jobs.
+        """
+        with self._helpers_lock:
+            cache_dir = os.path.join(self.get_backburner_tmp(), "tk_flame_media_cache")
+            if self._media_cache is None or self._media_cache.directory != cache_dir:
+                tk_flame = self.import_module("tk_flame")
+                self._media_cache = tk_flame.MediaCache(cache_dir)
+            return self._media_cache
+
+    @property
+    def poster_frame_selector(self):
+        """
+        :return: Selector of the frames used as thumbnails, recording its
+            choices in the media cache.
+        """
+        with self._helpers_lock:
+            media_cache = self.media_cache
+            if (
+                self._poster_frame_selector is None
+                or self._poster_frame_selector.media_cache is not media_cache
+            ):
+                tk_flame = self.import_module("tk_flame")
+                self._poster_frame_selector = tk_flame.PosterFrameSelector(media_cache)
+            return self._poster_frame_selector
+
+    @property
+    def entity_cache(self):
+        """
+        :return: Cache of the Flow Production Tracking queries shared by the
+            publish hooks of this session.
+        """
+        if self._entity_cache is None:
+            tk_flame = self.import_module("tk_flame")
+            self._entity_cache = tk_flame.EntityCache(
+                lambda: self.shotgun,
+                max_entries=self.get_setting("entity_cache_size"),
+                ttl=self.get_setting("entity_cache_ttl"),
+            )
+        return self._entity_cache
+
+    def sweep_backburner_tmp(self, max_age=None):
+        """
+        Remove the temporary files left behind in the Backburner temporary
+        folder by jobs that failed or were never executed, and the old entries
+        of the media cache.
+
+        :param max_age: Minimal age in seconds of the files to remove. Use the
+            backburner_tmp_max_age setting if None.
+        :return: Number of files removed.
+        """
+        if max_age is None:
+            max_age = self.get_setting("backburner_tmp_max_age")
+
+        backburner_tmp = self.get_backburner_tmp()
+        self.log_debug(
+            "Removing temporary files older than %ds from '%s'"
+            % (max_age, backburner_tmp)
         )
 
-        # now we need to capture all of the environment and everything in a file
-        # (thanks backburner!) so that we can replay it later when the task wakes up
-        session_file = os.path.join(
-            temp_dir, "tk_backburner_%s.pickle" % uuid.uuid4().hex
+        # The files still used by this session are never removed
+        keep_paths = list(self.temp_artifacts.artifacts)
+        if self._backburner_job_manifest is not None:
+            keep_paths.extend(self._backburner_job_manifest.paths)
+
+        tk_flame = self.import_module("tk_flame")
+        nb_removed, nb_bytes = tk_flame.sweep_temp_artifacts(
+            backburner_tmp, max_age, log=self.log_debug, keep_paths=keep_paths
         )
 
-        data = {}
-        data["engine_instance"] = self.instance_name
-        data["serialized_context"] = sgtk.context.serialize(self.context)
-        data["instance"] = (
+        # Every file of the media cache is ours, the entries not updated for
+        # a while are forgotten.
+        media_cache_dir = self.media_cache.directory
+        if os.path.isdir(media_cache_dir):
+            nb_cache_removed, nb_cache_bytes = tk_flame.sweep_temp_artifacts(
+                media_cache_dir, max_age, log=self.log_debug, prefixes=None
+            )
+            nb_removed += nb_cache_removed
+            nb_bytes += nb_cache_bytes
+        self.log_info(
+            "Removed %d temporary files (%d bytes) from '%s'"
+            % (nb_removed, nb_bytes, backburner_tmp)
+        )
+        return nb_removed
+
+    def _write_backburner_job_data(self, instance, method_name, args):
+        """
+        Capture all of the environment and everything in the job manifest
+        (thanks backburner!) so that we can replay it later when the task
+        wakes up.
+
+        :param instance: App or hook to remotely call up
+        :param method_name: Name of method to remotely execute
+        :param args: dictionary or args (**argv style) to pass to method at remote execution
+        :return: Reference of the job to pass to backburner.py.
+        """
+        # Information shared by most of the jobs of the session, only stored
+        # once in the manifest.
+        session_data = {}
+        session_data["engine_instance"] = self.instance_name
+        session_data["serialized_context"] = sgtk.context.serialize(self.context)
+        session_data["sgtk_core_location"] = os.path.dirname(sgtk.__path__[0])
+        session_data["flame_version"] = self._flame_version
+        session_data["user_home"] = os.path.expanduser("~")
+        session_data["use_warm_worker"] = self.get_setting("backburner_warm_worker")
+
+        job_data = {}
+        job_data["instance"] = (
             instance if isinstance(instance, str) else instance.instance_name
         )
-        data["method_to_execute"] = method_name
-        data["args"] = args
-        data["sgtk_core_location"] = os.path.dirname(sgtk.__path__[0])
-        data["flame_version"] = self._flame_version
-        data["user_home"] = os.path.expanduser("~")
-        fh = open(session_file, "wb")
-        pickle.dump(data, fh)
-        fh.close()
+        job_data["method_to_execute"] = method_name
+        job_data["args"] = args
+
+        return self.backburner_job_manifest.add_job(session_data, job_data)
+
+    def _submit_backburner_job(self, job_name, backburner_args, session_argument):
+        """
+        Send a job to the backburner manager thru cmdjob.
+
+        :param job_name: Name of the backburner job, used for logging only.
+        :param backburner_args: List of cmdjob arguments.
+        :param session_argument: Argument to pass to the backburner.py
+                                 bootstrap script.
+        :return backburner_job_id: Id of the backburner job created or None
+                                   if the user cancelled the authentication.
+        """
+        # the backburner executable, can be overridden to submit the jobs to
+        # a stand-in for testing.
+        backburner_job_cmd = os.environ.get(
+            "SHOTGUN_FLAME_CMDJOB_PATH",
+            os.path.join(self._install_root, "backburner", "cmdjob"),
+        )
+
+        # call the bootstrap script
+        backburner_bootstrap = os.path.join(
+            self.disk_location, "python", "startup", "backburner.py"
+        )
 
         full_cmd = '"%s" %s "%s" "%s" "%s"' % (
             backburner_job_cmd,
             " ".join(backburner_args),
             self.python_executable,
             backburner_bootstrap,
-            session_file,
+            session_argument,
         )
 
         # On old Flame version, python hooks are running root. We need to run the command as the
@@ -1720,45 +2055,328 @@ class FlameEngine(sgtk.platform.Engine):
                 sgtk.get_authenticated_user().refresh_credentials()
         except sgtk.authentication.AuthenticationCancelled:
             self.log_debug("User cancelled auth. No Backburner job will be created.")
-        else:
-            self.log_debug("Starting Backburner job '%s'" % job_name)
-            self.log_debug("Command line: %s" % full_cmd)
-            self.log_debug("App: %s" % instance)
-            self.log_debug("Method: %s with args %s" % (method_name, args))
+            return None
 
-            # kick it off
-            return_code, stdout, stderr = self.execute_hook_method(
-                "execute_command_hooks",
-                "execute_command",
-                command=[full_cmd],
-                shell=True,
+        self.log_debug("Starting Backburner job '%s'" % job_name)
+        self.log_debug("Command line: %s" % full_cmd)
+
+        # kick it off
+        return_code, stdout, stderr = self.execute_hook_method(
+            "execute_command_hooks",
+            "execute_command",
+            command=[full_cmd],
+            shell=True,
+        )
+        self.log_debug(stdout)
+
+        job_id_regex = re.compile(r"(?<=Successfully submitted job )(\d+)")
+        match = job_id_regex.search(stdout) if return_code == 0 else None
+
+        if not match:
+            error = [
+                "Flow Production Tracking Backburner job could not be created.\n Return code: %d"
+                % return_code
+            ]
+            if stderr:
+                error += ["Reason: " + stderr]
+            error += [
+                "See Backburner logs in /opt/Autodesk/backburner/Network/backburner.log for details."
+            ]
+            self.log_error("%s failed" % full_cmd)
+            self.log_error("%s" % stderr)
+
+            raise TankError("\n".join(error))
+
+        backburner_job_id = match.group(0)
+        self.log_debug("Backburner job created (%s)" % backburner_job_id)
+        return backburner_job_id
+
+    def create_local_backburner_job(
+        self,
+        job_name,
+        description,
+        dependencies,
+        instance,
+        method_name,
+        args,
+        backburner_server_host=None,
+    ):
+        """
+        Run a method in the local backburner queue.
+
+        If a backburner job batch was opened by the calling thread (see
+        :meth:`backburner_job_batch`), the job is only queued and will be sent as a task of a multi-task
+        backburner job when the batch is submitted. None is returned in that case.
+
+        :param job_name: Name of the backburner job
+        :param description: Description of the backburner job
+        :param dependencies: None if the backburner job should execute arbitrarily. If you
+                             want to set the job up so that it executes after another known task,
+                             pass the backburner id or a list of ids here. This is typically used
+                             in conjunction with a postExportAsset hook where the export task runs
+                             on backburner. In this case, the hook will return the backburner id.
+                             By passing that id into this method, you can create a job which
+                             only executes after the main export task has completed.
+        :param instance: App or hook to remotely call up
+        :param method_name: Name of method to remotely execute
+        :param args: dictionary or args (**argv style) to pass to method at remote execution
+        :param backburner_server_host: Name of the backburner server host.
+        :return backburner_job_id: Id of the backburner job created
+        """
+        self.log_debug("App: %s" % instance)
+        self.log_debug("Method: %s with args %s" % (method_name, args))
+
+        backburner_job_batch = self._get_backburner_job_batch()
+        if backburner_job_batch is None:
+            backburner_args = self._get_backburner_job_args(
+                job_name, description, dependencies, backburner_server_host
             )
-            self.log_debug(stdout)
 
-            job_id_regex = re.compile(r"(?<=Successfully submitted job )(\d+)")
-            match = job_id_regex.search(stdout) if return_code == 0 else None
+        job_reference = self._write_backburner_job_data(instance, method_name, args)
+
+        # The temporary files the job removes once done are owned by the job.
+        for path in (args or {}).get("files_to_delete") or []:
+            if path:
+                self.temp_artifacts.release(path)
+
+        if backburner_job_batch is not None:
+            self.log_debug("Queuing Backburner job '%s' in batch" % job_name)
+            backburner_job_batch.append(
+                {
+                    "job_name": job_name,
+                    "description": description,
+                    "dependencies": dependencies,
+                    "backburner_server_host": backburner_server_host,
+                    "job_reference": job_reference,
+                }
+            )
+            return None
+
+        return self._submit_backburner_job(job_name, backburner_args, job_reference)
+
+    def submit_local_backburner_job(
+        self,
+        job_name,
+        description,
+        dependencies,
+        instance,
+        method_name,
+        args,
+        backburner_server_host=None,
+    ):
+        """
+        Run a method in the local backburner queue without waiting for the job
+        submission to complete.
+
+        The job is submitted from a background thread when the
+        backburner_submission_threads setting is not 0, otherwise it is
+        submitted right away. See :meth:`create_local_backburner_job` for the
+        parameters details.
 
-            if match:
-                backburner_job_id = match.group(0)
-                self.log_debug("Backburner job created (%s)" % backburner_job_id)
-                return backburner_job_id
+        The dependencies can contain futures returned by this method. The job
+        will be submitted once these jobs have been submitted.
 
+        :return: A :class:`concurrent.futures.Future` whose result is the
+            backburner job id.
+        """
+        job_args = dict(
+            job_name=job_name,
+            description=description,
+            dependencies=dependencies,
+            instance=instance,
+            method_name=method_name,
+            args=args,
+            backburner_server_host=backburner_server_host,
+        )
+
+        nb_threads = self.get_setting("backburner_submission_threads")
+        if not nb_threads or self._get_backburner_job_batch() is not None:
+            # Synchronous submission. Jobs are only queued when batching anyway.
+            future = concurrent.futures.Future()
+            try:
+                job_args["dependencies"] = self.resolve_backburner_dependencies(
+                    dependencies
+                )
+                future.set_result(self.create_local_backburner_job(**job_args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        # Anything that can prompt the user must happen in the main thread.
+        if sgtk.get_authenticated_user().are_credentials_expired():
+            sgtk.get_authenticated_user().refresh_credentials()
+
+        # Probe cmdjob once here rather than from many threads at once.
+        self.cmdjob_supports_plugin_name
+
+        if self._backburner_submission_executor is None:
+            self._backburner_submission_executor = (
+                concurrent.futures.ThreadPoolExecutor(max_workers=nb_threads)
+            )
+
+        def submit():
+            job_args["dependencies"] = self.resolve_backburner_dependencies(
+                dependencies
+            )
+            return self.create_local_backburner_job(**job_args)
+
+        future = self._backburner_submission_executor.submit(submit)
+        self._backburner_pending_submissions.add(future)
+        future.add_done_callback(self._backburner_pending_submissions.discard)
+        return future
+
+    def _get_backburner_job_batch(self):
+        """
+        :return: List of the jobs queued by the backburner job batch opened by
+            the calling thread, None if it has not opened any.
+        """
+        return getattr(self._backburner_job_batch_state, "jobs", None)
+
+    @staticmethod
+    def resolve_backburner_dependencies(dependencies):
+        """
+        Wait for the job ids of the futures returned by
+        :meth:`submit_local_backburner_job` in a dependency list.
+
+        :param dependencies: None, a backburner job id, a future or a list of
+            them.
+        :return: None, a backburner job id or a list of job ids.
+        """
+        if isinstance(dependencies, concurrent.futures.Future):
+            return dependencies.result()
+
+        if not isinstance(dependencies, list):
+            return dependencies
+
+        job_ids = []
+        for dependency in dependencies:
+            if isinstance(dependency, concurrent.futures.Future):
+                dependency = dependency.result()
+            if dependency is not None:
+                job_ids.append(dependency)
+        return job_ids
+
+    @contextlib.contextmanager
+    def backburner_job_batch(self):
+        """
+        Context manager coalescing every job created thru
+        :meth:`create_local_backburner_job` into multi-task backburner jobs.
+
+        Jobs sharing the same dependencies and servers are sent as the tasks of
+        a single backburner job when the outermost context exits, which saves a
+        cmdjob process and a manager round-trip per job. The queued jobs are
+        discarded if the context exits with an exception. Only the jobs created
+        by the thread opening the batch are queued, the jobs still submitted by
+        the thread pool of :meth:`submit_local_backburner_job` are waited for
+        before the batch opens::
+
+            with engine.backburner_job_batch() as job_ids:
+                for item in items:
+                    engine.create_local_backburner_job(...)
+            # job_ids now holds the ids of the multi-task jobs created.
+
+        :yields: List that will be filled with the backburner job ids created
+                 once the batch is submitted.
+        """
+        job_ids = []
+        if self._get_backburner_job_batch() is not None:
+            # Nested batch, the outermost one will submit the jobs.
+            yield job_ids
+            return
+
+        # The jobs of the batch may depend on the jobs being submitted.
+        concurrent.futures.wait(list(self._backburner_pending_submissions))
+
+        self._backburner_job_batch_state.jobs = []
+        try:
+            yield job_ids
+        except BaseException:
+            # The queued jobs may be incomplete, they are not submitted.
+            pending_jobs = self._backburner_job_batch_state.jobs
+            self._backburner_job_batch_state.jobs = None
+            self.log_debug("Discarding %d batched backburner jobs" % len(pending_jobs))
+            raise
+
+        pending_jobs = self._backburner_job_batch_state.jobs
+        self._backburner_job_batch_state.jobs = None
+        job_ids.extend(self._submit_backburner_job_batch(pending_jobs))
+
+    def _submit_backburner_job_batch(self, pending_jobs):
+        """
+        Submit the jobs queued by a backburner job batch.
+
+        Jobs are grouped by dependencies and backburner servers since these
+        are per job settings in backburner. Each group is sent as one job with
+        one task per queued job, the task parameter being the session file.
+
+        :param pending_jobs: List of job dictionaries queued by
+                             :meth:`create_local_backburner_job`.
+        :return: List of backburner job ids created.
+        """
+        job_groups = {}
+        for pending_job in pending_jobs:
+            dependencies = pending_job["dependencies"]
+            if not dependencies:
+                dependencies = []
+            elif not isinstance(dependencies, list):
+                dependencies = [dependencies]
+            key = (
+                tuple(sorted(set(dependencies))),
+                pending_job["backburner_server_host"],
+            )
+            job_groups.setdefault(key, []).append(pending_job)
+
+        job_ids = []
+        for (dependencies, backburner_server_host), jobs in job_groups.items():
+            first_job = jobs[0]
+            if len(jobs) == 1:
+                backburner_args = self._get_backburner_job_args(
+                    first_job["job_name"],
+                    first_job["description"],
+                    list(dependencies),
+                    backburner_server_host,
+                )
+                job_id = self._submit_backburner_job(
+                    first_job["job_name"],
+                    backburner_args,
+                    first_job["job_reference"],
+                )
             else:
-                error = [
-                    "Flow Production Tracking Backburner job could not be created.\n Return code: %d"
-                    % return_code
-                ]
-                if stderr:
-                    error += ["Reason: " + stderr]
-                error += [
-                    "See Backburner logs in /opt/Autodesk/backburner/Network/backburner.log for details."
-                ]
-                self.log_error("%s failed" % full_cmd)
-                self.log_error("%s" % stderr)
-
-                raise TankError("\n".join(error))
+                job_name = self.sanitize_backburner_job_name(
+                    job_name=first_job["job_name"],
+                    job_suffix=" (+%d tasks)" % (len(jobs) - 1),
+                )
+                description = "Multi-task job: %s" % "; ".join(
+                    sorted(set(job["description"] for job in jobs))
+                )
+                backburner_args = self._get_backburner_job_args(
+                    job_name, description, list(dependencies), backburner_server_host
+                )
 
-        return None
+                # Each line of the task list is a tab separated list of the
+                # task parameters (%tp1, %tp2, ...), the first column being
+                # the task name (-taskName:1) and the second one the session
+                # file passed to the bootstrap script (%tp2).
+                task_list_file = os.path.join(
+                    self.get_backburner_tmp(),
+                    "tk_backburner_tasks_%s.txt" % uuid.uuid4().hex,
+                )
+                with open(task_list_file, "w") as fh:
+                    for index, job in enumerate(jobs):
+                        task_name = self.sanitize_backburner_job_name(
+                            job["job_name"], job_prefix="%d - " % index
+                        )
+                        fh.write("%s\t%s\n" % (task_name, job["job_reference"]))
+
+                backburner_args.append('-taskList:"%s"' % task_list_file)
+                backburner_args.append("-taskName:1")
+
+                job_id = self._submit_backburner_job(job_name, backburner_args, "%tp2")
+
+            if job_id is not None:
+                job_ids.append(job_id)
+
+        return job_ids
 
     ################################################################################################
     # accessors to various core settings and functions
@@ -1840,6 +2458,34 @@ class FlameEngine(sgtk.platform.Engine):
         return self.__get_wiretap_central_binary("read_frame")
 
 
+class _BackburnerEnvironment(object):
+    """
+    Environment wrapper used when the engine is started for a backburner job.
+    It only lists the app the job needs, everything else is forwarded to the
+    actual environment.
+    """
+
+    def __init__(self, env, app_instance_name):
+        """
+        :param env: Environment the engine is started from.
+        :param app_instance_name: Instance name of the only app to expose.
+        """
+        self._env = env
+        self._app_instance_name = app_instance_name
+
+    def get_apps(self, engine):
+        """
+        :param engine: Engine instance name.
+        :returns: List of app instance names to load.
+        """
+        return [
+            app for app in self._env.get_apps(engine) if app == self._app_instance_name
+        ]
+
+    def __getattr__(self, name):
+        return getattr(self._env, name)
+
+
 def sgtk_exception_trap(ex_cls, ex, tb):
     """
     UI Popup and logging exception trap override.
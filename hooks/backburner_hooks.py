@@ -15,11 +15,21 @@ Hook that handles logic and automation around automatic Flame project setup
 import sgtk
 from sgtk import TankError
 from functools import partial
-from tempfile import mkstemp
+import collections
+import concurrent.futures
+import fcntl
 import os
+import shlex
+import subprocess
+import threading
+import time
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# fcntl command to resize a pipe, only exposed by the fcntl module on Linux
+# since Python 3.10.
+F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+
 
 class BackburnerHooks(HookBaseClass):
     # constants
@@ -30,16 +40,40 @@ class BackburnerHooks(HookBaseClass):
     # default height for thumbs
     SHOTGUN_THUMBNAIL_TARGET_HEIGHT = 400
 
+    # Size requested for the pipe between read_frame and ffmpeg. Frames of a
+    # 4K render are several MB, the default 64 KB pipe makes both processes
+    # wait on each other all the time.
+    PREVIEW_PIPE_SIZE = 8 * 1024 * 1024
+
+    # Number of lines of stderr kept for each process of the preview pipeline
+    PREVIEW_STDERR_LINES = 200
+
+    # Number of seconds between two preview encoding progress reports
+    PREVIEW_PROGRESS_INTERVAL = 10
+
     FFMPEG_PRESET = (
-        "-threads 2 -vcodec libx264 -me_method umh -directpred 3 -coder ac -me_range 16 -g 250 -rc_eq "
+        "-vcodec libx264 -me_method umh -directpred 3 -coder ac -me_range 16 -g 250 -rc_eq "
         "'blurCplx^(1-qComp)' -keyint_min 25 -sc_threshold 40 -i_qfactor 0.71428572 -b_qfactor 0.76923078 "
         "-b_strategy 1 -qcomp 0.6 -qmin 10 -qmax 51 -qdiff 4  -trellis 1 -subq 6 -partitions "
         "+parti8x8+parti4x4+partp8x8+partp4x4+partb8x8 -bidir_refine 1 -cmp 1 -flags2 fastpskip -flags2 "
         "dct8x8 -flags2 mixed_refs -flags2 wpred -refs 2 -deblockalpha 0 -deblockbeta 0 -bf 3 -crf 18 "
     )
 
+    # x264 settings and heights of the preview speed tiers. Draft previews
+    # favor encoding speed to get reviewable media up as soon as possible.
+    FFMPEG_TIER_PRESETS = {
+        "draft": "-vcodec libx264 -preset ultrafast -tune fastdecode -g 25 -crf 28 ",
+        "review": "-vcodec libx264 -preset veryfast -g 250 -crf 23 ",
+        "final": FFMPEG_PRESET,
+    }
+    QUICKTIME_TIER_TARGET_HEIGHTS = {
+        "draft": 360,
+        "review": SHOTGUN_QUICKTIME_TARGET_HEIGHT,
+        "final": SHOTGUN_QUICKTIME_TARGET_HEIGHT,
+    }
+
     def upload_to_shotgun(
-        self, path, targets, field_name, display_name, files_to_delete
+        self, path, targets, field_name, display_name, files_to_delete, cache_key=None
     ):
         """
         Upload a file to Flow Production Tracking, link it to the targets and delete the file.
@@ -52,15 +86,10 @@ class BackburnerHooks(HookBaseClass):
         :param display_name: The display name to use for the file.
         :param files_to_delete: List of files to be deleted upon successful
             upload to Flow Production Tracking.
+        :param cache_key: Key to record the uploaded file with in the engine
+            media cache, None if it must not be cached.
         """
-        for target in targets:
-            self.parent.shotgun.upload(
-                entity_type=target["type"],
-                entity_id=target["id"],
-                path=path,
-                field_name=field_name,
-                display_name=display_name,
-            )
+        self._upload_to_targets(path, targets, field_name, display_name, cache_key)
         if files_to_delete is not None:
             for file_to_delete in files_to_delete:
                 sgtk.util.filesystem.safe_delete_file(file_to_delete)
@@ -88,7 +117,17 @@ class BackburnerHooks(HookBaseClass):
             for file_to_delete in files_to_delete:
                 sgtk.util.filesystem.safe_delete_file(file_to_delete)
 
-    def attach_jpg_preview(self, path, width, height, targets, display_name):
+    def attach_jpg_preview(
+        self,
+        path,
+        width,
+        height,
+        targets,
+        display_name,
+        cache_key=None,
+        poster_frame=None,
+        nb_frames=None,
+    ):
         # first figure out a good scale-down res
         scaled_down_width, scaled_down_height = self._calculate_aspect_ratio(
             self.SHOTGUN_THUMBNAIL_TARGET_HEIGHT, width, height
@@ -102,10 +141,12 @@ class BackburnerHooks(HookBaseClass):
             scaled_down_height,
         )
 
-        jpg_fd, jpg_path = mkstemp(
-            suffix=".jpg",
-            prefix=display_name + ".",
-            dir=self.parent.get_backburner_tmp(),
+        poster_frame = self._get_poster_frame(path, poster_frame, nb_frames)
+        if poster_frame:
+            input_cmd += " -f %d" % poster_frame
+
+        jpg_path = self.parent.temp_artifacts.create_file(
+            suffix=".jpg", label=display_name
         )
         try:
             full_cmd = "%s > %s" % (input_cmd, jpg_path)
@@ -124,65 +165,130 @@ class BackburnerHooks(HookBaseClass):
                 )
                 return return_code
 
-            for target in targets:
-                self.parent.shotgun.upload(
-                    entity_type=target["type"],
-                    entity_id=target["id"],
-                    path=jpg_path,
-                    field_name="thumb_image",
-                    display_name=display_name,
-                )
+            self._upload_to_targets(
+                jpg_path, targets, "thumb_image", display_name, cache_key
+            )
 
         finally:
-            os.close(jpg_fd)
-            sgtk.util.filesystem.safe_delete_file(jpg_path)
+            self.parent.temp_artifacts.discard(jpg_path)
+
+    def attach_mov_preview(
+        self,
+        path,
+        width,
+        height,
+        targets,
+        display_name,
+        fps,
+        cache_key=None,
+        tier="final",
+    ):
+        return self.attach_mov_and_jpg_preview(
+            path=path,
+            width=width,
+            height=height,
+            mov_targets=targets,
+            jpg_targets=[],
+            display_name=display_name,
+            fps=fps,
+            mov_cache_key=cache_key,
+            tier=tier,
+        )
+
+    def attach_mov_and_jpg_preview(
+        self,
+        path,
+        width,
+        height,
+        mov_targets,
+        jpg_targets,
+        display_name,
+        fps,
+        mov_cache_key=None,
+        jpg_cache_key=None,
+        tier="final",
+        poster_frame=None,
+        nb_frames=None,
+    ):
+        """
+        Generate a movie preview and a thumbnail of a clip and upload them.
+
+        The clip is only decoded once, ffmpeg encodes the movie and writes its
+        poster frame as the thumbnail from the same stream.
+
+        :param path: Path to the clip.
+        :param width: Width of the clip.
+        :param height: Height of the clip.
+        :param mov_targets: Flow Production Tracking entities to be linked to the movie.
+        :param jpg_targets: Flow Production Tracking entities to be linked to the
+            thumbnail. No thumbnail is generated if empty.
+        :param display_name: The display name to use for the files.
+        :param fps: Frame rate of the clip.
+        :param mov_cache_key: Key to record the uploaded movie with in the
+            engine media cache, None if it must not be cached.
+        :param jpg_cache_key: Key to record the uploaded thumbnail with in the
+            engine media cache, None if it must not be cached.
+        :param tier: Speed tier of the movie, "draft", "review" or "final".
+        :param poster_frame: Index of the frame to use as thumbnail, None to
+            select it.
+        :param nb_frames: Number of frames of the clip, used to select the
+            poster frame.
+        :returns: The return code of the encoding if it failed, None otherwise.
+        """
+        if tier not in self.FFMPEG_TIER_PRESETS:
+            raise TankError("Unknown preview tier '%s'." % tier)
 
-    def attach_mov_preview(self, path, width, height, targets, display_name, fps):
         # first figure out a good scale-down res
         scaled_down_width, scaled_down_height = self._calculate_aspect_ratio(
-            self.SHOTGUN_QUICKTIME_TARGET_HEIGHT, width, height
+            self.QUICKTIME_TIER_TARGET_HEIGHTS[tier], width, height
         )
 
-        input_cmd = '%s -n "%s@CLIP" -h %s -W %s -H %s -L -N -1 -r' % (
-            self.parent.get_read_frame_path(),
-            path,
-            "%s:Gateway" % self.parent.get_server_hostname(),
-            scaled_down_width,
-            scaled_down_height,
+        read_frame_cmd = self._get_read_frame_movie_cmd(
+            path, scaled_down_width, scaled_down_height
         )
 
-        ffmpeg_cmd = "%s -f rawvideo -top -1 -r %s -pix_fmt rgb24 -s %sx%s -i - -y" % (
-            self.parent.get_ffmpeg_path(),
-            fps,
-            scaled_down_width,
-            scaled_down_height,
+        mov_path = self.parent.temp_artifacts.create_file(
+            suffix=".mov", label=display_name
         )
-
-        mov_fd, mov_path = mkstemp(
-            suffix=".mov",
-            prefix=display_name + ".",
-            dir=self.parent.get_backburner_tmp(),
-        )
-
-        try:
-            full_cmd = "%s | %s %s %s" % (
-                input_cmd,
-                ffmpeg_cmd,
-                self.FFMPEG_PRESET,
-                mov_path,
+        jpg_path = None
+        if jpg_targets:
+            jpg_path = self.parent.temp_artifacts.create_file(
+                suffix=".jpg", label=display_name
             )
 
-            return_code, _, stderr = sgtk.platform.current_engine().execute_hook_method(
-                "execute_command_hooks",
-                "execute_command",
-                command=[full_cmd],
-                shell=True,
+        try:
+            ffmpeg_cmd = self._get_ffmpeg_movie_cmd(
+                fps, scaled_down_width, scaled_down_height, tier
+            ) + [mov_path]
+
+            if jpg_path is not None:
+                # Second output of the same stream: the poster frame, scaled
+                # down to the thumbnail resolution.
+                jpg_width, jpg_height = self._calculate_aspect_ratio(
+                    self.SHOTGUN_THUMBNAIL_TARGET_HEIGHT, width, height
+                )
+                poster_frame = self._get_poster_frame(path, poster_frame, nb_frames)
+                ffmpeg_cmd += [
+                    "-frames:v",
+                    "1",
+                    "-vf",
+                    "select=eq(n\\,%d),scale=%s:%s"
+                    % (poster_frame or 0, jpg_width, jpg_height),
+                    "-q:v",
+                    "2",
+                    "-update",
+                    "1",
+                    jpg_path,
+                ]
+
+            return_code, stderr = self._run_preview_pipeline(
+                read_frame_cmd, ffmpeg_cmd, display_name
             )
 
             if return_code:
                 self.parent.log_warning(
                     "Movie process failed!\nError code: %s\nOutput:\n%s"
-                    % (return_code, stderr.decode("utf-8"))
+                    % (return_code, stderr)
                 )
                 return return_code
 
@@ -194,18 +300,581 @@ class BackburnerHooks(HookBaseClass):
             else:
                 field_name = "sg_uploaded_movie"
 
-            for target in targets:
-                self.parent.shotgun.upload(
-                    entity_type=target["type"],
-                    entity_id=target["id"],
-                    path=mov_path,
-                    field_name=field_name,
-                    display_name=display_name,
+            self._upload_to_targets(
+                mov_path, mov_targets, field_name, display_name, mov_cache_key
+            )
+            if jpg_path is not None:
+                self._upload_to_targets(
+                    jpg_path, jpg_targets, "thumb_image", display_name, jpg_cache_key
                 )
 
         finally:
-            os.close(mov_fd)
-            sgtk.util.filesystem.safe_delete_file(mov_path)
+            self.parent.temp_artifacts.discard([mov_path, jpg_path])
+
+    def encode_preview_segment(
+        self,
+        path,
+        width,
+        height,
+        display_name,
+        fps,
+        first_frame,
+        nb_frames,
+        segment_path,
+        tier="final",
+    ):
+        """
+        Encode a range of frames of a clip, to be concatenated with the other
+        segments of the clip by concat_preview_segments().
+
+        :param path: Path to the clip.
+        :param width: Width of the clip.
+        :param height: Height of the clip.
+        :param display_name: The display name of the clip, used for logging.
+        :param fps: Frame rate of the clip.
+        :param first_frame: Index of the first frame of the segment, 0 being
+            the first frame of the clip.
+        :param nb_frames: Number of frames of the segment.
+        :param segment_path: Path of the movie to write.
+        :param tier: Speed tier of the movie, "draft", "review" or "final".
+        :raises TankError: If the encoding fails.
+        """
+        if tier not in self.FFMPEG_TIER_PRESETS:
+            raise TankError("Unknown preview tier '%s'." % tier)
+
+        scaled_down_width, scaled_down_height = self._calculate_aspect_ratio(
+            self.QUICKTIME_TIER_TARGET_HEIGHTS[tier], width, height
+        )
+
+        read_frame_cmd = self._get_read_frame_movie_cmd(
+            path, scaled_down_width, scaled_down_height, first_frame, nb_frames
+        )
+        ffmpeg_cmd = self._get_ffmpeg_movie_cmd(
+            fps, scaled_down_width, scaled_down_height, tier
+        ) + [segment_path]
+
+        return_code, stderr = self._run_preview_pipeline(
+            read_frame_cmd,
+            ffmpeg_cmd,
+            "%s [%d-%d]" % (display_name, first_frame, first_frame + nb_frames - 1),
+        )
+        if return_code:
+            raise TankError(
+                "Encoding of frames %d to %d of %s failed!\nError code: %s\nOutput:\n%s"
+                % (
+                    first_frame,
+                    first_frame + nb_frames - 1,
+                    path,
+                    return_code,
+                    stderr,
+                )
+            )
+
+    def concat_preview_segments(
+        self, segment_paths, targets, display_name, cache_key=None
+    ):
+        """
+        Stitch the segments encoded by encode_preview_segment() into a
+        single movie, without re-encoding, and upload it.
+
+        :param segment_paths: Paths of the segments, in order.
+        :param targets: Flow Production Tracking entities to be linked to the movie.
+        :param display_name: The display name to use for the file.
+        :param cache_key: Key to record the uploaded movie with in the engine
+            media cache, None if it must not be cached.
+        :raises TankError: If the concatenation fails.
+        """
+        list_path = self.parent.temp_artifacts.create_file(
+            suffix=".txt", label=display_name
+        )
+        mov_path = self.parent.temp_artifacts.create_file(
+            suffix=".mov", label=display_name
+        )
+        try:
+            with open(list_path, "w") as fh:
+                for segment_path in segment_paths:
+                    fh.write("file '%s'\n" % segment_path.replace("'", "'\\''"))
+
+            return_code, _, stderr = self.parent.execute_hook_method(
+                "execute_command_hooks",
+                "execute_command",
+                command=[
+                    self.parent.get_ffmpeg_path(),
+                    "-f",
+                    "concat",
+                    "-safe",
+                    "0",
+                    "-i",
+                    list_path,
+                    "-c",
+                    "copy",
+                    "-y",
+                    mov_path,
+                ],
+            )
+            if return_code:
+                raise TankError(
+                    "Concatenation of the preview segments of %s failed!\n"
+                    "Error code: %s\nOutput:\n%s" % (display_name, return_code, stderr)
+                )
+
+            if self.parent.get_setting("bypass_server_transcoding"):
+                field_name = "sg_uploaded_movie_mp4"
+            else:
+                field_name = "sg_uploaded_movie"
+
+            self._upload_to_targets(
+                mov_path, targets, field_name, display_name, cache_key
+            )
+        finally:
+            self.parent.temp_artifacts.discard(
+                [list_path, mov_path] + list(segment_paths)
+            )
+
+    def _get_read_frame_movie_cmd(
+        self, path, width, height, first_frame=None, nb_frames=None
+    ):
+        """
+        Build the read_frame command line writing the raw frames of a clip on
+        its stdout.
+
+        :param path: Path to the clip.
+        :param width: Width of the frames.
+        :param height: Height of the frames.
+        :param first_frame: Index of the first frame to read, None to read
+            the whole clip.
+        :param nb_frames: Number of frames to read when first_frame is given.
+        :returns: List of the command line arguments.
+        """
+        read_frame_cmd = [
+            self.parent.get_read_frame_path(),
+            "-n",
+            "%s@CLIP" % path,
+            "-h",
+            "%s:Gateway" % self.parent.get_server_hostname(),
+            "-W",
+            str(width),
+            "-H",
+            str(height),
+            "-L",
+        ]
+        if first_frame is None:
+            read_frame_cmd += ["-N", "-1"]
+        else:
+            read_frame_cmd += ["-f", str(first_frame), "-N", str(nb_frames)]
+        read_frame_cmd.append("-r")
+        return read_frame_cmd
+
+    def _read_frame_pixels(self, path, frame, width, height):
+        """
+        Read a single frame of a clip.
+
+        :param path: Path to the clip.
+        :param frame: Index of the frame.
+        :param width: Width of the frame.
+        :param height: Height of the frame.
+        :returns: Bytes of the RGB 8 bits pixels of the frame, None if it
+            cannot be read.
+        """
+        read_frame_cmd = self._get_read_frame_movie_cmd(path, width, height, frame, 1)
+        frame_size = width * height * 3
+
+        if self.parent.get_setting("direct_frame_pipelines"):
+            # Bypass the execute_command hook, see _run_preview_pipeline().
+            try:
+                result = subprocess.run(
+                    read_frame_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    timeout=60,
+                )
+            except (OSError, subprocess.SubprocessError) as e:
+                self.parent.log_debug(
+                    "Cannot read frame %d of %s: %s" % (frame, path, e)
+                )
+                return None
+            if result.returncode or len(result.stdout) < frame_size:
+                return None
+            return result.stdout[:frame_size]
+
+        # The execute_command hook returns text, the pixels go thru a file.
+        raw_path = self.parent.temp_artifacts.create_file(
+            suffix=".raw", label="poster_frame"
+        )
+        try:
+            return_code, _, _ = self.parent.execute_hook_method(
+                "execute_command_hooks",
+                "execute_command",
+                command=["%s > %s" % (self._join_command(read_frame_cmd), raw_path)],
+                shell=True,
+            )
+            if return_code:
+                self.parent.log_debug("Cannot read frame %d of %s" % (frame, path))
+                return None
+            with open(raw_path, "rb") as fh:
+                pixels = fh.read(frame_size)
+            return pixels if len(pixels) == frame_size else None
+        finally:
+            self.parent.temp_artifacts.discard(raw_path)
+
+    @staticmethod
+    def _join_command(command):
+        """
+        :param command: List of the command line arguments.
+        :returns: The command line as a string to run thru a shell.
+        """
+        return " ".join(shlex.quote(arg) for arg in command)
+
+    def _get_poster_frame(self, path, poster_frame, nb_frames):
+        """
+        Get the frame of a clip to use as its thumbnail.
+
+        :param path: Path to the clip.
+        :param poster_frame: Index of the poster frame if already known.
+        :param nb_frames: Number of frames of the clip, None if unknown.
+        :returns: Index of the frame, None to use the first one.
+        """
+        if poster_frame is not None or not nb_frames:
+            return poster_frame
+
+        poster_frame = self.parent.poster_frame_selector.select_poster_frame(
+            path, nb_frames, partial(self._read_frame_pixels, path)
+        )
+        self.parent.log_debug("Selected poster frame %d of %s" % (poster_frame, path))
+        return poster_frame
+
+    def _get_ffmpeg_movie_cmd(self, fps, width, height, tier):
+        """
+        Build the ffmpeg command line encoding the raw frames read from its
+        stdin, without the output path.
+
+        :param fps: Frame rate of the clip.
+        :param width: Width of the frames.
+        :param height: Height of the frames.
+        :param tier: Speed tier of the movie, "draft", "review" or "final".
+        :returns: List of the command line arguments.
+        """
+        return [
+            self.parent.get_ffmpeg_path(),
+            "-f",
+            "rawvideo",
+            "-top",
+            "-1",
+            "-r",
+            str(fps),
+            "-pix_fmt",
+            "rgb24",
+            "-s",
+            "%sx%s" % (width, height),
+            "-i",
+            "-",
+            "-y",
+            "-progress",
+            "pipe:1",
+            "-nostats",
+            "-threads",
+            str(self._get_ffmpeg_threads()),
+        ] + shlex.split(self.FFMPEG_TIER_PRESETS[tier])
+
+    @staticmethod
+    def _get_ffmpeg_threads():
+        """
+        :returns: Number of threads ffmpeg should use, based on the cores this
+            process is allowed to run on.
+        """
+        try:
+            return max(len(os.sched_getaffinity(0)), 1)
+        except AttributeError:
+            return os.cpu_count() or 1
+
+    def _run_preview_pipeline(self, read_frame_cmd, ffmpeg_cmd, display_name):
+        """
+        Stream the frames decoded by read_frame to ffmpeg.
+
+        By default, the processes are run as a shell pipeline thru the
+        execute_command hook. When the direct_frame_pipelines setting is
+        enabled, they are started directly by this process, bypassing the
+        hook: read_frame writes directly in the stdin of ffmpeg thru an
+        enlarged pipe, the frames are never copied by this process, and ffmpeg
+        reports its progress on its stdout, which is logged periodically. Only
+        the last lines of the stderr of both processes are kept.
+
+        :param read_frame_cmd: read_frame command line arguments.
+        :param ffmpeg_cmd: ffmpeg command line arguments, reading from stdin and
+            reporting progress on stdout.
+        :param display_name: Name of the media encoded, used for logging.
+        :returns: Tuple (return code, stderr). The return code is the one of
+            the first process that failed, 0 if both succeeded.
+        """
+        if not self.parent.get_setting("direct_frame_pipelines"):
+            return_code, _, stderr = self.parent.execute_hook_method(
+                "execute_command_hooks",
+                "execute_command",
+                command=[
+                    "%s | %s"
+                    % (
+                        self._join_command(read_frame_cmd),
+                        self._join_command(ffmpeg_cmd),
+                    )
+                ],
+                shell=True,
+            )
+            return return_code, stderr or ""
+
+        read_frame_stderr = collections.deque(maxlen=self.PREVIEW_STDERR_LINES)
+        ffmpeg_stderr = collections.deque(maxlen=self.PREVIEW_STDERR_LINES)
+
+        def read_stderr(stream, lines):
+            for line in iter(stream.readline, b""):
+                lines.append(line.decode("utf-8", "replace").rstrip())
+            stream.close()
+
+        read_frame = subprocess.Popen(
+            read_frame_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            close_fds=True,
+        )
+        ffmpeg = None
+        try:
+            try:
+                fcntl.fcntl(read_frame.stdout, F_SETPIPE_SZ, self.PREVIEW_PIPE_SIZE)
+            except (OSError, ValueError):
+                # Not supported on this platform or above the allowed maximum,
+                # keep the default size.
+                pass
+
+            ffmpeg = subprocess.Popen(
+                ffmpeg_cmd,
+                stdin=read_frame.stdout,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                close_fds=True,
+            )
+            # ffmpeg owns the read end of the pipe now, read_frame gets a SIGPIPE
+            # if ffmpeg exits early.
+            read_frame.stdout.close()
+
+            stderr_threads = [
+                threading.Thread(
+                    target=read_stderr, args=(read_frame.stderr, read_frame_stderr)
+                ),
+                threading.Thread(
+                    target=read_stderr, args=(ffmpeg.stderr, ffmpeg_stderr)
+                ),
+            ]
+            for stderr_thread in stderr_threads:
+                stderr_thread.daemon = True
+                stderr_thread.start()
+
+            start_time = time.time()
+            last_report = start_time
+            progress = {}
+            for line in iter(ffmpeg.stdout.readline, b""):
+                key, _, value = line.decode("utf-8", "replace").strip().partition("=")
+                progress[key] = value
+                if key != "progress":
+                    continue
+
+                now = time.time()
+                if (
+                    value == "end"
+                    or now - last_report >= self.PREVIEW_PROGRESS_INTERVAL
+                ):
+                    last_report = now
+                    self.parent.log_debug(
+                        "Encoding preview for %s: frame %s at %s fps (%.1fs elapsed)"
+                        % (
+                            display_name,
+                            progress.get("frame"),
+                            progress.get("fps"),
+                            now - start_time,
+                        )
+                    )
+            ffmpeg.stdout.close()
+
+            ffmpeg_return_code = ffmpeg.wait()
+            read_frame_return_code = read_frame.wait()
+            for stderr_thread in stderr_threads:
+                stderr_thread.join()
+        except BaseException:
+            # Do not leave the processes and their pipes behind.
+            for process in (ffmpeg, read_frame):
+                if process is not None:
+                    self._kill_process(process)
+            raise
+
+        stderr = "read_frame:\n%s\nffmpeg:\n%s" % (
+            "\n".join(read_frame_stderr),
+            "\n".join(ffmpeg_stderr),
+        )
+        return read_frame_return_code or ffmpeg_return_code, stderr
+
+    @staticmethod
+    def _kill_process(process):
+        """
+        Kill a process started by _run_preview_pipeline() and close its pipes.
+
+        :param process: subprocess.Popen instance.
+        """
+        try:
+            process.kill()
+        except OSError:
+            # Already exited
+            pass
+        process.wait()
+        for stream in (process.stdin, process.stdout, process.stderr):
+            if stream is not None:
+                stream.close()
+
+    def _upload_to_targets(
+        self, path, targets, field_name, display_name, cache_key=None
+    ):
+        """
+        Upload a file to Flow Production Tracking and link it to the targets.
+
+        When the share_uploaded_media setting is enabled, thumbnails are only
+        uploaded once and shared between all the targets. Other files, and
+        thumbnails that cannot be shared, are uploaded for each target.
+
+        :param path: Media file to upload.
+        :param targets: Flow Production Tracking entities to be linked to the file.
+        :param field_name: The internal Flow Production Tracking field name on the entity to
+            store the file in.
+        :param display_name: The display name to use for the file.
+        :param cache_key: Key to record the uploaded file with in the engine
+            media cache, None if it must not be cached.
+        """
+        if not targets:
+            return
+
+        # Movies are uploaded for each target, linking an existing attachment
+        # would skip the transcoding making them playable on the server.
+        if (
+            len(targets) > 1
+            and field_name == "thumb_image"
+            and self.parent.get_setting("share_uploaded_media")
+        ):
+            # share_thumbnail uploads the image once for all the entities.
+            try:
+                attachment_id = self.parent.shotgun.share_thumbnail(
+                    entities=[
+                        {"type": target["type"], "id": target["id"]}
+                        for target in targets
+                    ],
+                    thumbnail_path=path,
+                )
+                self._record_uploaded_media(
+                    cache_key, targets[0], field_name, attachment_id
+                )
+                return
+            except Exception as e:
+                self.parent.log_warning(
+                    "Cannot share thumbnail '%s', uploading it for each "
+                    "target: %s" % (path, e)
+                )
+
+        attachment_ids = self._upload_to_each_target(
+            path, targets, field_name, display_name
+        )
+        self._record_uploaded_media(
+            cache_key, targets[0], field_name, attachment_ids[0]
+        )
+
+    def _record_uploaded_media(self, cache_key, target, field_name, attachment_id):
+        """
+        Record an uploaded file in the engine media cache so that it is reused
+        the next time the same media is published.
+
+        :param cache_key: Key of the media, nothing is recorded if None.
+        :param target: Flow Production Tracking entity the file was uploaded for.
+        :param field_name: The internal Flow Production Tracking field name the
+            file was stored in.
+        :param attachment_id: Id of the Attachment created by the upload.
+        """
+        if cache_key is None:
+            return
+
+        self.parent.media_cache.set(
+            cache_key,
+            {
+                "entity": {"type": target["type"], "id": target["id"]},
+                "field_name": field_name,
+                "attachment_id": attachment_id,
+            },
+        )
+
+    def _upload_to_each_target(self, path, targets, field_name, display_name):
+        """
+        Upload a file to Flow Production Tracking for each target.
+
+        Uploads are done by up to backburner_upload_threads threads, each with
+        its own connection. A failed upload does not stop the others, the
+        failures are reported once all the uploads are done.
+
+        :param path: Media file to upload.
+        :param targets: Flow Production Tracking entities to be linked to the file.
+        :param field_name: The internal Flow Production Tracking field name on the entity to
+            store the file in.
+        :param display_name: The display name to use for the file.
+        :returns: List of the ids of the Attachments created, one per target.
+        :raises TankError: If the upload failed for any target.
+        """
+
+        # Connections cannot be shared between threads, upload threads create
+        # their own.
+        thread_data = threading.local()
+
+        def upload(target):
+            if threading.current_thread() is threading.main_thread():
+                sg = self.parent.shotgun
+            else:
+                if not hasattr(thread_data, "shotgun"):
+                    thread_data.shotgun = sgtk.util.shotgun.create_sg_connection()
+                sg = thread_data.shotgun
+            return sg.upload(
+                entity_type=target["type"],
+                entity_id=target["id"],
+                path=path,
+                field_name=field_name,
+                display_name=display_name,
+            )
+
+        nb_threads = min(
+            max(self.parent.get_setting("backburner_upload_threads"), 1), len(targets)
+        )
+        attachment_ids = []
+        errors = []
+        if nb_threads <= 1:
+            for target in targets:
+                try:
+                    attachment_ids.append(upload(target))
+                except Exception as e:
+                    errors.append((target, e))
+        else:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=nb_threads
+            ) as executor:
+                futures = [
+                    (target, executor.submit(upload, target)) for target in targets
+                ]
+                for target, future in futures:
+                    try:
+                        attachment_ids.append(future.result())
+                    except Exception as e:
+                        errors.append((target, e))
+
+        for target, error in errors:
+            self.parent.log_error(
+                "Cannot upload '%s' to %s %s: %s"
+                % (path, target["type"], target["id"], error)
+            )
+        if errors:
+            raise TankError(
+                "Upload of '%s' failed for %d of %d targets."
+                % (path, len(errors), len(targets))
+            )
+        return attachment_ids
 
     def _calculate_aspect_ratio(self, target_height, width, height):
         """
@@ -11,11 +11,16 @@
 import mimetypes
 import os
 import re
+import urllib.parse
 
 import sgtk
 
 HookBaseClass = sgtk.get_hook_baseclass()
 
+# Maximum number of values of the "in" filters of a single PublishedFile query
+# looking for the paths of rendered Open Clips.
+PUBLISHED_FILE_FILTER_CHUNK_SIZE = 500
+
 # This is a dictionary of file type info that allows the basic collector to
 # identify common production file types and associate them with a display name,
 # item type, and config icon.
@@ -132,6 +137,9 @@ class FlameItemCollector(HookBaseClass):
                 "Preparing Publish...", "Collecting assets to publish..."
             )
 
+            # A new publish starts, forget the media of an aborted one
+            self.engine.thumbnail_generator.reset()
+
             task_templates_setting = settings.get("Task Templates", None)
             task_templates_names = (
                 task_templates_setting.value if task_templates_setting else {}
@@ -142,7 +150,7 @@ class FlameItemCollector(HookBaseClass):
                 None,
             )
             if shot_task_template_code:
-                shot_task_template = self.sg.find_one(
+                shot_task_template = self.engine.entity_cache.find_one(
                     "TaskTemplate", [["code", "is", shot_task_template_code]]
                 )
 
@@ -151,13 +159,17 @@ class FlameItemCollector(HookBaseClass):
                 None,
             )
             if sequence_task_template_code:
-                sequence_task_template = self.sg.find_one(
+                sequence_task_template = self.engine.entity_cache.find_one(
                     "TaskTemplate", [["code", "is", sequence_task_template_code]]
                 )
 
             # Current project
             project = self.publisher.context.project
 
+            # All the assets of an entity share the same context, so contexts
+            # are only built once per entity for the whole collection.
+            contexts = {}
+
             # Flame export last export info
             export_context = self.engine.export_info
 
@@ -176,6 +188,18 @@ class FlameItemCollector(HookBaseClass):
             # dictionary structure.
             if isinstance(export_context, dict):
 
+                # Resolve all the Sequences and Shots at once instead of
+                # querying them one by one.
+                sequences, shots = self._resolve_export_entities(
+                    export_context,
+                    project,
+                    sequence_fields,
+                    shot_fields,
+                    sort_by_fields,
+                    sequence_task_template,
+                    shot_task_template,
+                )
+
                 # The first level of dictionary have the Sequence name as key
                 # and another dictionary as value.
                 for sequence_name, sequence_info in sorted(export_context.items()):
@@ -183,27 +207,7 @@ class FlameItemCollector(HookBaseClass):
 
                     # If the sequence_name is not "".
                     if sequence_name:
-
-                        # We try to find a Sequence with the right code.
-                        # The latest if there's more than one Sequence.
-                        sg_filter = [
-                            ["code", "is", sequence_name],
-                            ["project", "is", project],
-                        ]
-                        sequence = self.sg.find_one(
-                            "Sequence", sg_filter, sequence_fields, sort_by_fields
-                        )
-
-                        if not sequence:
-                            # There's no Sequence with the right code...
-                            # Let's create one!
-                            seq_data = {
-                                "code": sequence_name,
-                                "project": project,
-                                "task_template": sequence_task_template,
-                            }
-
-                            sequence = self.sg.create("Sequence", seq_data)
+                        sequence = sequences[sequence_name.lower()]
 
                         # Let's cache this Sequence information
                         self.cache_entities(parent_item, [sequence])
@@ -215,34 +219,7 @@ class FlameItemCollector(HookBaseClass):
 
                         # If the shot_name is not ""
                         if shot_name:
-                            # The Shot should have the right code name
-                            sg_filter = [["code", "is", shot_name]]
-
-                            if sequence:
-                                # The shot should be linked to the right Sequence
-                                sg_filter.append(["sg_sequence", "is", sequence])
-
-                                # We try to find the right Shot.
-                                # The latest if there's more than one Shot.
-                                shot = self.sg.find_one(
-                                    "Shot", sg_filter, shot_fields, sort_by_fields
-                                )
-
-                            if not shot:
-                                # There's no Shot that match our needs...
-                                # so let's create it !
-                                shot_data = {
-                                    "code": shot_name,
-                                    "project": project,
-                                    "task_template": shot_task_template,
-                                }
-
-                                if sequence:
-                                    # It should be linked to the sequence that
-                                    # we found previously.
-                                    shot_data["sg_sequence"] = sequence
-
-                                shot = self.sg.create("Shot", shot_data)
+                            shot = shots[(sequence_name.lower(), shot_name.lower())]
 
                             # Let's cache this Shot information
                             self.cache_entities(parent_item, [shot])
@@ -300,16 +277,16 @@ class FlameItemCollector(HookBaseClass):
 
                                         # Set the context based on the most precise entity available
                                         if shot:
-                                            item.context = self.publisher.sgtk.context_from_entity_dictionary(
-                                                shot
+                                            item.context = self._get_context(
+                                                shot, contexts
                                             )
                                         elif sequence:
-                                            item.context = self.publisher.sgtk.context_from_entity_dictionary(
-                                                sequence
+                                            item.context = self._get_context(
+                                                sequence, contexts
                                             )
                                         else:
-                                            item.context = self.publisher.sgtk.context_from_entity_dictionary(
-                                                project
+                                            item.context = self._get_context(
+                                                project, contexts
                                             )
 
                                         # This item cannot have another context than this one
@@ -317,38 +294,42 @@ class FlameItemCollector(HookBaseClass):
 
             # When the action is a render, the export_info is a list of asset
             elif isinstance(export_context, list):
+                # We try to find the right Shots, all at once.
+                # The latest if there's more than one Shot.
+                shot_names = set(
+                    asset_info.get("shotName", "") for asset_info in export_context
+                )
+                shot_names.discard("")
+                shots = self._find_latest_entities(
+                    "Shot",
+                    [["code", "in", sorted(shot_names)]],
+                    shot_fields,
+                    sort_by_fields,
+                    lambda shot: shot["code"].lower(),
+                )
+
+                # The fallback is to try to find the PublishedFile linked to
+                # the shot OpenClip and use the same entity. The PublishedFiles
+                # of all the OpenClips are fetched at once.
+                open_clip_paths = [
+                    asset_info["openClipResolvedPath"]
+                    for asset_info in export_context
+                    if "openClipResolvedPath" in asset_info
+                    and asset_info.get("shotName", "").lower() not in shots
+                ]
+                published_file_entities = self._get_published_file_entities(
+                    open_clip_paths, project
+                )
+
                 # We have a list of asset
                 for asset_info in export_context:
-                    shot = None
-                    shot_name = asset_info.get("shotName", "")
-
-                    # We try to find the right Shot.
-                    # The latest if there's more than one Shot.
-                    if shot_name:
-                        sg_filter = [["code", "is", shot_name]]
-                        shot = self.sg.find_one(
-                            "Shot", sg_filter, shot_fields, sort_by_fields
-                        )
+                    shot = shots.get(asset_info.get("shotName", "").lower())
 
-                    # The fallback is to try to find the PublishedFile linked to
-                    # the shot OpenClip and use the same entity.
                     if not shot and "openClipResolvedPath" in asset_info:
-                        filters = [["project", "is", project]]
-                        fields = ["path", "entity"]
-
-                        # Get all PublishedFile of the current project
-                        published_files = self.parent.shotgun.find(
-                            "PublishedFile", filters=filters, fields=fields
+                        shot = published_file_entities.get(
+                            self._normalize_path(asset_info["openClipResolvedPath"])
                         )
 
-                        # Try to find a PublishedFile with the same path as the OpenClip
-                        for publish_file in published_files:
-                            if asset_info["openClipResolvedPath"] in publish_file.get(
-                                "path", {}
-                            ).get("url", ""):
-                                shot = publish_file.get("entity", None)
-                                break
-
                     # Get the items that can be created from this asset dictionary
                     items = self.create_render_items(parent_item, asset_info)
                     for item in items:
@@ -363,21 +344,274 @@ class FlameItemCollector(HookBaseClass):
                         # Set the context based on the most precise entity available
                         if shot:
                             self.cache_entities(parent_item, [shot])
-                            item.context = (
-                                self.publisher.sgtk.context_from_entity_dictionary(shot)
-                            )
+                            item.context = self._get_context(shot, contexts)
                         else:
-                            item.context = (
-                                self.publisher.sgtk.context_from_entity_dictionary(
-                                    project
-                                )
-                            )
+                            item.context = self._get_context(project, contexts)
 
                         # This item cannot have another context than this one
                         item.context_change_allowed = False
         finally:
             self.engine.clear_busy()
 
+    def _get_context(self, entity, contexts):
+        """
+        Get the context of an entity, building it only once.
+
+        :param entity: Entity dictionary.
+        :param contexts: Dictionary of the contexts already built, by entity
+            type and id.
+        :return: Context of the entity.
+        """
+        key = (entity["type"], entity["id"])
+        if key not in contexts:
+            contexts[key] = self.publisher.sgtk.context_from_entity_dictionary(entity)
+        return contexts[key]
+
+    @staticmethod
+    def _normalize_path(path):
+        """
+        :param path: File path or file URL.
+        :return: The path in a form suitable to compare paths.
+        """
+        if path.startswith("file://"):
+            path = urllib.parse.unquote(urllib.parse.urlparse(path).path)
+        return os.path.normcase(os.path.normpath(path))
+
+    def _get_published_file_entities(self, paths, project):
+        """
+        Find the entities linked to the PublishedFiles of some paths.
+
+        The PublishedFiles are filtered on the server by the possible storage
+        relative paths of the paths, or by their file name for the
+        PublishedFiles without storage. These values are split between several
+        queries when there are too many of them for a single request.
+
+        :param paths: List of the paths to look for.
+        :param project: Current project.
+        :return: Dictionary of the entities by normalized path.
+        """
+        if not paths:
+            return {}
+
+        path_caches = set()
+        file_names = set()
+        for path in paths:
+            # The path relative to the storage root is one of the trailing
+            # parts of the path.
+            parts = self._normalize_path(path).replace("\\", "/").strip("/").split("/")
+            for index in range(len(parts)):
+                path_caches.add("/".join(parts[index:]))
+            file_names.add(parts[-1])
+
+        path_caches = sorted(path_caches)
+        file_names = sorted(file_names)
+        published_files = {}
+        chunk_size = PUBLISHED_FILE_FILTER_CHUNK_SIZE
+        for start in range(0, max(len(path_caches), len(file_names)), chunk_size):
+            chunk_filters = []
+            if path_caches[start : start + chunk_size]:
+                chunk_filters.append(
+                    ["path_cache", "in", path_caches[start : start + chunk_size]]
+                )
+            if file_names[start : start + chunk_size]:
+                chunk_filters.append(
+                    ["code", "in", file_names[start : start + chunk_size]]
+                )
+
+            # The PublishedFiles may have been created by another session, they
+            # are not looked up thru the entity cache.
+            for published_file in self.parent.engine.shotgun.find(
+                "PublishedFile",
+                filters=[
+                    ["project", "is", project],
+                    {"filter_operator": "any", "filters": chunk_filters},
+                ],
+                fields=["path", "entity", "created_at"],
+            ):
+                published_files[published_file["id"]] = published_file
+
+        # Index the PublishedFiles by path, the latest of a path wins.
+        entities = {}
+        for published_file in sorted(
+            published_files.values(),
+            key=lambda published_file: (
+                published_file.get("created_at") is not None,
+                published_file.get("created_at"),
+                published_file["id"],
+            ),
+            reverse=True,
+        ):
+            entity = published_file.get("entity")
+            path_info = published_file.get("path") or {}
+            for path in (path_info.get("local_path"), path_info.get("url")):
+                if entity and path:
+                    entities.setdefault(self._normalize_path(path), entity)
+        return entities
+
+    def _find_latest_entities(self, entity_type, filters, fields, order, get_key):
+        """
+        Find entities with a single query and keep the first one found for
+        each key.
+
+        :param entity_type: Type of the entities to find.
+        :param filters: Filters of the query. No query is done if one of the
+            "in" filters has no value.
+        :param fields: Fields to return.
+        :param order: Order of the entities, the first entity of a key wins.
+        :param get_key: Callable returning the key of an entity.
+        :return: Dictionary of the entities by key.
+        """
+        for sg_filter in filters:
+            if sg_filter[1] == "in" and not sg_filter[2]:
+                return {}
+
+        entities = {}
+        for entity in self.engine.entity_cache.find(
+            entity_type, filters, fields, order
+        ):
+            entities.setdefault(get_key(entity), entity)
+        return entities
+
+    def _create_entities(self, entity_type, entities_data):
+        """
+        Create entities with a single batch request.
+
+        :param entity_type: Type of the entities to create.
+        :param entities_data: List of the data of each entity.
+        :return: List of the entities created, in the same order.
+        """
+        if not entities_data:
+            return []
+
+        return self.engine.entity_cache.batch(
+            [
+                {"request_type": "create", "entity_type": entity_type, "data": data}
+                for data in entities_data
+            ]
+        )
+
+    def _resolve_export_entities(
+        self,
+        export_context,
+        project,
+        sequence_fields,
+        shot_fields,
+        sort_by_fields,
+        sequence_task_template,
+        shot_task_template,
+    ):
+        """
+        Find or create the Sequences and Shots of an export.
+
+        Existing entities are fetched with one query per entity type and the
+        missing ones are created with one batch request per entity type. Names
+        are matched regardless of their case, like the Flow Production
+        Tracking filters.
+
+        :param export_context: Export information, by Sequence name then Shot
+            name.
+        :param project: Current project.
+        :param sequence_fields: Sequence fields to return.
+        :param shot_fields: Shot fields to return.
+        :param sort_by_fields: Order of the entities, the first entity of a
+            name is used when several have the same name.
+        :param sequence_task_template: Task template of the created Sequences.
+        :param shot_task_template: Task template of the created Shots.
+        :return: Tuple (Sequences by lower case name, Shots by (Sequence
+            lower case name, Shot lower case name)).
+        """
+        sequence_names = sorted(name for name in export_context if name)
+
+        # We try to find Sequences with the right code.
+        # The latest if there's more than one Sequence.
+        sequences = self._find_latest_entities(
+            "Sequence",
+            [["code", "in", sequence_names], ["project", "is", project]],
+            sequence_fields,
+            sort_by_fields,
+            lambda sequence: sequence["code"].lower(),
+        )
+
+        # There's no Sequence with the right code... Let's create them!
+        # Names only differing by their case share the same Sequence.
+        missing_sequence_names = {}
+        for name in sequence_names:
+            if name.lower() not in sequences:
+                missing_sequence_names.setdefault(name.lower(), name)
+        created_sequences = self._create_entities(
+            "Sequence",
+            [
+                {
+                    "code": sequence_name,
+                    "project": project,
+                    "task_template": sequence_task_template,
+                }
+                for sequence_name in missing_sequence_names.values()
+            ],
+        )
+        sequences.update(zip(missing_sequence_names, created_sequences))
+
+        # Shots are only looked for in their Sequence, a Shot without Sequence
+        # is always created.
+        shot_names = set()
+        for sequence_name, sequence_info in export_context.items():
+            if sequence_name:
+                shot_names.update(name for name in sequence_info if name)
+        sequences_by_id = {sequence["id"]: name for name, sequence in sequences.items()}
+        found_shots = self._find_latest_entities(
+            "Shot",
+            [
+                ["code", "in", sorted(shot_names)],
+                [
+                    "sg_sequence",
+                    "in",
+                    [
+                        {"type": "Sequence", "id": sequence["id"]}
+                        for sequence in sequences.values()
+                    ],
+                ],
+            ],
+            shot_fields + ["sg_sequence"],
+            sort_by_fields,
+            lambda shot: (
+                sequences_by_id.get((shot.get("sg_sequence") or {}).get("id")),
+                shot["code"].lower(),
+            ),
+        )
+
+        shots = {}
+        missing_shot_keys = []
+        missing_shots_data = []
+        for sequence_name, sequence_info in sorted(export_context.items()):
+            for shot_name in sorted(sequence_info):
+                if not shot_name:
+                    continue
+                shot_key = (sequence_name.lower(), shot_name.lower())
+                if shot_key in shots or shot_key in missing_shot_keys:
+                    continue
+                shot = found_shots.get(shot_key) if sequence_name else None
+                if shot:
+                    shots[shot_key] = shot
+                    continue
+
+                # There's no Shot that match our needs... so let's create it!
+                shot_data = {
+                    "code": shot_name,
+                    "project": project,
+                    "task_template": shot_task_template,
+                }
+                if sequence_name:
+                    # It should be linked to the sequence that we found
+                    # previously.
+                    shot_data["sg_sequence"] = sequences[shot_key[0]]
+                missing_shot_keys.append(shot_key)
+                missing_shots_data.append(shot_data)
+
+        shots.update(
+            zip(missing_shot_keys, self._create_entities("Shot", missing_shots_data))
+        )
+        return sequences, shots
+
     def cache_entities(self, item, entities):
         """
         Cache the entity list on the item properties to avoid redundant database query.
@@ -146,7 +146,7 @@ class CreateCutPlugin(HookBaseClass):
         # Make sure that we have the Sequence in our context dict
         if "Sequence" not in item.properties["context"]:
             sequence_fields = ["cuts", "shots", "code"]
-            sequence = self.sg.find_one(
+            sequence = self.engine.entity_cache.find_one(
                 "Sequence", [["shots", "is", item.context.entity]], sequence_fields
             )
             self.cache_entities(item.parent, [sequence])
@@ -186,6 +186,8 @@ class CreateCutPlugin(HookBaseClass):
             cut_fields = ["revision_number"]
 
             # Try to find the previous cut to determine the Cut revision number
+            # The latest Cut may have been created by another session, it is
+            # not looked up thru the entity cache.
             prev_cut = self.sg.find_one(
                 "Cut",
                 [
@@ -203,7 +205,7 @@ class CreateCutPlugin(HookBaseClass):
                 next_revision_number = prev_cut["revision_number"] + 1
 
             # Create the Cut
-            cut = self.sg.create(
+            cut = self.engine.entity_cache.create(
                 "Cut",
                 {
                     "project": item.context.project,
@@ -235,7 +237,7 @@ class CreateCutPlugin(HookBaseClass):
             targets.append(cut)
 
         # Create the CutItem
-        cut_item = self.sg.create("CutItem", cut_item_data)
+        cut_item = self.engine.entity_cache.create("CutItem", cut_item_data)
 
         # Cache that CutItem
         self.cache_entities(item.parent, [cut_item])
@@ -303,7 +305,7 @@ class CreateCutPlugin(HookBaseClass):
             }
 
             # Update teh Cut metadata
-            self.sg.update(
+            self.engine.entity_cache.update(
                 "Cut", item.properties["context"]["Sequence"]["Cut"]["id"], cut_data
             )
 
@@ -71,7 +71,14 @@ class CreateVersionPlugin(HookBaseClass):
         The type string should be one of the data types that toolkit accepts
         as part of its environment configuration.
         """
-        return {}
+        return {
+            "Preview Tier": {
+                "type": "str",
+                "default": "",
+                "description": "Speed tier of the preview generated: draft, review "
+                "or final. The engine preview_tier setting is used if empty.",
+            }
+        }
 
     @property
     def item_filters(self):
@@ -188,7 +195,7 @@ class CreateVersionPlugin(HookBaseClass):
             )
 
         # Create the Version
-        version = self.sg.create("Version", ver_data)
+        version = self.engine.entity_cache.create("Version", ver_data)
 
         # Keep the version reference for the other plugins
         item.properties["Version"] = version
@@ -203,6 +210,7 @@ class CreateVersionPlugin(HookBaseClass):
             dependencies=dependencies,
             target_entities=[version],
             asset_info=asset_info,
+            preview_tier=settings["Preview Tier"].value or None,
         )
 
     def finalize(self, settings, item):
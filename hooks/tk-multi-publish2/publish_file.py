@@ -172,6 +172,13 @@ class CreatePublishPlugin(HookBaseClass):
         # Create the PublishedFile
         published_file = sgtk.util.register_publish(**publish_data)
 
+        # The PublishedFile was not created thru the engine entity cache, so
+        # the queries it may change have to be forgotten.
+        self.engine.entity_cache.invalidate(
+            "PublishedFile",
+            {"entity": item.context.entity, "version": publish_data["version_entity"]},
+        )
+
         # Create a Thumbnail in Background for compatible Flame related PublishedFile
         if item.display_type in [
             "Flame OpenClip",
@@ -205,4 +212,6 @@ class CreatePublishPlugin(HookBaseClass):
         :param item: Item to process
         """
 
-        self.engine.thumbnail_generator.finalize(path=item.properties["path"])
+        # Finalize the same path the thumbnail was generated for
+        path = item.properties.get("file_path", item.properties["path"])
+        self.engine.thumbnail_generator.finalize(path=path)
@@ -120,6 +120,8 @@ class UpdateCutPlugin(HookBaseClass):
 
         # If the context is correct, try to find the CutItem to Update
         if accepted:
+            # The latest CutItem may have been created by another session, it
+            # is not looked up thru the entity cache.
             item.properties["CutItem"] = self.sg.find_one(
                 "CutItem",
                 [["shot", "is", item.context.entity]],
@@ -164,7 +166,9 @@ class UpdateCutPlugin(HookBaseClass):
 
         # If the current Publish session had created a Version, we push it to the CutItem to update
         if version:
-            self.sg.update("CutItem", cut_item["id"], {"version": version})
+            self.engine.entity_cache.update(
+                "CutItem", cut_item["id"], {"version": version}
+            )
 
         # Build the thumbnail generation target list
         targets = [cut_item]
@@ -140,7 +140,7 @@ class UpdateShotPlugin(HookBaseClass):
         # Make sure that we have the Sequence in our context dict
         if "Sequence" not in item.properties["context"]:
             sequence_fields = ["cuts", "shots", "code"]
-            sequence = self.sg.find_one(
+            sequence = self.engine.entity_cache.find_one(
                 "Sequence", [["shots", "is", item.context.entity]], sequence_fields
             )
             self.cache_entities(item.parent, [sequence])
@@ -179,7 +179,7 @@ class UpdateShotPlugin(HookBaseClass):
             target.append(sequence)
 
         # Update the Shot on Flow Production Tracking
-        self.sg.update("Shot", item.context.entity["id"], shot_data)
+        self.engine.entity_cache.update("Shot", item.context.entity["id"], shot_data)
 
         # Create the Image thumbnail in background
         if self.engine.is_thumbnail_supported_for_asset_type(asset_info["assetType"]):
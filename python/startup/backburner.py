@@ -25,13 +25,24 @@
 # -dependencies:1587902041
 # /opt/Autodesk/python/<flame version>/bin/python
 # /Users/manne/git/tk-flame/python/startup/backburner.py
-# /var/folders/fq/65bs7wwx3mz7jdsh4vxm34xc0000gn/T/tk_backburner_f6a70d85fecf420a979357c9d9dd9278.pickle
+# /var/folders/fq/65bs7wwx3mz7jdsh4vxm34xc0000gn/T/tk_backburner_f6a70d85fecf420a979357c9d9dd9278:12
 
-# this script will unpack the pickle parameters file, add sgtk to the pythonpath,
-# start an engine and finally run an app or engine hook method.
+# this script will unpack the job parameters from the job manifest written by
+# the engine (see BackburnerJobManifest), add sgtk to the pythonpath, start an
+# engine and finally run an app or engine hook method. The job is referenced
+# by the manifest base path and the job index in the manifest. Only the index
+# entry, the job record and the session file of the job are read. A path to a
+# pickle file holding all the parameters is supported too.
+#
+# When the backburner_warm_worker engine setting is enabled, the job is handed
+# over to a long lived worker process (see backburner_worker.py) that keeps a
+# started engine around. The job falls back on the steps above if no worker
+# is available on this host.
 
+import importlib.util
 import os
 import sys
+import time
 
 try:
     import sgtk.util.pickle as pickle
@@ -49,81 +60,226 @@ if "SSL_CERT_FILE" not in os.environ:
     if certifi:
         os.environ["SSL_CERT_FILE"] = certifi.where()
 
-pickle_file = sys.argv[1]
-
-if not os.path.exists(pickle_file):
-    raise IOError("Cannot find backburner command file '%s'!" % pickle_file)
-
-with open(pickle_file, "rb") as fh:
-    data = pickle.load(fh)
-
-# get the data out of our pickle
-sgtk_core_location = data["sgtk_core_location"]
-serialized_context = data["serialized_context"]
-engine_instance = data["engine_instance"]
-instance = data["instance"]
-method_to_execute = data["method_to_execute"]
-method_args = data["args"]
-flame_version = data["flame_version"]
-user_home = data["user_home"]
-
-# Make sure that the job is running with the good home
-os.environ["HOME"] = user_home
-
-# add sgtk to our python path
-sys.path.append(sgtk_core_location)
-import sgtk
-
-# first, attempt to launch the engine
-context = sgtk.context.deserialize(serialized_context)
-
-# set a special environment variable to help hint to the engine
-# that we are running a backburner job
-os.environ["TOOLKIT_FLAME_ENGINE_MODE"] = "BACKBURNER"
-
-# set the flame version environment variable to ensure that the pick environment select the right config
-os.environ["SHOTGUN_FLAME_MAJOR_VERSION"] = flame_version["major"]
-os.environ["SHOTGUN_FLAME_MINOR_VERSION"] = flame_version["minor"]
-os.environ["SHOTGUN_FLAME_PATCH_VERSION"] = flame_version["patch"]
-os.environ["SHOTGUN_FLAME_VERSION"] = flame_version["full"]
-
-engine = sgtk.platform.start_engine(engine_instance, context.sgtk, context)
-engine.set_version_info(
-    major_version_str=flame_version["major"],
-    minor_version_str=flame_version["minor"],
-    patch_version_str=flame_version["patch"],
-    full_version_str=flame_version["full"],
-)
-del os.environ["TOOLKIT_FLAME_ENGINE_MODE"]
-engine.log_debug("Engine launched for backburner process.")
-
-# get the app from the instance_name
-app = engine.apps.get(instance, None)
-
-# if the instance is an app, execute the method
-if app:
-    method = getattr(app, method_to_execute)
-    engine.log_debug(
-        "Executing remote callback for app instance %s (%s)" % (instance, app)
+
+def _load_backburner_manifest_module():
+    """
+    Load the job manifest module of the engine on its own, since the rest of
+    the tk_flame package needs sgtk, which is not importable yet.
+
+    :returns: The backburner_manifest module.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "backburner_manifest",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            os.pardir,
+            "tk_flame",
+            "backburner_manifest.py",
+        ),
     )
-    engine.log_debug("Executing callback %s with args %s" % (method, method_args))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+backburner_manifest = _load_backburner_manifest_module()
+
 
-    method(**method_args)
-# if the instance is not an app, it's a hook
-else:
-    engine.log_debug("Executing remote callback for hook %s" % instance)
+def is_manifest_reference(job_reference):
+    """
+    :param job_reference: Argument received from backburner.
+    :returns: True if the job is referenced in a job manifest, False if it is
+        a pickle file.
+    """
+    return not os.path.exists(job_reference) and ":" in job_reference
+
+
+def load_job_data(job_reference):
+    """
+    Load the job information written by the engine.
+
+    :param job_reference: Job manifest reference or path to the backburner
+        command file.
+    :returns: Dictionary of the job information.
+    """
+    if not is_manifest_reference(job_reference):
+        if not os.path.exists(job_reference):
+            raise IOError("Cannot find backburner command file '%s'!" % job_reference)
+
+        with open(job_reference, "rb") as fh:
+            return pickle.load(fh)
+
+    return backburner_manifest.read_job(
+        *backburner_manifest.parse_job_reference(job_reference)
+    )
+
+
+def start_engine(data, minimal=True):
+    """
+    Start the engine for a given job.
+
+    :param data: Job information dictionary.
+    :param minimal: Only load the app or hook needed by the job. The engine
+        will not be able to run jobs for other apps.
+    :returns: The engine started.
+    """
+    start_time = time.time()
+
+    # get the data out of our pickle
+    sgtk_core_location = data["sgtk_core_location"]
+    serialized_context = data["serialized_context"]
+    engine_instance = data["engine_instance"]
+    flame_version = data["flame_version"]
+
+    prepare_environment(data)
+
+    # add sgtk to our python path
+    if sgtk_core_location not in sys.path:
+        sys.path.append(sgtk_core_location)
+    import sgtk
+
+    # first, attempt to launch the engine
+    context = sgtk.context.deserialize(serialized_context)
+
+    # set a special environment variable to help hint to the engine
+    # that we are running a backburner job
+    os.environ["TOOLKIT_FLAME_ENGINE_MODE"] = "BACKBURNER"
+    if minimal:
+        os.environ["TOOLKIT_FLAME_BACKBURNER_INSTANCE"] = data["instance"]
+
+    try:
+        engine = sgtk.platform.start_engine(engine_instance, context.sgtk, context)
+    finally:
+        os.environ.pop("TOOLKIT_FLAME_BACKBURNER_INSTANCE", None)
+    engine.set_version_info(
+        major_version_str=flame_version["major"],
+        minor_version_str=flame_version["minor"],
+        patch_version_str=flame_version["patch"],
+        full_version_str=flame_version["full"],
+    )
+    del os.environ["TOOLKIT_FLAME_ENGINE_MODE"]
     engine.log_debug(
-        "Executing callback %s with args %s" % (method_to_execute, method_args)
+        "Engine launched for backburner process in %.3fs." % (time.time() - start_time)
     )
-    engine.execute_hook_method(instance, method_to_execute, **method_args)
+    return engine
 
-# all done
-engine.log_debug("Backburner execution complete.")
 
-# clean up
-try:
-    engine.log_debug("Trying to remove temporary pickle job file...")
-    os.remove(pickle_file)
-    engine.log_debug("Temporary pickle job successfully deleted.")
-except Exception as e:
-    engine.log_warning("Could not remove temporary file '%s': %s" % (pickle_file, e))
+def prepare_environment(data):
+    """
+    Set up the process environment for a given job.
+
+    :param data: Job information dictionary.
+    """
+    flame_version = data["flame_version"]
+
+    # Make sure that the job is running with the good home
+    os.environ["HOME"] = data["user_home"]
+
+    # set the flame version environment variable to ensure that the pick environment select the right config
+    os.environ["SHOTGUN_FLAME_MAJOR_VERSION"] = flame_version["major"]
+    os.environ["SHOTGUN_FLAME_MINOR_VERSION"] = flame_version["minor"]
+    os.environ["SHOTGUN_FLAME_PATCH_VERSION"] = flame_version["patch"]
+    os.environ["SHOTGUN_FLAME_VERSION"] = flame_version["full"]
+
+
+def execute_job(engine, data):
+    """
+    Run the app or hook method of a given job.
+
+    :param engine: Engine to run the job with.
+    :param data: Job information dictionary.
+    """
+    instance = data["instance"]
+    method_to_execute = data["method_to_execute"]
+    method_args = data["args"]
+
+    # get the app from the instance_name
+    app = engine.apps.get(instance, None)
+
+    # if the instance is an app, execute the method
+    if app:
+        method = getattr(app, method_to_execute)
+        engine.log_debug(
+            "Executing remote callback for app instance %s (%s)" % (instance, app)
+        )
+        engine.log_debug("Executing callback %s with args %s" % (method, method_args))
+
+        method(**method_args)
+    # if the instance is not an app, it's a hook
+    else:
+        engine.log_debug("Executing remote callback for hook %s" % instance)
+        engine.log_debug(
+            "Executing callback %s with args %s" % (method_to_execute, method_args)
+        )
+        engine.execute_hook_method(instance, method_to_execute, **method_args)
+
+    # all done
+    engine.log_debug("Backburner execution complete.")
+
+
+def remove_job_file(engine, pickle_file):
+    """
+    Remove the backburner command file once the job is done. Job manifests
+    are shared by many jobs: the job is recorded as done and the manifest is
+    only removed once all its jobs are done.
+
+    :param engine: Engine used to log.
+    :param pickle_file: Job manifest reference or path to the backburner
+        command file.
+    """
+    if is_manifest_reference(pickle_file):
+        base_path, job_index = backburner_manifest.parse_job_reference(pickle_file)
+        try:
+            backburner_manifest.mark_job_done(base_path, job_index)
+            if backburner_manifest.remove_manifest_if_done(base_path):
+                engine.log_debug("Backburner job manifest successfully deleted.")
+        except Exception as e:
+            engine.log_warning(
+                "Could not clean up job manifest '%s': %s" % (base_path, e)
+            )
+        return
+
+    try:
+        engine.log_debug("Trying to remove temporary pickle job file...")
+        os.remove(pickle_file)
+        engine.log_debug("Temporary pickle job successfully deleted.")
+    except Exception as e:
+        engine.log_warning(
+            "Could not remove temporary file '%s': %s" % (pickle_file, e)
+        )
+
+
+def main(pickle_file):
+    """
+    Execute a backburner job.
+
+    :param pickle_file: Job manifest reference or path to the backburner
+        command file.
+    """
+    data = load_job_data(pickle_file)
+
+    if data.get("use_warm_worker"):
+        # Hand the job over to the warm worker of this host if it is idle.
+        # Otherwise, fallback on running the job in this process, starting a
+        # worker for the next jobs if there is none.
+        import backburner_worker
+
+        result = backburner_worker.submit_job(data, pickle_file)
+        if result is None:
+            backburner_worker.spawn_worker(data)
+        elif result != backburner_worker.WORKER_BUSY:
+            if not result.get("success"):
+                raise RuntimeError(
+                    "Backburner job failed in warm worker:\n%s" % result.get("error")
+                )
+            return
+
+    engine = start_engine(data)
+    execute_job(engine, data)
+
+    # clean up
+    remove_job_file(engine, pickle_file)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+# Long lived worker executing backburner jobs with a warm engine.
+#
+# Starting the engine for every backburner job costs more than most of the
+# jobs themselves. When the backburner_warm_worker engine setting is enabled,
+# backburner.py spawns this worker the first time it runs on a host. The worker
+# listens on a local socket, keeps the engine and its Flow Production Tracking
+# connection alive between jobs, and exits after being idle for a while.
+#
+# backburner.py hands a job to the worker by sending the path of its command
+# file and waits for the result. A job only goes to the worker when it is
+# idle, otherwise it runs in its own process like before so that concurrent
+# backburner tasks on the same host are not serialized.
+#
+# typically, the worker is started like this by backburner.py:
+# /opt/Autodesk/python/<flame version>/bin/python
+# /Users/manne/git/tk-flame/python/startup/backburner_worker.py
+# /Users/manne/git/tk-core/python
+# 2026.1
+
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import traceback
+
+# Number of seconds without any job after which the worker exits.
+IDLE_TIMEOUT = 30 * 60
+
+# Returned by submit_job() when the worker is running another job.
+WORKER_BUSY = "busy"
+
+
+def get_socket_path(sgtk_core_location, flame_version):
+    """
+    Return the path of the socket of the worker matching a given core and
+    Flame version for the current user on this host.
+
+    :param sgtk_core_location: Path to the Toolkit core used by the jobs.
+    :param flame_version: Full Flame version string.
+    :returns: Path to the socket.
+    """
+    key = hashlib.sha1(
+        ("%s:%s" % (sgtk_core_location, flame_version)).encode("utf-8")
+    ).hexdigest()[:12]
+    return os.path.join(
+        tempfile.gettempdir(), "tk_flame_bb_worker_%d_%s.sock" % (os.getuid(), key)
+    )
+
+
+def submit_job(data, pickle_file):
+    """
+    Hand a job over to the warm worker of this host.
+
+    :param data: Job information dictionary.
+    :param pickle_file: Job manifest reference or path to the backburner
+        command file.
+    :returns: Result dictionary of the worker, WORKER_BUSY if the worker is
+        running another job, or None if no worker is running. In both last
+        cases, the job must be executed by the caller.
+    """
+    socket_path = get_socket_path(
+        data["sgtk_core_location"], data["flame_version"]["full"]
+    )
+
+    # The lock is held for the whole job so that only one job at a time is
+    # given to the worker, others are executed in their own process.
+    lock_fd = os.open(socket_path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+    try:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return WORKER_BUSY
+
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            try:
+                client.connect(socket_path)
+            except OSError:
+                return None
+
+            client.sendall((pickle_file + "\n").encode("utf-8"))
+            reply = client.makefile("rb").readline()
+        finally:
+            client.close()
+    finally:
+        os.close(lock_fd)
+
+    if not reply:
+        return {"success": False, "error": "Warm worker exited before replying."}
+    return json.loads(reply.decode("utf-8"))
+
+
+def spawn_worker(data):
+    """
+    Start a warm worker in the background for the next jobs. Errors are
+    ignored since the worker is only an optimization.
+
+    :param data: Job information dictionary.
+    """
+    try:
+        with open(os.devnull, "r+b") as devnull:
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    data["sgtk_core_location"],
+                    data["flame_version"]["full"],
+                ],
+                stdin=devnull,
+                stdout=devnull,
+                stderr=devnull,
+                close_fds=True,
+                start_new_session=True,
+            )
+    except Exception:
+        pass
+
+
+class WarmWorker(object):
+    """
+    Execute backburner jobs received on a local socket with a warm engine.
+    """
+
+    def __init__(self, sgtk_core_location, flame_version):
+        """
+        :param sgtk_core_location: Path to the Toolkit core used by the jobs.
+        :param flame_version: Full Flame version string.
+        """
+        self._socket_path = get_socket_path(sgtk_core_location, flame_version)
+        self._engine = None
+
+    def _bind_socket(self, server):
+        """
+        Bind a socket to the path of the worker, only reachable by the current
+        user from the start since the jobs it receives are unpickled.
+
+        :param server: Socket to bind.
+        """
+        umask = os.umask(0o077)
+        try:
+            server.bind(self._socket_path)
+        finally:
+            os.umask(umask)
+
+    def _bind(self):
+        """
+        Create the listening socket.
+
+        :returns: The socket or None if another worker is already listening.
+        """
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._bind_socket(server)
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+
+            # Either another worker is running or a previous one died
+            # without cleaning up after itself.
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self._socket_path)
+            except OSError:
+                os.remove(self._socket_path)
+                self._bind_socket(server)
+            else:
+                server.close()
+                return None
+            finally:
+                probe.close()
+
+        server.listen(1)
+        server.settimeout(IDLE_TIMEOUT)
+        return server
+
+    def _get_engine(self, data):
+        """
+        Return an engine ready to execute a given job, reusing the current
+        one when possible.
+
+        :param data: Job information dictionary.
+        :returns: The engine.
+        """
+        import backburner
+        import sgtk
+
+        backburner.prepare_environment(data)
+        context = sgtk.context.deserialize(data["serialized_context"])
+
+        engine = self._engine
+        if engine is not None:
+            same_engine = (
+                engine.instance_name == data["engine_instance"]
+                and engine.sgtk.pipeline_configuration.get_path()
+                == context.sgtk.pipeline_configuration.get_path()
+            )
+            if same_engine:
+                if engine.context != context:
+                    sgtk.platform.change_context(context)
+                return engine
+
+            engine.destroy()
+            self._engine = None
+
+        # The engine is reused for jobs of other apps, load all of them.
+        self._engine = backburner.start_engine(data, minimal=False)
+        return self._engine
+
+    def _execute(self, pickle_file):
+        """
+        Execute a job.
+
+        :param pickle_file: Job manifest reference or path to the backburner
+        command file.
+        :returns: Result dictionary sent back to backburner.py.
+        """
+        import backburner
+
+        try:
+            data = backburner.load_job_data(pickle_file)
+            engine = self._get_engine(data)
+            backburner.execute_job(engine, data)
+            backburner.remove_job_file(engine, pickle_file)
+        except Exception:
+            return {"success": False, "error": traceback.format_exc()}
+        return {"success": True}
+
+    def serve(self):
+        """
+        Serve jobs until the worker has been idle for IDLE_TIMEOUT seconds.
+        """
+        server = self._bind()
+        if server is None:
+            return
+
+        try:
+            while True:
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    break
+
+                with connection:
+                    pickle_file = (
+                        connection.makefile("rb").readline().decode("utf-8").strip()
+                    )
+                    result = self._execute(pickle_file)
+                    connection.sendall((json.dumps(result) + "\n").encode("utf-8"))
+        finally:
+            server.close()
+            try:
+                os.remove(self._socket_path)
+            except OSError:
+                pass
+            if self._engine is not None:
+                self._engine.destroy()
+
+
+if __name__ == "__main__":
+    sgtk_core_location = sys.argv[1]
+    if sgtk_core_location not in sys.path:
+        sys.path.append(sgtk_core_location)
+
+    WarmWorker(sgtk_core_location, sys.argv[2]).serve()
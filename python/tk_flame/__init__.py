@@ -9,6 +9,13 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 from .wiretap import WiretapHandler
+from .backburner_manifest import BackburnerJobManifest
+from .backburner_probe_cache import BackburnerProbeCache
+from .entity_cache import EntityCache
+from .media_cache import MediaCache
+from .open_clip import OpenClipWriter, read_open_clip_info
+from .poster_frame import PosterFrameSelector
+from .temp_artifacts import TempArtifactRegistry, sweep_temp_artifacts
 from .transcoder import Transcoder
 from .thumbnail_generator_ffmpeg import ThumbnailGeneratorFFmpeg
 from .thumbnail_generator_flame import ThumbnailGeneratorFlame
@@ -0,0 +1,260 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Compact on disk storage of the backburner jobs information.
+
+This module is also loaded on its own by backburner.py, before sgtk can be
+imported, to read the jobs and remove the manifests. It must only depend on
+the standard library.
+"""
+
+__all__ = [
+    "BackburnerJobManifest",
+    "parse_job_reference",
+    "read_job",
+    "mark_job_done",
+    "remove_manifest_if_done",
+]
+
+import glob
+import hashlib
+import io
+import mmap
+import os
+import struct
+import threading
+import uuid
+
+try:
+    import sgtk.util.pickle as pickle
+except ImportError:
+    import pickle
+
+# Format of an entry in the index file: offset and length of the record.
+INDEX_ENTRY_FORMAT = "<QQ"
+
+
+class BackburnerJobManifest(object):
+    """
+    Writer of the information needed by backburner.py to run jobs.
+
+    Instead of one file per job repeating the whole session information, a
+    manifest stores:
+
+    - One ``<base>_<session>.session`` pickle per distinct session
+      information (context, core location, Flame version...).
+    - One ``<base>.jobs`` file where the pickled job records (app or hook,
+      method and arguments) are appended.
+    - One ``<base>.index`` file of fixed size ``<QQ`` entries giving the
+      offset and length of every job record in the jobs file.
+
+    A job is referenced by ``<base>:<index>``, which is what is passed to
+    backburner.py. backburner.py only reads its index entry and job record
+    and the session file the record refers to.
+
+    Once a manifest is closed, a ``<base>.closed`` file gives its number of
+    jobs. Every job run sets the byte at its index in ``<base>.done``, so a
+    retried job is only counted once, and the manifest files are removed when
+    all the jobs have run, either by the last job or by :meth:`close` if they
+    all ran already.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: Directory where the manifest files are written.
+            Must be accessible by the backburner servers.
+        """
+        self._base_path = os.path.join(directory, "tk_backburner_%s" % uuid.uuid4().hex)
+        self._sessions = set()
+        self._nb_jobs = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_path(self):
+        """
+        Path of the manifest files without their extension.
+        """
+        return self._base_path
+
+    @property
+    def paths(self):
+        """
+        Paths of the files of the manifest.
+        """
+        with self._lock:
+            session_paths = [
+                "%s_%s.session" % (self._base_path, session_id)
+                for session_id in self._sessions
+            ]
+        return session_paths + [self._base_path + ".jobs", self._base_path + ".index"]
+
+    @staticmethod
+    def _dumps(data):
+        """
+        :returns: Pickled representation of some data as bytes.
+        """
+        buffer = io.BytesIO()
+        pickle.dump(data, buffer)
+        return buffer.getvalue()
+
+    def _write_session(self, session_data):
+        """
+        Write the session information if not already in the manifest.
+
+        :param session_data: Session information dictionary.
+        :returns: Identifier of the session in the manifest.
+        """
+        session_bytes = self._dumps(session_data)
+        session_id = hashlib.sha1(session_bytes).hexdigest()[:12]
+        session_path = "%s_%s.session" % (self._base_path, session_id)
+        if session_id in self._sessions:
+            try:
+                # Refresh the modification time so that the file is not seen
+                # as stale by the temporary folder sweep while still in use.
+                os.utime(session_path, None)
+                return session_id
+            except OSError:
+                # Removed by a sweep, write it again.
+                pass
+
+        with open(session_path, "wb") as fh:
+            fh.write(session_bytes)
+        self._sessions.add(session_id)
+        return session_id
+
+    def add_job(self, session_data, job_data):
+        """
+        Add a job to the manifest.
+
+        :param session_data: Session information dictionary, stored once for
+            all the jobs sharing the same information.
+        :param job_data: Job specific information dictionary.
+        :returns: Reference of the job to pass to backburner.py.
+        """
+        with self._lock:
+            job_record = dict(job_data)
+            job_record["session"] = self._write_session(session_data)
+            record_bytes = self._dumps(job_record)
+
+            with open(self._base_path + ".jobs", "ab") as fh:
+                fh.seek(0, os.SEEK_END)
+                offset = fh.tell()
+                fh.write(record_bytes)
+
+            # The index entry is written last so that a job can never be
+            # referenced before its record is complete.
+            with open(self._base_path + ".index", "ab") as fh:
+                fh.write(struct.pack(INDEX_ENTRY_FORMAT, offset, len(record_bytes)))
+
+            job_index = self._nb_jobs
+            self._nb_jobs += 1
+
+        return "%s:%d" % (self._base_path, job_index)
+
+    def close(self):
+        """
+        Stop adding jobs to the manifest and have its files removed once all
+        its jobs have run.
+        """
+        with self._lock:
+            if not self._nb_jobs:
+                return
+            with open(self._base_path + ".closed", "w") as fh:
+                fh.write("%d" % self._nb_jobs)
+        remove_manifest_if_done(self._base_path)
+
+
+def parse_job_reference(job_reference):
+    """
+    :param job_reference: Reference of a job returned by
+        :meth:`BackburnerJobManifest.add_job`.
+    :returns: Tuple (path of the manifest files without their extension,
+        index of the job).
+    """
+    base_path, job_index = job_reference.rsplit(":", 1)
+    return base_path, int(job_index)
+
+
+def read_job(base_path, job_index):
+    """
+    Read the information of a job, only loading its index entry, its record
+    and its session file.
+
+    :param base_path: Path of the manifest files without their extension.
+    :param job_index: Index of the job in the manifest.
+    :returns: Dictionary of the job and session information.
+    :raises IOError: If the job is not in the manifest.
+    """
+    entry_size = struct.calcsize(INDEX_ENTRY_FORMAT)
+    with open(base_path + ".index", "rb") as fh:
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            if (job_index + 1) * entry_size > len(index):
+                raise IOError(
+                    "Cannot find job %d in backburner job manifest '%s'!"
+                    % (job_index, base_path)
+                )
+            offset, length = struct.unpack_from(
+                INDEX_ENTRY_FORMAT, index, job_index * entry_size
+            )
+
+    with open(base_path + ".jobs", "rb") as fh:
+        fh.seek(offset)
+        data = pickle.load(io.BytesIO(fh.read(length)))
+
+    with open("%s_%s.session" % (base_path, data.pop("session")), "rb") as fh:
+        data.update(pickle.load(fh))
+
+    return data
+
+
+def mark_job_done(base_path, job_index):
+    """
+    Record that a job has run. Recording the same job again, when backburner
+    retries it, has no effect.
+
+    :param base_path: Path of the manifest files without their extension.
+    :param job_index: Index of the job in the manifest.
+    """
+    fd = os.open(base_path + ".done", os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        os.pwrite(fd, b"\1", job_index)
+    finally:
+        os.close(fd)
+
+
+def remove_manifest_if_done(base_path):
+    """
+    Remove the files of a closed manifest if all its jobs have run.
+
+    :param base_path: Path of the manifest files without their extension.
+    :returns: True if the files were removed.
+    """
+    try:
+        with open(base_path + ".closed", "r") as fh:
+            nb_jobs = int(fh.read())
+        with open(base_path + ".done", "rb") as fh:
+            jobs_done = fh.read(nb_jobs)
+    except (IOError, OSError, ValueError):
+        return False
+
+    # Jobs not run yet are holes in the file, read as zeros.
+    if len(jobs_done) < nb_jobs or jobs_done.count(b"\0"):
+        return False
+
+    paths = glob.glob(glob.escape(base_path) + "_*.session")
+    paths += [base_path + ext for ext in (".jobs", ".index", ".done", ".closed")]
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            # Already removed by the last job or by the session
+            pass
+    return True
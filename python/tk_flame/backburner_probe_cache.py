@@ -0,0 +1,126 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+On disk cache of the results of the Backburner binaries probes.
+"""
+
+__all__ = ["BackburnerProbeCache"]
+
+import json
+import os
+import tempfile
+import time
+
+
+class BackburnerProbeCache(object):
+    """
+    Cache of values obtained by running a Backburner binary, like the default
+    manager or the options supported by cmdjob.
+
+    Values are persisted in a JSON file so they are shared between the Flame
+    session and the backburner jobs. A value is keyed by the probe name and the
+    binary path and is invalidated when the binary is modified or when it is
+    older than the time to live.
+    """
+
+    def __init__(self, cache_path, ttl):
+        """
+        :param cache_path: Path to the JSON file storing the values.
+        :param ttl: Number of seconds a value is valid for. Nothing is
+            cached if 0.
+        """
+        self._cache_path = cache_path
+        self._ttl = ttl
+        self._entries = None
+
+    @staticmethod
+    def _get_key(probe_name, binary_path):
+        """
+        :returns: Key of a value in the cache.
+        """
+        return "%s:%s" % (probe_name, binary_path)
+
+    @staticmethod
+    def _get_mtime(binary_path):
+        """
+        :returns: Modification time of a binary or None if it does not exist.
+        """
+        try:
+            return os.stat(binary_path).st_mtime
+        except OSError:
+            return None
+
+    def _load(self):
+        """
+        :returns: Dictionary of the cached entries.
+        """
+        if self._entries is None:
+            try:
+                with open(self._cache_path, "r") as fh:
+                    self._entries = json.load(fh)
+            except (IOError, OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, probe_name, binary_path):
+        """
+        Return a cached value.
+
+        :param probe_name: Name of the value.
+        :param binary_path: Path to the binary the value was obtained from.
+        :returns: Tuple (found, value).
+        """
+        if not self._ttl:
+            return False, None
+
+        entry = self._load().get(self._get_key(probe_name, binary_path))
+        if entry is None:
+            return False, None
+
+        if entry.get("mtime") != self._get_mtime(binary_path):
+            return False, None
+
+        if time.time() - entry.get("timestamp", 0) > self._ttl:
+            return False, None
+
+        return True, entry.get("value")
+
+    def set(self, probe_name, binary_path, value):
+        """
+        Cache a value. Failure to write the cache are ignored, the value will
+        only be probed again next time.
+
+        :param probe_name: Name of the value.
+        :param binary_path: Path to the binary the value was obtained from.
+        :param value: JSON serializable value.
+        """
+        if not self._ttl:
+            return
+
+        # Reload what other processes may have written in the mean time.
+        self._entries = None
+        entries = self._load()
+        entries[self._get_key(probe_name, binary_path)] = {
+            "mtime": self._get_mtime(binary_path),
+            "timestamp": time.time(),
+            "value": value,
+        }
+
+        cache_dir = os.path.dirname(self._cache_path)
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            tmp_fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=cache_dir)
+            with os.fdopen(tmp_fd, "w") as fh:
+                json.dump(entries, fh)
+            os.replace(tmp_path, self._cache_path)
+        except (IOError, OSError):
+            pass
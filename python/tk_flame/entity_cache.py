@@ -0,0 +1,212 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+In memory cache of the Flow Production Tracking entities of a Flame session.
+"""
+
+__all__ = ["EntityCache"]
+
+import collections
+import copy
+import json
+import threading
+import time
+
+
+class EntityCache(object):
+    """
+    Cache of the results of the Flow Production Tracking queries, shared by
+    the publish hooks of a Flame session.
+
+    The results are cached by entity type, query filters, fields and order,
+    including the queries which found nothing. Each entity type has its own
+    least recently used list, so a type queried often cannot evict the
+    entries of the others, and the entries expire after a time to live.
+
+    The entities created or updated thru the cache invalidate the queries of
+    their type and of the types they link to, since those queries may now
+    return a different result. A query running while its type is invalidated
+    does not cache its result, which may predate the modification.
+    """
+
+    def __init__(self, get_shotgun, max_entries=1000, ttl=300):
+        """
+        :param get_shotgun: Callable returning the Flow Production Tracking
+            API connection of the current thread.
+        :param max_entries: Maximum number of queries cached per entity type.
+        :param ttl: Number of seconds a query is cached for. Nothing is cached
+            if 0.
+        """
+        self._get_shotgun = get_shotgun
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._queries = {}
+        self._generations = collections.Counter()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _get_key(filters, fields, order, limit):
+        """
+        :returns: Key of a query in the cache of its entity type.
+        """
+        return json.dumps(
+            [filters, sorted(fields or []), order or [], limit],
+            sort_keys=True,
+            default=str,
+        )
+
+    def _get(self, entity_type, key):
+        """
+        :returns: Tuple (found, result) of a cached query.
+        """
+        with self._lock:
+            entries = self._queries.get(entity_type)
+            entry = entries.get(key) if entries else None
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del entries[key]
+                self.misses += 1
+                return False, None
+
+            entries.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(entry[1])
+
+    def _get_generation(self, entity_type):
+        """
+        :returns: Number of times the queries of an entity type were
+            invalidated, including the invalidations of every type.
+        """
+        with self._lock:
+            return self._generation, self._generations[entity_type]
+
+    def _set(self, entity_type, key, result, generation):
+        """
+        Cache the result of a query, evicting the least recently used query
+        of the same entity type if needed.
+
+        :param generation: Generation of the entity type when the query
+            started. The result is not cached if the type was invalidated
+            since then.
+        """
+        if self._ttl <= 0 or self._max_entries <= 0:
+            return
+
+        with self._lock:
+            if generation != (self._generation, self._generations[entity_type]):
+                return
+
+            entries = self._queries.setdefault(entity_type, collections.OrderedDict())
+            entries[key] = (time.monotonic() + self._ttl, copy.deepcopy(result))
+            entries.move_to_end(key)
+            while len(entries) > self._max_entries:
+                entries.popitem(last=False)
+
+    def find(self, entity_type, filters, fields=None, order=None, limit=0):
+        """
+        Find entities, like Shotgun.find.
+
+        :param entity_type: Type of the entities to find.
+        :param filters: Filters of the query.
+        :param fields: Fields to return.
+        :param order: Order of the entities.
+        :param limit: Maximum number of entities returned, 0 for all.
+        :returns: List of the entities found.
+        """
+        key = self._get_key(filters, fields, order, limit)
+        found, entities = self._get(entity_type, key)
+        if not found:
+            generation = self._get_generation(entity_type)
+            entities = self._get_shotgun().find(
+                entity_type, filters, fields=fields, order=order, limit=limit
+            )
+            self._set(entity_type, key, entities, generation)
+        return entities
+
+    def find_one(self, entity_type, filters, fields=None, order=None):
+        """
+        Find an entity, like Shotgun.find_one.
+
+        :param entity_type: Type of the entity to find.
+        :param filters: Filters of the query.
+        :param fields: Fields to return.
+        :param order: Order of the entities, the first one is returned.
+        :returns: The entity found or None.
+        """
+        entities = self.find(entity_type, filters, fields, order, limit=1)
+        return entities[0] if entities else None
+
+    def create(self, entity_type, data):
+        """
+        Create an entity, like Shotgun.create.
+
+        :param entity_type: Type of the entity to create.
+        :param data: Fields of the entity.
+        :returns: The entity created.
+        """
+        entity = self._get_shotgun().create(entity_type, data)
+        self.invalidate(entity_type, data)
+        return entity
+
+    def update(self, entity_type, entity_id, data):
+        """
+        Update an entity, like Shotgun.update.
+
+        :param entity_type: Type of the entity to update.
+        :param entity_id: Id of the entity to update.
+        :param data: Fields to update.
+        :returns: The entity updated.
+        """
+        entity = self._get_shotgun().update(entity_type, entity_id, data)
+        self.invalidate(entity_type, data)
+        return entity
+
+    def batch(self, requests):
+        """
+        Run requests in a single transaction, like Shotgun.batch.
+
+        :param requests: List of the requests.
+        :returns: List of the results of each request.
+        """
+        results = self._get_shotgun().batch(requests)
+        for request in requests:
+            self.invalidate(request["entity_type"], request.get("data"))
+        return results
+
+    def invalidate(self, entity_type=None, data=None):
+        """
+        Forget the cached queries which may return a different result once an
+        entity is created or modified.
+
+        :param entity_type: Type of the entity modified, every query is
+            forgotten if None.
+        :param data: Fields of the entity modified. The queries of the types
+            of the entities it links to are forgotten as well.
+        """
+        with self._lock:
+            if entity_type is None:
+                self._queries.clear()
+                self._generation += 1
+                return
+
+            entity_types = set([entity_type])
+            for value in (data or {}).values():
+                links = value if isinstance(value, list) else [value]
+                for link in links:
+                    if isinstance(link, dict) and "type" in link:
+                        entity_types.add(link["type"])
+
+            for linked_type in entity_types:
+                self._queries.pop(linked_type, None)
+                self._generations[linked_type] += 1
@@ -0,0 +1,131 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Persistent index of the thumbnails and previews already uploaded.
+"""
+
+__all__ = ["MediaCache"]
+
+import hashlib
+import json
+import os
+import tempfile
+
+
+class MediaCache(object):
+    """
+    Index of the thumbnails and previews uploaded to Flow Production Tracking,
+    keyed by the content they were generated from.
+
+    A key is a hash of the source media path, modification time and size, of
+    its frame range and of the settings used to generate the media. Each entry
+    is stored in its own JSON file so the Flame session and the Backburner
+    jobs, which record the entries once the media is uploaded, never need to
+    rewrite a shared file.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: Directory where the entries are stored. Must be
+            accessible by the backburner servers.
+        """
+        self._directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def directory(self):
+        """
+        Directory where the entries are stored.
+        """
+        return self._directory
+
+    @staticmethod
+    def get_key(path, asset_info, generation_settings):
+        """
+        Compute the key of a media.
+
+        For file sequences, the modification time and size of the folder
+        holding the frames are used.
+
+        :param path: Path to the source media.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :param generation_settings: JSON serializable value identifying how
+            the media is generated, like the preset used.
+        :returns: The key or None if the source media cannot be found.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            try:
+                stat = os.stat(os.path.dirname(path))
+            except OSError:
+                return None
+
+        key_data = [
+            os.path.abspath(path),
+            stat.st_mtime,
+            stat.st_size,
+            asset_info.get("sourceIn"),
+            asset_info.get("sourceOut"),
+            generation_settings,
+        ]
+        return hashlib.sha1(
+            json.dumps(key_data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def _get_entry_path(self, key):
+        """
+        :returns: Path of the file storing an entry.
+        """
+        return os.path.join(self._directory, "%s.json" % key)
+
+    def get(self, key):
+        """
+        :param key: Key of the media.
+        :returns: The entry of a media or None if not uploaded yet.
+        """
+        try:
+            with open(self._get_entry_path(key), "r") as fh:
+                return json.load(fh)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, key, entry):
+        """
+        Record an uploaded media. Failure to write the entry are ignored, the
+        media will only be uploaded again next time.
+
+        :param key: Key of the media.
+        :param entry: JSON serializable dictionary describing where the media
+            was uploaded.
+        """
+        try:
+            if not os.path.isdir(self._directory):
+                os.makedirs(self._directory)
+            tmp_fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=self._directory)
+            with os.fdopen(tmp_fd, "w") as fh:
+                json.dump(entry, fh)
+            os.replace(tmp_path, self._get_entry_path(key))
+        except (IOError, OSError):
+            pass
+
+    def remove(self, key):
+        """
+        Forget a media, usually because it does not exist on the server anymore.
+
+        :param key: Key of the media.
+        """
+        try:
+            os.remove(self._get_entry_path(key))
+        except OSError:
+            pass
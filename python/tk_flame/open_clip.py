@@ -0,0 +1,309 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Writing and reading of Flame Open Clip files.
+
+This module only depends on the standard library so that it can be
+benchmarked from the command line:
+
+    python open_clip.py /tmp/open_clips --count 10000
+"""
+
+__all__ = ["OpenClipWriter", "get_open_clip_metadata", "read_open_clip_info"]
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+# Field dominance of the scan formats reported by Flame, anything else is
+# progressive.
+FIELD_DOMINANCES = {"FIELD_1": 0, "FIELD_2": 1}
+PROGRESSIVE_FIELD_DOMINANCE = 2
+
+# Flame media handlers by file extension.
+MEDIA_HANDLERS = {".mov": "Quicktime"}
+
+# Template of a single track, single feed Open Clip. Built once, without the
+# indentation, and filled with str.format.
+OPEN_CLIP_TEMPLATE = "".join(line.strip() for line in """
+    <clip type="clip" version="4">
+     <tracks type="tracks">
+      <track type="track" uid="t0">
+       <trackType>video</trackType>
+       <feeds currentVersion="v0">
+        <feed type="feed" vuid="v0" uid="v0">
+         {handler}
+         <storageFormat type="format">
+          <type>video</type>
+          <nbChannels type="uint">{nbChannels}</nbChannels>
+          <channelsDepth type="uint">{channelsDepth}</channelsDepth>
+          <channelsEncoding type="string">{channelsEncoding}</channelsEncoding>
+          <pixelLayout type="string">{pixelLayout}</pixelLayout>
+          <height type="uint">{height}</height>
+          <pixelRatio type="float">{pixelRatio}</pixelRatio>
+          <width type="uint">{width}</width>
+          <fieldDominance type="int">{fieldDominance}</fieldDominance>
+          <colourSpace type="string">{colourSpace}</colourSpace>
+         </storageFormat>
+         <sampleRate>{sampleRate}</sampleRate>
+         <spans type="spans">
+          <span type="span">
+           {duration}
+           <path encoding="pattern">{path}</path>
+          </span>
+         </spans>
+        </feed>
+       </feeds>
+      </track>
+     </tracks>
+    </clip>""".splitlines())
+
+
+def get_open_clip_metadata(src_path, asset_info):
+    """
+    Compute the values of an Open Clip pointing to an exported asset.
+
+    :param src_path: Path to the media of the asset.
+    :param asset_info: Dictionary of attribute passed by Flame's python
+        hooks collected either thru an export (sg_export_hooks.py) or a
+        batch render (sg_batch_hooks.py).
+    :returns: Dictionary of the Open Clip values.
+    :raises ValueError: If the asset information is not valid.
+    """
+    if asset_info.get("assetType") not in ["video", "movie"]:
+        raise ValueError("Cannot create Open clip for non-video assets")
+
+    try:
+        width = int(asset_info["width"])
+        height = int(asset_info["height"])
+        depth = asset_info["depth"]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid asset information %s: %s" % (asset_info, e))
+    if width <= 0 or height <= 0:
+        raise ValueError("Invalid resolution %dx%d" % (width, height))
+
+    metadata = {}
+    metadata["path"] = src_path
+    metadata["height"] = height
+    metadata["width"] = width
+    channels_encoding = asset_info.get("channelsEncoding", None)
+    if channels_encoding is None:
+        channels_encoding = "Float" if "fp" in depth else "Integer"
+    metadata["channelsEncoding"] = channels_encoding
+    metadata["channelsDepth"] = depth.replace("-bit", "").replace(" fp", "")
+    if not metadata["channelsDepth"].isdigit():
+        raise ValueError("Invalid depth '%s'" % depth)
+    metadata["pixelLayout"] = asset_info.get("pixelLayout", "RGB")
+    metadata["nbChannels"] = len(metadata["pixelLayout"])
+    metadata["pixelRatio"] = asset_info.get("aspectRatio", 1.0) * height / width
+    metadata["fieldDominance"] = FIELD_DOMINANCES.get(
+        asset_info.get("scanFormat", "PROGRESSIVE"), PROGRESSIVE_FIELD_DOMINANCE
+    )
+    metadata["colourSpace"] = asset_info.get("colourSpace", "Unknown")
+
+    try:
+        source_in = int(asset_info.get("sourceIn", 0))
+        source_out = int(asset_info.get("sourceOut", source_in + 1))
+        metadata["nbFrames"] = source_out - source_in
+    except (TypeError, ValueError):
+        metadata["nbFrames"] = None
+
+    metadata["sampleRate"] = asset_info.get("fps")
+    metadata["handler"] = MEDIA_HANDLERS.get(os.path.splitext(src_path)[1].lower())
+    return metadata
+
+
+def _format_open_clip(metadata):
+    """
+    :param metadata: Dictionary of the Open Clip values.
+    :returns: The Open Clip document as bytes.
+    """
+    values = {key: escape(str(value)) for key, value in metadata.items()}
+    if metadata["nbFrames"] is not None:
+        values["duration"] = "<duration>%d</duration>" % metadata["nbFrames"]
+    else:
+        values["duration"] = ""
+    if metadata["handler"] is not None:
+        values["handler"] = "<handler><name>%s</name></handler>" % values["handler"]
+    else:
+        values["handler"] = ""
+    return OPEN_CLIP_TEMPLATE.format(**values).encode("utf-8")
+
+
+class OpenClipWriter(object):
+    """
+    Writer of the Open Clip files pointing to exported assets.
+
+    The files are indexed by a hash of their values, so an asset written again
+    with the same information reuses the file written the first time, as long
+    as it still exists.
+    """
+
+    def __init__(self, directory, create_file=None):
+        """
+        :param directory: Directory where the Open Clip files are written.
+        :param create_file: Optional callable creating an empty file given
+            its suffix and returning its path, like
+            TempArtifactRegistry.create_file.
+        """
+        self._directory = directory
+        self._create_file = create_file or self._create_temporary_file
+        self._paths = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _create_temporary_file(self, suffix):
+        """
+        Create an empty file in the directory of the writer.
+
+        :param suffix: Extension of the file, including the dot.
+        :returns: Path of the file created.
+        """
+        tmp_fd, path = tempfile.mkstemp(suffix=suffix, dir=self._directory)
+        os.close(tmp_fd)
+        return path
+
+    def write(self, src_path, asset_info):
+        """
+        Write an Open Clip pointing to an exported asset.
+
+        :param src_path: Path to the media of the asset.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :returns: Path of the Open Clip file.
+        :raises ValueError: If the asset information is not valid.
+        """
+        metadata = get_open_clip_metadata(src_path, asset_info)
+        key = hashlib.sha1(
+            json.dumps(metadata, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+        with self._lock:
+            path = self._paths.get(key)
+            if path is not None:
+                try:
+                    # Refresh the modification time so that the file is not
+                    # seen as stale by the temporary folder sweep.
+                    os.utime(path, None)
+                    self.hits += 1
+                    return path
+                except OSError:
+                    del self._paths[key]
+
+            self.misses += 1
+            path = self._create_file(suffix=".clip")
+            with open(path, "wb") as fh:
+                fh.write(_format_open_clip(metadata))
+            self._paths[key] = path
+            return path
+
+    def forget(self, path):
+        """
+        Stop reusing an Open Clip file, usually because it is about to be
+        removed.
+
+        :param path: Path of the Open Clip file.
+        """
+        with self._lock:
+            for key, cached_path in list(self._paths.items()):
+                if cached_path == path:
+                    del self._paths[key]
+
+
+def read_open_clip_info(path):
+    """
+    Read the versions and feeds of an Open Clip without loading the whole
+    document.
+
+    :param path: Path to the Open Clip file.
+    :returns: Dictionary with the clip format "version", the "current_version"
+        of its feeds and the list of "feeds", each a dictionary with its
+        "vuid", "uid" and span "paths".
+    :raises ValueError: If the file is not a valid Open Clip.
+    """
+    info = {"version": None, "current_version": None, "feeds": []}
+    feed = None
+    try:
+        for event, element in ElementTree.iterparse(path, events=("start", "end")):
+            if event == "start":
+                if element.tag == "clip" and info["version"] is None:
+                    info["version"] = element.get("version")
+                elif element.tag == "feeds" and info["current_version"] is None:
+                    info["current_version"] = element.get("currentVersion")
+                elif element.tag == "feed":
+                    feed = {
+                        "vuid": element.get("vuid"),
+                        "uid": element.get("uid"),
+                        "paths": [],
+                    }
+                    info["feeds"].append(feed)
+            else:
+                if element.tag == "path" and feed is not None:
+                    feed["paths"].append(element.text)
+                elif element.tag == "feed":
+                    feed = None
+                    # Feeds are only inspected once, free their content.
+                    element.clear()
+    except ElementTree.ParseError as e:
+        raise ValueError("%s is not a valid Open Clip: %s" % (path, e))
+
+    if info["version"] is None:
+        raise ValueError("%s is not an Open Clip" % path)
+    return info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the writing and reading of Open Clip files."
+    )
+    parser.add_argument("directory", help="Folder where the files are written.")
+    parser.add_argument(
+        "--count", type=int, default=10000, help="Number of Open Clips to write."
+    )
+    args = parser.parse_args()
+
+    writer = OpenClipWriter(args.directory)
+    asset_info = {
+        "assetType": "video",
+        "width": 1920,
+        "height": 1080,
+        "depth": "10-bit",
+        "fps": 24,
+        "sourceIn": 0,
+        "sourceOut": 100,
+    }
+
+    start = time.time()
+    paths = [
+        writer.write("/mnt/media/shot_%05d.[0000-0099].dpx" % index, asset_info)
+        for index in range(args.count)
+    ]
+    write_time = time.time() - start
+
+    start = time.time()
+    writer.write("/mnt/media/shot_%05d.[0000-0099].dpx" % 0, asset_info)
+    cached_time = time.time() - start
+
+    start = time.time()
+    for path in paths:
+        read_open_clip_info(path)
+    read_time = time.time() - start
+
+    print("Wrote %d Open Clips in %.3fs" % (args.count, write_time))
+    print("Reused an Open Clip in %.6fs" % cached_time)
+    print("Read %d Open Clips in %.3fs" % (args.count, read_time))
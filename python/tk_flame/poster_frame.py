@@ -0,0 +1,201 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Selection of the frame of a media used as its thumbnail.
+"""
+
+__all__ = ["PosterFrameSelector"]
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Rec. 709 luma coefficients
+LUMA_COEFFICIENTS = (0.2126, 0.7152, 0.0722)
+
+
+class PosterFrameSelector(object):
+    """
+    Chooses the poster frame of a media, the frame its thumbnail is made of.
+
+    The poster frame supplied by Flame is used when available. Otherwise a few
+    frames spread over the media are sampled at a low resolution and the
+    brightest frame with the most details wins, which skips black slates and
+    fades. The chosen frame is recorded in the media cache so sampling only
+    happens once per source.
+
+    Sampling reads frames, so it is only meant to run in Backburner jobs;
+    :meth:`get_poster_frame` never reads any frame.
+    """
+
+    # Number of frames sampled
+    NB_SAMPLES = 5
+
+    # Resolution of the frames sampled
+    SAMPLE_WIDTH = 64
+    SAMPLE_HEIGHT = 36
+
+    # Mean luma, between 0 and 255, under which a frame is considered black
+    BLACK_LUMA = 16.0
+
+    def __init__(self, media_cache):
+        """
+        :param media_cache: MediaCache where the chosen frames are recorded.
+        """
+        self._media_cache = media_cache
+
+    @property
+    def media_cache(self):
+        """
+        MediaCache where the chosen frames are recorded.
+        """
+        return self._media_cache
+
+    def _get_cache_key(self, path, nb_frames):
+        """
+        :returns: Key of the poster frame of a media in the media cache, None
+            if the media does not exist yet.
+        """
+        return self._media_cache.get_key(
+            path, {"sourceIn": 0, "sourceOut": nb_frames}, "poster_frame"
+        )
+
+    @staticmethod
+    def get_nb_frames(asset_info):
+        """
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :returns: Number of frames of a media, None if unknown.
+        """
+        try:
+            return int(asset_info["sourceOut"]) - int(asset_info["sourceIn"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def get_flame_poster_frame(asset_info):
+        """
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :returns: Index from the start of the media of the poster frame
+            supplied by Flame, None if not supplied.
+        """
+        poster_frame = asset_info.get("posterFrame")
+        if poster_frame is None:
+            return None
+        try:
+            return max(int(poster_frame) - int(asset_info.get("sourceIn", 0)), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def get_poster_frame(self, path, asset_info):
+        """
+        Get the poster frame of a media without reading any frame.
+
+        :param path: Path to the media.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :returns: Index of the frame from the start of the media, None if it
+            has to be sampled.
+        """
+        poster_frame = self.get_flame_poster_frame(asset_info)
+        if poster_frame is not None:
+            return poster_frame
+
+        nb_frames = self.get_nb_frames(asset_info)
+        if not nb_frames:
+            return None
+
+        cache_key = self._get_cache_key(path, nb_frames)
+        if cache_key is None:
+            return None
+        entry = self._media_cache.get(cache_key)
+        if entry is None:
+            return None
+        return entry.get("poster_frame")
+
+    def get_sample_frames(self, nb_frames):
+        """
+        :param nb_frames: Number of frames of the media.
+        :returns: Indexes of the frames to sample, spread over the media
+            without its first and last frames.
+        """
+        nb_samples = min(self.NB_SAMPLES, nb_frames)
+        return sorted(
+            set(
+                int((index + 0.5) * nb_frames / nb_samples)
+                for index in range(nb_samples)
+            )
+        )
+
+    @classmethod
+    def score_frame(cls, pixels):
+        """
+        Score a frame by its details, black frames get the lowest scores.
+
+        :param pixels: Bytes of the RGB 8 bits pixels of the frame.
+        :returns: Score of the frame, the higher the better.
+        """
+        if numpy is not None:
+            rgb = numpy.frombuffer(pixels, dtype=numpy.uint8)
+            rgb = rgb[: len(rgb) - len(rgb) % 3].reshape(-1, 3)
+            luma = rgb.dot(numpy.array(LUMA_COEFFICIENTS))
+            mean = float(luma.mean()) if len(luma) else 0.0
+            variance = float(luma.var()) if len(luma) else 0.0
+        else:
+            luma = [
+                sum(c * v for c, v in zip(LUMA_COEFFICIENTS, pixels[i : i + 3]))
+                for i in range(0, len(pixels) - 2, 3)
+            ]
+            mean = sum(luma) / len(luma) if luma else 0.0
+            variance = sum((l - mean) ** 2 for l in luma) / len(luma) if luma else 0.0
+
+        if mean < cls.BLACK_LUMA:
+            # Any visible frame wins over a black one
+            return variance - 1e9
+        return variance
+
+    def select_poster_frame(self, path, nb_frames, read_frame):
+        """
+        Choose the poster frame of a media, sampling its frames if the choice
+        was not recorded yet.
+
+        :param path: Path to the media.
+        :param nb_frames: Number of frames of the media.
+        :param read_frame: Callable reading a frame given its index, width and
+            height and returning the bytes of its RGB 8 bits pixels, or None
+            if it cannot be read.
+        :returns: Index of the frame from the start of the media.
+        """
+        if not nb_frames or nb_frames <= 1:
+            return 0
+
+        cache_key = self._get_cache_key(path, nb_frames)
+        if cache_key is not None:
+            entry = self._media_cache.get(cache_key)
+            if entry is not None:
+                return entry.get("poster_frame", 0)
+
+        best_frame = 0
+        best_score = None
+        for frame in self.get_sample_frames(nb_frames):
+            pixels = read_frame(frame, self.SAMPLE_WIDTH, self.SAMPLE_HEIGHT)
+            if not pixels:
+                continue
+            score = self.score_frame(pixels)
+            if best_score is None or score > best_score:
+                best_frame = frame
+                best_score = score
+
+        if cache_key is not None and best_score is not None:
+            self._media_cache.set(cache_key, {"poster_frame": best_frame})
+        return best_frame
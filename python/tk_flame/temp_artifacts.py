@@ -0,0 +1,229 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+"""
+Tracking and clean up of the temporary files written in the Backburner
+temporary folder.
+
+This module only depends on the standard library so that it can be used from
+the command line to clean up a folder:
+
+    python temp_artifacts.py /mnt/shared/tmp --max-age 86400 --dry-run
+"""
+
+__all__ = ["TempArtifactRegistry", "sweep_temp_artifacts"]
+
+import argparse
+import os
+import socket
+import tempfile
+import threading
+import time
+
+# Prefix of the temporary files created thru TempArtifactRegistry.
+ARTIFACT_PREFIX = "tk_flame_tmp_"
+
+# Prefixes of all the files the sweep is allowed to remove: the artifacts and
+# the Backburner job manifests, task lists and legacy command files.
+SWEEPABLE_PREFIXES = (ARTIFACT_PREFIX, "tk_backburner_")
+
+# Number of files removed between two progress reports.
+UNLINK_BATCH_SIZE = 500
+
+
+class TempArtifactRegistry(object):
+    """
+    Registry of the temporary files created by this process.
+
+    Every file is created with a well known prefix and its owner is recorded,
+    so that the files left behind by jobs that failed or were killed can be
+    found and evicted later by :func:`sweep_temp_artifacts`.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: Directory where the temporary files are created.
+        """
+        self._directory = directory
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self):
+        """
+        Directory where the temporary files are created.
+        """
+        return self._directory
+
+    @property
+    def artifacts(self):
+        """
+        Dictionary of the ownership information of the files currently
+        registered, by path.
+        """
+        with self._lock:
+            return dict(self._artifacts)
+
+    def create_file(self, suffix="", label=None):
+        """
+        Create an empty temporary file and register it.
+
+        :param suffix: Extension of the file, including the dot.
+        :param label: Optional text to include in the file name to make it
+            easier to identify.
+        :returns: Path of the file created.
+        """
+        prefix = ARTIFACT_PREFIX
+        if label:
+            prefix += "%s." % label
+        tmp_fd, path = tempfile.mkstemp(
+            suffix=suffix, prefix=prefix, dir=self._directory
+        )
+        os.close(tmp_fd)
+        self.register(path)
+        return path
+
+    def register(self, path):
+        """
+        Register a temporary file created by this process.
+
+        :param path: Path of the file.
+        """
+        with self._lock:
+            self._artifacts[path] = {
+                "uid": os.getuid(),
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "created": time.time(),
+            }
+
+    def release(self, path):
+        """
+        Stop tracking a file, usually because another process, like a
+        Backburner job, is now responsible for removing it.
+
+        :param path: Path of the file.
+        """
+        with self._lock:
+            self._artifacts.pop(path, None)
+
+    def discard(self, paths):
+        """
+        Remove temporary files and unregister them. Files which cannot be
+        removed are left for :func:`sweep_temp_artifacts`.
+
+        :param paths: Path or list of paths of the files.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+
+        for path in paths:
+            if not path:
+                continue
+            self.release(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def sweep_temp_artifacts(
+    directory,
+    max_age,
+    dry_run=False,
+    log=None,
+    keep_paths=None,
+    prefixes=SWEEPABLE_PREFIXES,
+):
+    """
+    Remove the temporary files left behind in a directory.
+
+    Only the files with one of the prefixes, owned by the current user and not
+    modified for more than max_age seconds are removed.
+
+    :param directory: Directory to clean up.
+    :param max_age: Minimal age in seconds of the files to remove.
+    :param dry_run: Only report the files that would be removed.
+    :param log: Optional callable used to report progress.
+    :param keep_paths: Optional list of the paths of files still in use which
+        must not be removed whatever their age, like the files registered in
+        the TempArtifactRegistry of the current process.
+    :param prefixes: Tuple of the prefixes of the files which can be removed,
+        every file can be removed if None.
+    :returns: Tuple (number of files removed, number of bytes freed).
+    """
+    log = log or (lambda message: None)
+    keep_paths = set(os.path.normpath(path) for path in keep_paths or [])
+
+    uid = os.getuid()
+    oldest_mtime = time.time() - max_age
+
+    # A single pass over the directory thru scandir, which gets the file type
+    # and, on most platforms, the stat information without extra calls.
+    stale_files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if prefixes is not None and not entry.name.startswith(prefixes):
+                continue
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.st_uid != uid or stat.st_mtime > oldest_mtime:
+                continue
+            if os.path.normpath(entry.path) in keep_paths:
+                continue
+            stale_files.append((entry.path, stat.st_size))
+
+    if dry_run:
+        for path, _ in stale_files:
+            log("Would remove '%s'" % path)
+        return len(stale_files), sum(size for _, size in stale_files)
+
+    nb_removed = 0
+    nb_bytes = 0
+    for batch_start in range(0, len(stale_files), UNLINK_BATCH_SIZE):
+        for path, size in stale_files[batch_start : batch_start + UNLINK_BATCH_SIZE]:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            nb_removed += 1
+            nb_bytes += size
+        log(
+            "Removed %d/%d temporary files from '%s'"
+            % (nb_removed, len(stale_files), directory)
+        )
+
+    return nb_removed, nb_bytes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Remove the stale temporary files of the Flame engine."
+    )
+    parser.add_argument("directory", help="Backburner temporary folder.")
+    parser.add_argument(
+        "--max-age",
+        type=int,
+        default=7 * 24 * 60 * 60,
+        help="Minimal age in seconds of the files to remove.",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only list the files to remove."
+    )
+    args = parser.parse_args()
+
+    nb_removed, nb_bytes = sweep_temp_artifacts(
+        args.directory, args.max_age, dry_run=args.dry_run, log=print
+    )
+    print("%d files, %d bytes" % (nb_removed, nb_bytes))
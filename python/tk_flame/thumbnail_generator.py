@@ -18,6 +18,7 @@ class ThumbnailGenerator(object):
 
     def __init__(self, engine):
         self._engine = engine
+        self._submitted_jobs = []
 
     @property
     def engine(self):
@@ -26,6 +27,29 @@ class ThumbnailGenerator(object):
         """
         return self._engine
 
+    def _submit_job(self, **kwargs):
+        """
+        Submit a backburner job without waiting for the submission to
+        complete. See FlameEngine.submit_local_backburner_job for the
+        parameters.
+
+        :return: A future whose result is the backburner job id.
+        """
+        submitted_job = self.engine.submit_local_backburner_job(**kwargs)
+        self._submitted_jobs.append(submitted_job)
+        return submitted_job
+
+    def _flush_submitted_jobs(self):
+        """
+        Wait for all the jobs submitted thru _submit_job().
+
+        :return: Backburner job IDs created.
+        """
+        submitted_jobs = self._submitted_jobs
+        self._submitted_jobs = []
+        job_ids = [submitted_job.result() for submitted_job in submitted_jobs]
+        return [job_id for job_id in job_ids if job_id is not None]
+
     @staticmethod
     def _does_entity_support_preview(entity):
         """
@@ -42,6 +66,7 @@ class ThumbnailGenerator(object):
         asset_info,
         dependencies,
         favor_preview=True,
+        preview_tier=None,
     ):
         """
         Generate a thumbnail or a preview for a given media asset and link
@@ -62,6 +87,8 @@ class ThumbnailGenerator(object):
             the media is created in foreground.
         :param favor_preview: Movie previews will be favored over static
             thumbnails if the entity supports it.
+        :param preview_tier: Speed tier of the preview, "draft", "review" or
+            "final". Use the preview_tier setting if None.
         """
 
         # Split target entities in two groups, the ones that support movies
@@ -96,26 +123,206 @@ class ThumbnailGenerator(object):
             elif generate_thumbnails:
                 thumbnail_entities.append(target_entity)
 
+        if preview_tier is None:
+            preview_tier = self.engine.get_setting("preview_tier")
+
+        preview_cache_key = None
+        preview_needed = False
         if len(preview_entities) > 0:
+            preview_cache_key = self._get_cache_key(
+                path, asset_info, dependencies, "preview", preview_tier
+            )
+            preview_needed = not self._reuse_uploaded_media(
+                preview_cache_key, preview_entities
+            )
+
+        thumbnail_cache_key = None
+        thumbnail_needed = False
+        if len(thumbnail_entities) > 0:
+            thumbnail_cache_key = self._get_cache_key(
+                path, asset_info, dependencies, "thumbnail"
+            )
+            thumbnail_needed = not self._reuse_uploaded_media(
+                thumbnail_cache_key, thumbnail_entities
+            )
+
+        if preview_needed and thumbnail_needed:
+            self._generate_preview_and_thumbnail(
+                path=path,
+                display_name=display_name,
+                preview_entities=preview_entities,
+                thumbnail_entities=thumbnail_entities,
+                asset_info=asset_info,
+                dependencies=dependencies,
+                preview_cache_key=preview_cache_key,
+                thumbnail_cache_key=thumbnail_cache_key,
+                preview_tier=preview_tier,
+            )
+        elif preview_needed:
             self._generate_preview(
                 path=path,
                 display_name=display_name,
                 target_entities=preview_entities,
                 asset_info=asset_info,
                 dependencies=dependencies,
+                cache_key=preview_cache_key,
+                tier=preview_tier,
             )
-
-        if len(thumbnail_entities) > 0:
+        elif thumbnail_needed:
             self._generate_thumbnail(
                 path=path,
                 display_name=display_name,
                 target_entities=thumbnail_entities,
                 asset_info=asset_info,
                 dependencies=dependencies,
+                cache_key=thumbnail_cache_key,
             )
 
+        # The draft preview is uploaded first, then replaced by the final one.
+        if (
+            preview_needed
+            and preview_tier == "draft"
+            and self.engine.get_setting("upgrade_draft_previews")
+        ):
+            self._upgrade_preview(
+                path=path,
+                display_name=display_name,
+                target_entities=preview_entities,
+                asset_info=asset_info,
+                dependencies=dependencies,
+                cache_key=self._get_cache_key(
+                    path, asset_info, dependencies, "preview", "final"
+                ),
+            )
+
+    def _get_generation_settings(self, media_type, tier=None):
+        """
+        Return what identifies how a given type of media is generated, so
+        that a change invalidates the media uploaded before.
+
+        :param media_type: "preview" or "thumbnail".
+        :param tier: Speed tier of the previews.
+        :returns: JSON serializable value.
+        """
+        return [type(self).__name__, media_type, tier]
+
+    def _get_cache_key(self, path, asset_info, dependencies, media_type, tier=None):
+        """
+        Return the key of a media in the engine media cache.
+
+        Media created in background are never looked up since their content
+        is not known before the backburner jobs creating them complete.
+        Previews are never cached either: a movie linked to an existing
+        attachment is not transcoded by the server and cannot be played.
+
+        :param path: Path to the media for which thumbnail or preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks collected either thru an export (sg_export_hooks.py) or a
+            batch render (sg_batch_hooks.py).
+        :param dependencies: List of backburner job IDs the generation job
+            needs to wait for.
+        :param media_type: "preview" or "thumbnail".
+        :param tier: Speed tier of the previews.
+        :returns: The key or None if the media cannot be cached.
+        """
+        if (
+            not self.engine.get_setting("cache_uploaded_media")
+            or dependencies
+            or media_type == "preview"
+        ):
+            return None
+
+        return self.engine.media_cache.get_key(
+            path,
+            asset_info,
+            [
+                self._get_generation_settings(media_type, tier),
+                self.engine.get_setting("bypass_server_transcoding"),
+            ],
+        )
+
+    def _reuse_uploaded_media(self, cache_key, target_entities):
+        """
+        Link the entities to a media uploaded before if it is still on the
+        server.
+
+        :param cache_key: Key of the media in the engine media cache.
+        :param target_entities: Target entities to which the thumbnails need to
+            be linked to.
+        :returns: True if the media was reused, False if it must be generated.
+        """
+        if cache_key is None:
+            return False
+
+        media_cache = self.engine.media_cache
+        entry = media_cache.get(cache_key)
+
+        reused = False
+        if entry is not None:
+            try:
+                reused = self._link_uploaded_media(entry, target_entities)
+            except Exception as e:
+                self.engine.log_debug("Cannot reuse uploaded media %s: %s" % (entry, e))
+            if not reused:
+                media_cache.remove(cache_key)
+
+        if reused:
+            media_cache.hits += 1
+        else:
+            media_cache.misses += 1
+        self.engine.log_debug(
+            "Media cache %s for %s (%d hits, %d misses)"
+            % (
+                "hit" if reused else "miss",
+                cache_key,
+                media_cache.hits,
+                media_cache.misses,
+            )
+        )
+        return reused
+
+    def _link_uploaded_media(self, entry, target_entities):
+        """
+        Link the entities to a thumbnail uploaded before.
+
+        :param entry: Media cache entry recorded by the backburner hooks.
+        :param target_entities: Target entities to which the thumbnails need to
+            be linked to.
+        :returns: True if the media was linked, False if it does not exist on
+            the server anymore.
+        """
+        # Only thumbnails can be shared, see _get_cache_key().
+        if entry["field_name"] != "thumb_image":
+            return False
+
+        sg = self.engine.shotgun
+        source_entity = sg.find_one(
+            entry["entity"]["type"],
+            [["id", "is", entry["entity"]["id"]]],
+            ["image"],
+        )
+        if source_entity is None or not source_entity.get("image"):
+            return False
+
+        sg.share_thumbnail(
+            entities=[
+                {"type": target["type"], "id": target["id"]}
+                for target in target_entities
+            ],
+            source_entity={"type": source_entity["type"], "id": source_entity["id"]},
+        )
+        return True
+
     def _generate_preview(
-        self, path, display_name, target_entities, asset_info, dependencies
+        self,
+        path,
+        display_name,
+        target_entities,
+        asset_info,
+        dependencies,
+        cache_key,
+        tier,
     ):
         """
         Generate a preview for a given media asset and link
@@ -134,11 +341,38 @@ class ThumbnailGenerator(object):
         :param dependencies: List of backburner job IDs this thumbnail
             generation job need to wait in order to be started. Can be None if
             the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        :param tier: Speed tier of the preview, "draft", "review" or "final".
+        """
+        raise NotImplementedError
+
+    def _upgrade_preview(
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
+    ):
+        """
+        Generate a final preview replacing the draft preview generated for a
+        given media asset once it is uploaded.
+
+        :param path: Path to the media for which thumbnail or preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param display_name: The display name of the item we are generating the
+            thumbnail for. This will usually be the based name of the path.
+        :param target_entities: Target entities to which the preview need to
+            be linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks collected either thru an export (sg_export_hooks.py) or a
+            batch render (sg_batch_hooks.py).
+        :param dependencies: List of backburner job IDs this thumbnail
+            generation job need to wait in order to be started. Can be None if
+            the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
         """
         raise NotImplementedError
 
     def _generate_thumbnail(
-        self, path, display_name, target_entities, asset_info, dependencies
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
     ):
         """
         Generate a thumbnail for a given media asset and link
@@ -157,6 +391,72 @@ class ThumbnailGenerator(object):
         :param dependencies: List of backburner job IDs this thumbnail
             generation job need to wait in order to be started. Can be None if
             the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        """
+        raise NotImplementedError
+
+    def _generate_preview_and_thumbnail(
+        self,
+        path,
+        display_name,
+        preview_entities,
+        thumbnail_entities,
+        asset_info,
+        dependencies,
+        preview_cache_key,
+        thumbnail_cache_key,
+        preview_tier,
+    ):
+        """
+        Generate both a preview and a thumbnail for a given media asset.
+        Generators able to produce both from a single decode of the media
+        should override this method.
+
+        :param path: Path to the media for which thumbnail or preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param display_name: The display name of the item we are generating the
+            thumbnail for. This will usually be the based name of the path.
+        :param preview_entities: Target entities to which the preview need to
+            be linked to.
+        :param thumbnail_entities: Target entities to which the thumbnail need
+            to be linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks collected either thru an export (sg_export_hooks.py) or a
+            batch render (sg_batch_hooks.py).
+        :param dependencies: List of backburner job IDs this thumbnail
+            generation job need to wait in order to be started. Can be None if
+            the media is created in foreground.
+        :param preview_cache_key: Key to record the uploaded preview with in
+            the engine media cache, None if it must not be cached.
+        :param thumbnail_cache_key: Key to record the uploaded thumbnail with
+            in the engine media cache, None if it must not be cached.
+        :param preview_tier: Speed tier of the preview, "draft", "review" or
+            "final".
+        """
+        self._generate_preview(
+            path=path,
+            display_name=display_name,
+            target_entities=preview_entities,
+            asset_info=asset_info,
+            dependencies=dependencies,
+            cache_key=preview_cache_key,
+            tier=preview_tier,
+        )
+        self._generate_thumbnail(
+            path=path,
+            display_name=display_name,
+            target_entities=thumbnail_entities,
+            asset_info=asset_info,
+            dependencies=dependencies,
+            cache_key=thumbnail_cache_key,
+        )
+
+    def reset(self):
+        """
+        Forget the thumbnails and previews generated but not finalized yet,
+        usually left by a publish that was aborted. Called at the start of
+        each publish.
         """
         raise NotImplementedError
 
@@ -14,6 +14,9 @@ Thumbnail generator based on FFmpeg and read_frame.
 
 __all__ = ["ThumbnailGeneratorFFmpeg"]
 
+import collections
+import concurrent.futures
+
 from .thumbnail_generator import ThumbnailGenerator
 
 
@@ -24,10 +27,91 @@ class ThumbnailGeneratorFFmpeg(ThumbnailGenerator):
 
     def __init__(self, engine):
         super().__init__(engine)
-        self._job_ids = []
+        # Media to generate by path, submitted by finalize() so that the
+        # targets of all the calls for the same path share the same jobs.
+        self._pending_media = collections.OrderedDict()
+        # Jobs generating draft previews by path, for the upgrade jobs to
+        # depend on.
+        self._draft_preview_jobs = {}
+
+    @staticmethod
+    def _merge_dependencies(dependencies, other_dependencies):
+        """
+        :returns: The union of two lists of dependencies, None if both are
+            None.
+        """
+        if dependencies is None and other_dependencies is None:
+            return None
+
+        merged_dependencies = []
+        for deps in (dependencies, other_dependencies):
+            if not isinstance(deps, list):
+                deps = [] if deps is None else [deps]
+            for dependency in deps:
+                if dependency not in merged_dependencies:
+                    merged_dependencies.append(dependency)
+        return merged_dependencies
+
+    def _add_pending_media(
+        self,
+        media_type,
+        path,
+        display_name,
+        target_entities,
+        asset_info,
+        dependencies,
+        cache_key,
+        tier=None,
+    ):
+        """
+        Keep track of a media to generate until finalize(), or add targets to
+        the same media of the same path.
+
+        :param media_type: "preview", "thumbnail" or "upgrade".
+        :param path: Path to the media for which the media need to be
+            generated.
+        :param display_name: The display name of the item we are generating the
+            media for.
+        :param target_entities: Target entities to which the media need to be
+            linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :param dependencies: List of backburner job IDs the generation needs
+            to wait for.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        :param tier: Speed tier of the preview, "draft", "review" or "final".
+        """
+        pending_media = self._pending_media.setdefault(path, {})
+        media = pending_media.get(media_type)
+        if media is None:
+            pending_media[media_type] = {
+                "display_name": display_name,
+                "target_entities": list(target_entities),
+                "asset_info": asset_info,
+                "dependencies": dependencies,
+                "cache_key": cache_key,
+                "tier": tier,
+            }
+        else:
+            media["target_entities"] += [
+                target_entity
+                for target_entity in target_entities
+                if target_entity not in media["target_entities"]
+            ]
+            media["dependencies"] = self._merge_dependencies(
+                media["dependencies"], dependencies
+            )
 
     def _generate_preview(
-        self, path, display_name, target_entities, asset_info, dependencies
+        self,
+        path,
+        display_name,
+        target_entities,
+        asset_info,
+        dependencies,
+        cache_key,
+        tier,
     ):
         """
         Generate a preview for a given media asset and link
@@ -46,32 +130,276 @@ class ThumbnailGeneratorFFmpeg(ThumbnailGenerator):
         :param dependencies: List of backburner job IDs this thumbnail
             generation job need to wait in order to be started. Can be None if
             the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        :param tier: Speed tier of the preview, "draft", "review" or "final".
         """
+        self._add_pending_media(
+            "preview",
+            path,
+            display_name,
+            target_entities,
+            asset_info,
+            dependencies,
+            cache_key,
+            tier,
+        )
+
+    def _submit_preview(
+        self,
+        path,
+        display_name,
+        target_entities,
+        asset_info,
+        dependencies,
+        cache_key,
+        tier,
+    ):
+        """
+        Submit the job generating a preview and linking it to entities.
+
+        See _generate_preview() for the parameters.
+        """
+        segments = self._get_preview_segments(asset_info)
+        if segments:
+            job = self._generate_segmented_preview(
+                path,
+                display_name,
+                target_entities,
+                asset_info,
+                dependencies,
+                cache_key,
+                tier,
+                segments,
+            )
+            if tier == "draft":
+                self._draft_preview_jobs[path] = job
+            return
+
         self.engine.log_debug("Create and Upload Preview using ffmpeg")
         job_context = "Create and Upload Flow Production Tracking Preview"
         job_name = self.engine.sanitize_backburner_job_name(
             job_name=display_name, job_suffix=" - %s" % job_context
         )
         job_description = "%s for %s" % (job_context, path)
-        job_id = self.engine.create_local_backburner_job(
-            job_name,
-            job_description,
-            dependencies,
-            "backburner_hooks",
-            "attach_mov_preview",
-            {
+        job = self._submit_job(
+            job_name=job_name,
+            description=job_description,
+            dependencies=dependencies,
+            instance="backburner_hooks",
+            method_name="attach_mov_preview",
+            args={
                 "targets": target_entities,
                 "width": asset_info["width"],
                 "height": asset_info["height"],
                 "path": path,
                 "display_name": display_name,
                 "fps": asset_info["fps"],
+                "cache_key": cache_key,
+                "tier": tier,
+            },
+        )
+        if tier == "draft":
+            self._draft_preview_jobs[path] = job
+
+    def _get_preview_segments(self, asset_info):
+        """
+        Split the frames of a media in segments to be encoded in parallel.
+
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :returns: List of (first frame, number of frames) tuples, None if the
+            preview must be encoded in a single task.
+        """
+        min_frames = self.engine.get_setting("preview_segment_min_frames")
+        if not min_frames:
+            return None
+
+        try:
+            nb_frames = int(asset_info["sourceOut"]) - int(asset_info["sourceIn"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        nb_segments = min(
+            self.engine.get_backburner_server_count(), nb_frames // min_frames
+        )
+        if nb_segments < 2:
+            return None
+
+        segments = []
+        first_frame = 0
+        for index in range(nb_segments):
+            # Spread the remaining frames on the first segments
+            segment_frames = nb_frames // nb_segments + (
+                1 if index < nb_frames % nb_segments else 0
+            )
+            segments.append((first_frame, segment_frames))
+            first_frame += segment_frames
+        return segments
+
+    def _generate_segmented_preview(
+        self,
+        path,
+        display_name,
+        target_entities,
+        asset_info,
+        dependencies,
+        cache_key,
+        tier,
+        segments,
+    ):
+        """
+        Generate a preview by encoding segments of the media in parallel and
+        concatenating them.
+
+        The segments are the tasks of a single backburner job so they are
+        dispatched to all the servers, the concatenation and upload job
+        depends on it.
+
+        :param path: Path to the media for which the preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param display_name: The display name of the item we are generating the
+            preview for.
+        :param target_entities: Target entities to which the preview need to
+            be linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :param dependencies: List of backburner job IDs the encoding need to
+            wait for.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        :param tier: Speed tier of the preview, "draft", "review" or "final".
+        :param segments: List of (first frame, number of frames) tuples.
+        :returns: A future whose result is the id of the concatenation job.
+        """
+        self.engine.log_debug(
+            "Create and Upload Preview using ffmpeg in %d segments" % len(segments)
+        )
+
+        segment_paths = []
+        with self.engine.backburner_job_batch() as segment_job_ids:
+            for index, (first_frame, nb_frames) in enumerate(segments):
+                segment_path = self.engine.temp_artifacts.create_file(
+                    suffix=".mov", label="%s.%d" % (display_name, index)
+                )
+                segment_paths.append(segment_path)
+
+                job_context = "Encode Flow Production Tracking Preview Segment"
+                self.engine.submit_local_backburner_job(
+                    job_name=self.engine.sanitize_backburner_job_name(
+                        job_name=display_name,
+                        job_suffix=" - %s %d" % (job_context, index + 1),
+                    ),
+                    description="%s %d/%d for %s"
+                    % (job_context, index + 1, len(segments), path),
+                    dependencies=dependencies,
+                    instance="backburner_hooks",
+                    method_name="encode_preview_segment",
+                    args={
+                        "path": path,
+                        "width": asset_info["width"],
+                        "height": asset_info["height"],
+                        "display_name": display_name,
+                        "fps": asset_info["fps"],
+                        "first_frame": first_frame,
+                        "nb_frames": nb_frames,
+                        "segment_path": segment_path,
+                        "tier": tier,
+                    },
+                ).result()
+
+        # Report the segments job along with the others
+        for segment_job_id in segment_job_ids:
+            segment_job = concurrent.futures.Future()
+            segment_job.set_result(segment_job_id)
+            self._submitted_jobs.append(segment_job)
+
+        job_context = "Concatenate and Upload Flow Production Tracking Preview"
+        concat_job = self._submit_job(
+            job_name=self.engine.sanitize_backburner_job_name(
+                job_name=display_name, job_suffix=" - %s" % job_context
+            ),
+            description="%s for %s" % (job_context, path),
+            dependencies=segment_job_ids,
+            instance="backburner_hooks",
+            method_name="concat_preview_segments",
+            args={
+                "segment_paths": segment_paths,
+                "targets": target_entities,
+                "display_name": display_name,
+                "cache_key": cache_key,
             },
         )
-        self._job_ids.append(job_id)
+
+        # The concatenation job removes the segments once done.
+        for segment_path in segment_paths:
+            self.engine.temp_artifacts.release(segment_path)
+        return concat_job
+
+    def _upgrade_preview(
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
+    ):
+        """
+        Generate a final preview replacing the draft preview generated for a
+        given media asset once it is uploaded.
+
+        :param path: Path to the media for which thumbnail or preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param display_name: The display name of the item we are generating the
+            thumbnail for. This will usually be the based name of the path.
+        :param target_entities: Target entities to which the preview need to
+            be linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks collected either thru an export (sg_export_hooks.py) or a
+            batch render (sg_batch_hooks.py).
+        :param dependencies: List of backburner job IDs this thumbnail
+            generation job need to wait in order to be started. Can be None if
+            the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        """
+        self._add_pending_media(
+            "upgrade",
+            path,
+            display_name,
+            target_entities,
+            asset_info,
+            dependencies,
+            cache_key,
+            "final",
+        )
+
+    def _submit_upgrade(
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
+    ):
+        """
+        Submit the job generating a final preview replacing a draft preview.
+
+        See _upgrade_preview() for the parameters.
+        """
+        # Wait for the draft to be uploaded so it never replaces the final
+        # preview.
+        upgrade_dependencies = []
+        if isinstance(dependencies, list):
+            upgrade_dependencies.extend(dependencies)
+        elif dependencies is not None:
+            upgrade_dependencies.append(dependencies)
+        draft_job = self._draft_preview_jobs.pop(path, None)
+        if draft_job is not None:
+            upgrade_dependencies.append(draft_job)
+
+        self._submit_preview(
+            path=path,
+            display_name=display_name,
+            target_entities=target_entities,
+            asset_info=asset_info,
+            dependencies=upgrade_dependencies,
+            cache_key=cache_key,
+            tier="final",
+        )
 
     def _generate_thumbnail(
-        self, path, display_name, target_entities, asset_info, dependencies
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
     ):
         """
         Generate a thumbnail for a given media asset and link
@@ -90,6 +418,26 @@ class ThumbnailGeneratorFFmpeg(ThumbnailGenerator):
         :param dependencies: List of backburner job IDs this thumbnail
             generation job need to wait in order to be started. Can be None if
             the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        """
+        self._add_pending_media(
+            "thumbnail",
+            path,
+            display_name,
+            target_entities,
+            asset_info,
+            dependencies,
+            cache_key,
+        )
+
+    def _submit_thumbnail(
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
+    ):
+        """
+        Submit the job generating a thumbnail and linking it to entities.
+
+        See _generate_thumbnail() for the parameters.
         """
         self.engine.log_debug("Create and Upload Thumbnail using ffmpeg")
         job_context = "Create and Upload Flow Production Tracking Thumbnail"
@@ -97,21 +445,127 @@ class ThumbnailGeneratorFFmpeg(ThumbnailGenerator):
             job_name=display_name, job_suffix=" - %s" % job_context
         )
         job_description = "%s for %s" % (job_context, path)
-        job_id = self.engine.create_local_backburner_job(
-            job_name,
-            job_description,
-            dependencies,
-            "backburner_hooks",
-            "attach_jpg_preview",
-            {
+        # The poster frame is selected by the job if Flame did not supply it.
+        poster_frame_selector = self.engine.poster_frame_selector
+        self._submit_job(
+            job_name=job_name,
+            description=job_description,
+            dependencies=dependencies,
+            instance="backburner_hooks",
+            method_name="attach_jpg_preview",
+            args={
                 "targets": target_entities,
                 "width": asset_info["width"],
                 "height": asset_info["height"],
                 "path": path,
                 "display_name": display_name,
+                "cache_key": cache_key,
+                "poster_frame": poster_frame_selector.get_flame_poster_frame(
+                    asset_info
+                ),
+                "nb_frames": poster_frame_selector.get_nb_frames(asset_info),
             },
         )
-        self._job_ids.append(job_id)
+
+    def _submit_preview_and_thumbnail(
+        self,
+        path,
+        display_name,
+        preview_entities,
+        thumbnail_entities,
+        asset_info,
+        dependencies,
+        preview_cache_key,
+        thumbnail_cache_key,
+        preview_tier,
+    ):
+        """
+        Submit a single job generating both a preview and a thumbnail for a
+        given media asset, decoding the media only once.
+
+        :param path: Path to the media for which thumbnail or preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param display_name: The display name of the item we are generating the
+            thumbnail for. This will usually be the based name of the path.
+        :param preview_entities: Target entities to which the preview need to
+            be linked to.
+        :param thumbnail_entities: Target entities to which the thumbnail need
+            to be linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks collected either thru an export (sg_export_hooks.py) or a
+            batch render (sg_batch_hooks.py).
+        :param dependencies: List of backburner job IDs this thumbnail
+            generation job need to wait in order to be started. Can be None if
+            the media is created in foreground.
+        :param preview_cache_key: Key to record the uploaded preview with in
+            the engine media cache, None if it must not be cached.
+        :param thumbnail_cache_key: Key to record the uploaded thumbnail with
+            in the engine media cache, None if it must not be cached.
+        :param preview_tier: Speed tier of the preview, "draft", "review" or
+            "final".
+        """
+        if self._get_preview_segments(asset_info):
+            # Segmented previews cannot produce the thumbnail at the same time
+            self._submit_preview(
+                path=path,
+                display_name=display_name,
+                target_entities=preview_entities,
+                asset_info=asset_info,
+                dependencies=dependencies,
+                cache_key=preview_cache_key,
+                tier=preview_tier,
+            )
+            self._submit_thumbnail(
+                path=path,
+                display_name=display_name,
+                target_entities=thumbnail_entities,
+                asset_info=asset_info,
+                dependencies=dependencies,
+                cache_key=thumbnail_cache_key,
+            )
+            return
+
+        self.engine.log_debug("Create and Upload Preview and Thumbnail using ffmpeg")
+        job_context = "Create and Upload Flow Production Tracking Preview and Thumbnail"
+        job_name = self.engine.sanitize_backburner_job_name(
+            job_name=display_name, job_suffix=" - %s" % job_context
+        )
+        job_description = "%s for %s" % (job_context, path)
+        # The poster frame is selected by the job if Flame did not supply it.
+        poster_frame_selector = self.engine.poster_frame_selector
+        job = self._submit_job(
+            job_name=job_name,
+            description=job_description,
+            dependencies=dependencies,
+            instance="backburner_hooks",
+            method_name="attach_mov_and_jpg_preview",
+            args={
+                "mov_targets": preview_entities,
+                "jpg_targets": thumbnail_entities,
+                "width": asset_info["width"],
+                "height": asset_info["height"],
+                "path": path,
+                "display_name": display_name,
+                "fps": asset_info["fps"],
+                "mov_cache_key": preview_cache_key,
+                "jpg_cache_key": thumbnail_cache_key,
+                "poster_frame": poster_frame_selector.get_flame_poster_frame(
+                    asset_info
+                ),
+                "nb_frames": poster_frame_selector.get_nb_frames(asset_info),
+                "tier": preview_tier,
+            },
+        )
+        if preview_tier == "draft":
+            self._draft_preview_jobs[path] = job
+
+    def reset(self):
+        """
+        Forget the thumbnails and previews generated but not finalized yet,
+        and the draft previews of the previous publish.
+        """
+        self._pending_media = collections.OrderedDict()
+        self._draft_preview_jobs = {}
 
     def finalize(self, path=None):
         """
@@ -123,6 +577,69 @@ class ThumbnailGeneratorFFmpeg(ThumbnailGenerator):
             finalized.
         :return: Backburner job IDs created.
         """
-        job_ids = self._job_ids
-        self._job_ids = []
-        return job_ids
+        if path is not None:
+            pending_media = self._pending_media.pop(path, None)
+            if pending_media is not None:
+                self._submit_pending_media(path, pending_media)
+        else:
+            for pending_path, pending_media in self._pending_media.items():
+                self._submit_pending_media(pending_path, pending_media)
+            self._pending_media = collections.OrderedDict()
+
+        return self._flush_submitted_jobs()
+
+    def _submit_pending_media(self, path, pending_media):
+        """
+        Submit the jobs generating the media of a path, a single job per
+        media for all the targets.
+
+        :param path: Path to the media for which thumbnail or preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param pending_media: Dictionary of the media to generate by type.
+        """
+        preview = pending_media.get("preview")
+        thumbnail = pending_media.get("thumbnail")
+        if preview is not None and thumbnail is not None:
+            self._submit_preview_and_thumbnail(
+                path=path,
+                display_name=preview["display_name"],
+                preview_entities=preview["target_entities"],
+                thumbnail_entities=thumbnail["target_entities"],
+                asset_info=preview["asset_info"],
+                dependencies=self._merge_dependencies(
+                    preview["dependencies"], thumbnail["dependencies"]
+                ),
+                preview_cache_key=preview["cache_key"],
+                thumbnail_cache_key=thumbnail["cache_key"],
+                preview_tier=preview["tier"],
+            )
+        elif preview is not None:
+            self._submit_preview(
+                path=path,
+                display_name=preview["display_name"],
+                target_entities=preview["target_entities"],
+                asset_info=preview["asset_info"],
+                dependencies=preview["dependencies"],
+                cache_key=preview["cache_key"],
+                tier=preview["tier"],
+            )
+        elif thumbnail is not None:
+            self._submit_thumbnail(
+                path=path,
+                display_name=thumbnail["display_name"],
+                target_entities=thumbnail["target_entities"],
+                asset_info=thumbnail["asset_info"],
+                dependencies=thumbnail["dependencies"],
+                cache_key=thumbnail["cache_key"],
+            )
+
+        upgrade = pending_media.get("upgrade")
+        if upgrade is not None:
+            self._submit_upgrade(
+                path=path,
+                display_name=upgrade["display_name"],
+                target_entities=upgrade["target_entities"],
+                asset_info=upgrade["asset_info"],
+                dependencies=upgrade["dependencies"],
+                cache_key=upgrade["cache_key"],
+            )
@@ -14,6 +14,8 @@ Thumbnail generator based on Flame export API.
 
 __all__ = ["ThumbnailGeneratorFlame"]
 
+import collections
+
 from .thumbnail_generator import ThumbnailGenerator
 
 
@@ -25,10 +27,56 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
     def __init__(self, engine):
         super().__init__(engine)
         self._preview_jobs = {}
+        self._preview_upgrade_jobs = {}
+        self._thumbnail_jobs = {}
+        # Number of finalize() calls still expected by path, when uploading
+        # per session
+        self._pending_finalizes = collections.Counter()
+
+    def generate(self, path, *args, **kwargs):
+        """
+        Generate a thumbnail or a preview for a given media asset. See
+        ThumbnailGenerator.generate for the parameters.
+
+        Every publish plugin generating a media finalizes it, so the calls are
+        counted to know when the last plugin has finalized its media.
+        """
+        self._pending_finalizes[path] += 1
+        super().generate(path, *args, **kwargs)
+
+    def reset(self):
+        """
+        Forget the thumbnails and previews generated but not finalized yet.
+        """
+        self._preview_jobs = {}
+        self._preview_upgrade_jobs = {}
         self._thumbnail_jobs = {}
+        self._pending_finalizes = collections.Counter()
+
+    def _get_generation_settings(self, media_type, tier=None):
+        """
+        Return what identifies how a given type of media is generated, so
+        that a change invalidates the media uploaded before.
+
+        :param media_type: "preview" or "thumbnail".
+        :param tier: Speed tier of the previews.
+        :returns: JSON serializable value.
+        """
+        if media_type == "preview":
+            preset_path = self.engine.get_previews_preset_path(tier)
+        else:
+            preset_path = self.engine.thumbnails_preset_path
+        return [type(self).__name__, media_type, preset_path]
 
     def _generate_preview(
-        self, path, display_name, target_entities, asset_info, dependencies
+        self,
+        path,
+        display_name,
+        target_entities,
+        asset_info,
+        dependencies,
+        cache_key,
+        tier,
     ):
         """
         Generate a preview for a given media asset and link
@@ -47,30 +95,107 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
         :param dependencies: List of backburner job IDs this thumbnail
             generation job need to wait in order to be started. Can be None if
             the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        :param tier: Speed tier of the preview, "draft", "review" or "final".
+        """
+        self._add_preview_job(
+            self._preview_jobs,
+            path,
+            display_name,
+            target_entities,
+            asset_info,
+            dependencies,
+            cache_key,
+            tier,
+        )
+
+    def _upgrade_preview(
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
+    ):
+        """
+        Generate a final preview replacing the draft preview generated for a
+        given media asset once it is uploaded.
+
+        :param path: Path to the media for which thumbnail or preview need to be
+            generated and uploaded to Flow Production Tracking.
+        :param display_name: The display name of the item we are generating the
+            thumbnail for. This will usually be the based name of the path.
+        :param target_entities: Target entities to which the preview need to
+            be linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks collected either thru an export (sg_export_hooks.py) or a
+            batch render (sg_batch_hooks.py).
+        :param dependencies: List of backburner job IDs this thumbnail
+            generation job need to wait in order to be started. Can be None if
+            the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
         """
+        self._add_preview_job(
+            self._preview_upgrade_jobs,
+            path,
+            display_name,
+            target_entities,
+            asset_info,
+            dependencies,
+            cache_key,
+            "final",
+        )
 
-        preview_job = self._preview_jobs.get(path, None)
+    def _add_preview_job(
+        self,
+        preview_jobs,
+        path,
+        display_name,
+        target_entities,
+        asset_info,
+        dependencies,
+        cache_key,
+        tier,
+    ):
+        """
+        Keep track of a preview to transcode and upload, or add targets to the
+        preview of the same media. The transcodes are deferred to finalize()
+        so that they can be exported together.
+
+        :param preview_jobs: Dictionary of the preview jobs by path to add the
+            job to.
+        :param path: Path to the media for which the preview need to be
+            generated.
+        :param display_name: The display name of the item we are generating the
+            thumbnail for.
+        :param target_entities: Target entities to which the preview need to
+            be linked to.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :param dependencies: List of backburner job IDs the transcode need to
+            wait for.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
+        :param tier: Speed tier of the preview, "draft", "review" or "final".
+        """
+        preview_job = preview_jobs.get(path, None)
         if preview_job is None:
-            self.engine.log_debug("Create and Upload Preview using Flame exporter")
-
-            dst_path, job_id, files_to_delete = self.engine.transcoder.transcode(
-                src_path=path,
-                dst_path=None,
-                extension=".mov",
-                display_name=display_name,
-                job_context="Create Flow Production Tracking Preview",
-                preset_path=self.engine.previews_preset_path,
-                asset_info=asset_info,
-                dependencies=dependencies,
-                poster_frame=None,
+            self.engine.log_debug(
+                "Create and Upload %s Preview using Flame exporter" % tier
             )
 
-            self._preview_jobs[path] = {
+            preview_jobs[path] = {
                 "display_name": display_name,
-                "dependencies": job_id,
                 "target_entities": target_entities,
-                "path": dst_path,
-                "files_to_delete": files_to_delete,
+                "cache_key": cache_key,
+                "transcode": {
+                    "src_path": path,
+                    "dst_path": None,
+                    "extension": ".mov",
+                    "display_name": display_name,
+                    "job_context": "Create Flow Production Tracking Preview",
+                    "preset_path": self.engine.get_previews_preset_path(tier),
+                    "asset_info": asset_info,
+                    "dependencies": dependencies,
+                    "poster_frame": None,
+                },
             }
         else:
             preview_job["target_entities"] = (
@@ -78,7 +203,7 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
             )
 
     def _generate_thumbnail(
-        self, path, display_name, target_entities, asset_info, dependencies
+        self, path, display_name, target_entities, asset_info, dependencies, cache_key
     ):
         """
         Generate a thumbnail for a given media asset and link
@@ -97,44 +222,138 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
         :param dependencies: List of backburner job IDs this thumbnail
             generation job need to wait in order to be started. Can be None if
             the media is created in foreground.
+        :param cache_key: Key to record the uploaded media with in the engine
+            media cache, None if it must not be cached.
         """
         thumbnail_job = self._thumbnail_jobs.get(path, None)
         if thumbnail_job is None:
             self.engine.log_debug("Create and Upload Thumbnail using Flame exporter")
 
-            # FIXME we should use the poster frame index supplied by Flame.
-            poster_frame = 1
-
-            dst_path, job_id, files_to_delete = self.engine.transcoder.transcode(
-                src_path=path,
-                dst_path=None,
-                extension=".jpg",
-                display_name=display_name,
-                job_context="Create Flow Production Tracking Thumbnail",
-                preset_path=self.engine.thumbnails_preset_path,
-                asset_info=asset_info,
-                dependencies=dependencies,
-                poster_frame=poster_frame,
+            # Use the poster frame supplied by Flame or selected by a previous
+            # job. Frames cannot be sampled here without blocking Flame, fall
+            # back on the middle frame, which is rarely a slate or a fade.
+            poster_frame = self.engine.poster_frame_selector.get_poster_frame(
+                path, asset_info
             )
+            if poster_frame is None:
+                nb_frames = self.engine.poster_frame_selector.get_nb_frames(asset_info)
+                poster_frame = nb_frames // 2 if nb_frames else 0
+
+            # Flame marks start at 1
+            poster_frame += 1
 
             self._thumbnail_jobs[path] = {
                 "display_name": display_name,
-                "dependencies": job_id,
                 "target_entities": target_entities,
-                "path": dst_path,
-                "files_to_delete": files_to_delete,
+                "cache_key": cache_key,
+                "transcode": {
+                    "src_path": path,
+                    "dst_path": None,
+                    "extension": ".jpg",
+                    "display_name": display_name,
+                    "job_context": "Create Flow Production Tracking Thumbnail",
+                    "preset_path": self.engine.thumbnails_preset_path,
+                    "asset_info": asset_info,
+                    "dependencies": dependencies,
+                    "poster_frame": poster_frame,
+                },
             }
         else:
             thumbnail_job["target_entities"] = (
                 thumbnail_job["target_entities"] + target_entities
             )
 
+    def _transcode_jobs(self, jobs):
+        """
+        Transcode the media of preview and thumbnail jobs not transcoded yet,
+        exporting the ones sharing the same preset and dependencies together.
+
+        :param jobs: List of preview or thumbnail job information, None
+            entries are ignored.
+        """
+        jobs = [job for job in jobs if job is not None and "transcode" in job]
+
+        # Use the local movies already generated for the previews when they
+        # are equivalent instead of encoding the same frames again.
+        transcoder = self.engine.transcoder
+        for job in list(jobs):
+            transcode = job["transcode"]
+            if transcode["extension"] != ".mov" or not (
+                self.engine.local_movies_match_previews(transcode["preset_path"])
+            ):
+                continue
+
+            local_movie = transcoder.get_transcode_result(
+                transcode["src_path"],
+                self.engine.local_movies_preset_path,
+                transcode["asset_info"],
+            )
+            if local_movie is None:
+                continue
+
+            self.engine.log_debug("Using local movie %s as preview" % local_movie[0])
+            del job["transcode"]
+            job["path"], job["dependencies"] = local_movie
+            # The local movie is not a temporary file
+            job["files_to_delete"] = []
+            jobs.remove(job)
+
+        if not jobs:
+            return
+
+        results = self.engine.transcoder.transcode_batch(
+            [job.pop("transcode") for job in jobs]
+        )
+        for job, (dst_path, job_id, files_to_delete) in zip(jobs, results):
+            job["path"] = dst_path
+            job["dependencies"] = job_id
+            job["files_to_delete"] = files_to_delete
+
+    @staticmethod
+    def _get_thumbnail_upload_args(thumbnail_job):
+        """
+        :param thumbnail_job: Thumbnail generation job information.
+        :return: Arguments of BackburnerHooks.upload_to_shotgun to upload a
+            thumbnail.
+        """
+        return {
+            "targets": thumbnail_job.get("target_entities"),
+            "path": thumbnail_job.get("path"),
+            "field_name": "thumb_image",
+            "display_name": thumbnail_job.get("display_name"),
+            "files_to_delete": thumbnail_job.get("files_to_delete"),
+            "cache_key": thumbnail_job.get("cache_key"),
+        }
+
+    def _get_preview_upload_args(self, preview_job):
+        """
+        :param preview_job: Preview generation job information.
+        :return: Arguments of BackburnerHooks.upload_to_shotgun to upload a
+            preview.
+        """
+        if self.engine.get_setting("bypass_server_transcoding"):
+            self.engine.log_debug(
+                "Bypass Flow Production Tracking transcoding setting ENABLED."
+            )
+            field_name = "sg_uploaded_movie_mp4"
+        else:
+            field_name = "sg_uploaded_movie"
+
+        return {
+            "targets": preview_job.get("target_entities"),
+            "path": preview_job.get("path"),
+            "field_name": field_name,
+            "display_name": preview_job.get("display_name"),
+            "files_to_delete": preview_job.get("files_to_delete"),
+            "cache_key": preview_job.get("cache_key"),
+        }
+
     def _upload_thumbnail_job(self, thumbnail_job):
         """
         Create a Backburner job to upload a thumbnail and link it to entities.
 
         :param thumbnail_job: Thumbnail generation job information.
-        :return: Backburner job ID created.
+        :return: A future whose result is the backburner job id.
         """
         job_context = "Upload Flow Production Tracking Thumbnail"
         job_name = self.engine.sanitize_backburner_job_name(
@@ -145,19 +364,13 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
             thumbnail_job.get("display_name"),
             thumbnail_job.get("path"),
         )
-        return self.engine.create_local_backburner_job(
+        return self._submit_job(
             job_name=job_name,
             description=job_description,
             dependencies=thumbnail_job.get("dependencies"),
             instance="backburner_hooks",
             method_name="upload_to_shotgun",
-            args={
-                "targets": thumbnail_job.get("target_entities"),
-                "path": thumbnail_job.get("path"),
-                "field_name": "thumb_image",
-                "display_name": thumbnail_job.get("display_name"),
-                "files_to_delete": thumbnail_job.get("files_to_delete"),
-            },
+            args=self._get_thumbnail_upload_args(thumbnail_job),
         )
 
     def _upload_preview_job(self, preview_job):
@@ -165,16 +378,8 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
         Create a Backburner job to upload a preview and link it to entities.
 
         :param preview_job: Preview generation job information.
-        :return: Backburner job ID created.
+        :return: A future whose result is the backburner job id.
         """
-        if self.engine.get_setting("bypass_server_transcoding"):
-            self.engine.log_debug(
-                "Bypass Flow Production Tracking transcoding setting ENABLED."
-            )
-            field_name = "sg_uploaded_movie_mp4"
-        else:
-            field_name = "sg_uploaded_movie"
-
         job_context = "Upload Flow Production Tracking Preview"
         job_name = self.engine.sanitize_backburner_job_name(
             job_name=preview_job.get("display_name"), job_suffix=" - %s" % job_context
@@ -184,21 +389,27 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
             preview_job.get("display_name"),
             preview_job.get("path"),
         )
-        return self.engine.create_local_backburner_job(
+        return self._submit_job(
             job_name=job_name,
             description=job_description,
             dependencies=preview_job.get("dependencies"),
             instance="backburner_hooks",
             method_name="upload_to_shotgun",
-            args={
-                "targets": preview_job.get("target_entities"),
-                "path": preview_job.get("path"),
-                "field_name": field_name,
-                "display_name": preview_job.get("display_name"),
-                "files_to_delete": preview_job.get("files_to_delete"),
-            },
+            args=self._get_preview_upload_args(preview_job),
         )
 
+    def _upload_preview_jobs(self, preview_job, upgrade_job):
+        """
+        Upload a preview and the final preview replacing it, if any.
+
+        :param preview_job: Preview generation job information.
+        :param upgrade_job: Final preview generation job information or None.
+        """
+        upload_job = self._upload_preview_job(preview_job)
+        if upgrade_job is not None:
+            upgrade_job["dependencies"] = [upgrade_job["dependencies"], upload_job]
+            self._upload_preview_job(upgrade_job)
+
     def finalize(self, path=None):
         """
         Ensure the generated thumbnail or preview have been uploaded to the
@@ -213,22 +424,69 @@ class ThumbnailGeneratorFlame(ThumbnailGenerator):
         # A Given path can have both a thumbnail or a preview to upload since
         # not all entity type support a preview upload
 
-        job_ids = []
+        if self._pending_finalizes.get(path):
+            self._pending_finalizes[path] -= 1
+            if not self._pending_finalizes[path]:
+                del self._pending_finalizes[path]
+
+        if self.engine.get_setting("upload_media_per_session") and path is not None:
+            # Wait for the last plugin that generated a media to finalize it,
+            # then upload everything still pending at once.
+            if self._pending_finalizes:
+                return self._flush_submitted_jobs()
+            path = None
+
+        # Every generate() of a publish happens before the first finalize(),
+        # so all the pending media are transcoded together here even when
+        # they are uploaded one path at a time.
+        self._transcode_jobs(
+            list(self._thumbnail_jobs.values())
+            + list(self._preview_jobs.values())
+            + list(self._preview_upgrade_jobs.values())
+        )
+
+        batch_job_ids = []
         if path is not None:
             thumbnail_job = self._thumbnail_jobs.pop(path, None)
-            if thumbnail_job is not None:
-                job_ids.append(self._upload_thumbnail_job(thumbnail_job))
-
             preview_job = self._preview_jobs.pop(path, None)
-            if preview_job is not None:
-                job_ids.append(self._upload_preview_job(preview_job))
+            upgrade_job = self._preview_upgrade_jobs.pop(path, None)
+            self.engine.transcoder.clear_cache(path)
+
+            # The final preview upload depends on the draft one, they cannot
+            # be batched.
+            if preview_job is not None and upgrade_job is not None:
+                self._upload_preview_jobs(preview_job, upgrade_job)
+                preview_job = None
+
+            # Coalesce the thumbnail and preview uploads when they share the
+            # same dependencies.
+            with self.engine.backburner_job_batch() as batch_job_ids:
+                if thumbnail_job is not None:
+                    self._upload_thumbnail_job(thumbnail_job)
+
+                if preview_job is not None:
+                    self._upload_preview_job(preview_job)
         else:
-            for thumbnail_job in self._thumbnail_jobs.values():
-                job_ids.append(self._upload_thumbnail_job(thumbnail_job))
-            self._thumbnail_jobs = {}
+            self.engine.transcoder.clear_cache()
+            self._pending_finalizes = collections.Counter()
+
+            # Draft previews to upgrade are uploaded first since their upgrade
+            # needs to depend on them.
+            for upgrade_path, upgrade_job in self._preview_upgrade_jobs.items():
+                preview_job = self._preview_jobs.pop(upgrade_path, None)
+                if preview_job is not None:
+                    self._upload_preview_jobs(preview_job, upgrade_job)
+            self._preview_upgrade_jobs = {}
+
+            # Coalesce all the upload jobs sharing the same dependencies
+            # into multi-task backburner jobs.
+            with self.engine.backburner_job_batch() as batch_job_ids:
+                for thumbnail_job in self._thumbnail_jobs.values():
+                    self._upload_thumbnail_job(thumbnail_job)
+                self._thumbnail_jobs = {}
 
-            for preview_job in self._preview_jobs.values():
-                job_ids.append(self._upload_preview_job(preview_job))
-            self._preview_jobs = {}
+                for preview_job in self._preview_jobs.values():
+                    self._upload_preview_job(preview_job)
+                self._preview_jobs = {}
 
-        return job_ids
+        return self._flush_submitted_jobs() + batch_job_ids
@@ -11,11 +11,15 @@
 
 __all__ = ["Transcoder"]
 
+import collections
+import json
 import os
-import tempfile
+from xml.etree import ElementTree
 
 from sgtk import TankError
 
+from .open_clip import OpenClipWriter
+
 
 class Transcoder(object):
     """
@@ -24,6 +28,10 @@ class Transcoder(object):
 
     def __init__(self, engine):
         self._engine = engine
+        self._import_cache = {}
+        self._transcode_results = {}
+        self._preset_equivalences = {}
+        self._open_clip_writer = None
 
     @property
     def engine(self):
@@ -32,6 +40,117 @@ class Transcoder(object):
         """
         return self._engine
 
+    @staticmethod
+    def _get_import_cache_key(src_path, asset_info, dependencies):
+        """
+        :returns: Key identifying the clip imported to transcode a media.
+        """
+        return (
+            os.path.realpath(src_path),
+            dependencies is not None,
+            json.dumps(asset_info, sort_keys=True, default=str),
+        )
+
+    @staticmethod
+    def _get_transcode_result_key(src_path, preset_path, asset_info, poster_frame):
+        """
+        :returns: Key identifying the transcode of a media with a preset.
+        """
+        return (
+            os.path.realpath(src_path),
+            os.path.realpath(preset_path),
+            poster_frame,
+            json.dumps(asset_info, sort_keys=True, default=str),
+        )
+
+    def get_transcode_result(
+        self, src_path, preset_path, asset_info, poster_frame=None
+    ):
+        """
+        Look for a media already transcoded to a persistent location with a
+        given preset.
+
+        :param src_path: Path to the media transcoded.
+        :param preset_path: The path to the preset used to transcode the media.
+        :param asset_info: Dictionary of attribute passed by Flame's python
+            hooks.
+        :param poster_frame: Frame transcoded, None for the whole media.
+        :returns: Tuple (transcoded media path, background job ID) or None.
+        """
+        return self._transcode_results.get(
+            self._get_transcode_result_key(
+                src_path, preset_path, asset_info, poster_frame
+            )
+        )
+
+    @staticmethod
+    def _read_preset(preset_path):
+        """
+        Read an export preset without the elements which do not change the
+        media generated, like the naming pattern.
+
+        :param preset_path: Path to the preset.
+        :returns: Canonical representation of the preset.
+        """
+        root = ElementTree.parse(preset_path).getroot()
+        for parent in root.iter():
+            for child in list(parent):
+                if child.tag == "namePattern":
+                    parent.remove(child)
+        for element in root.iter():
+            if element.text is not None:
+                element.text = element.text.strip()
+            element.tail = None
+        return ElementTree.tostring(root)
+
+    def are_presets_equivalent(self, preset_path, other_preset_path):
+        """
+        Tell if two export presets generate the same media.
+
+        :param preset_path: Path to a preset.
+        :param other_preset_path: Path to the other preset.
+        :returns: True if the presets only differ by their naming pattern.
+        """
+        key = (os.path.realpath(preset_path), os.path.realpath(other_preset_path))
+        if key[0] == key[1]:
+            return True
+
+        if key not in self._preset_equivalences:
+            try:
+                equivalent = self._read_preset(key[0]) == self._read_preset(key[1])
+            except (IOError, OSError, ElementTree.ParseError) as e:
+                self.engine.log_debug("Cannot compare presets %s: %s" % (key, e))
+                equivalent = False
+            self._preset_equivalences[key] = equivalent
+        return self._preset_equivalences[key]
+
+    def clear_cache(self, src_path=None):
+        """
+        Forget the clips imported and the media transcoded.
+
+        The Open Clip files created for these clips may still be needed by the
+        background jobs not run yet, so they are not removed but released to
+        FlameEngine.sweep_backburner_tmp().
+
+        :param src_path: Path to the media for which the clips and the
+            transcodes need to be forgotten. If None is passed, everything is
+            forgotten.
+        """
+        if src_path is None:
+            self._transcode_results = {}
+            cache_keys = list(self._import_cache)
+        else:
+            real_path = os.path.realpath(src_path)
+            for key in list(self._transcode_results):
+                if key[0] == real_path:
+                    del self._transcode_results[key]
+            cache_keys = [key for key in self._import_cache if key[0] == real_path]
+
+        for cache_key in cache_keys:
+            _, _, open_clip_path = self._import_cache.pop(cache_key)
+            if open_clip_path:
+                self.engine.temp_artifacts.release(open_clip_path)
+
     def _import_clip(self, path):
         """
         Imports a single clip at a given path.
@@ -63,7 +182,8 @@ class Transcoder(object):
         overwrite any media exported.
 
         :param user_data_job_key: Key to use in userData for the background job
-            ID collected.
+            ID collected. The job IDs by asset name are collected in the same
+            key suffixed with "s".
         :returns PythonHookOverride: Python Hook override callback object.
         """
 
@@ -89,6 +209,11 @@ class Transcoder(object):
             def postExportAsset(self, info, userData, *args, **kwargs):
                 del args, kwargs  # Unused necessary parameters
                 userData[self._user_data_job_key] = info["backgroundJobId"]
+                # Keep track of the job of each asset when exporting several
+                # clips at once.
+                userData.setdefault(self._user_data_job_key + "s", {})[
+                    info.get("assetName")
+                ] = info["backgroundJobId"]
 
             def exportOverwriteFile(self, path, *args, **kwargs):
                 del path, args, kwargs  # Unused necessary parameters
@@ -106,10 +231,7 @@ class Transcoder(object):
             temporary file created.
         :returns path: String of the path created.
         """
-        tmp_fd, path = tempfile.mkstemp(
-            suffix=extension, dir=self.engine.get_backburner_tmp()
-        )
-        os.close(tmp_fd)
+        path = self.engine.temp_artifacts.create_file(suffix=extension)
         clip.name = os.path.splitext(os.path.basename(path))[0]
         return path
 
@@ -119,7 +241,8 @@ class Transcoder(object):
         be used to import the clip before it is actually finished exporting.
 
         This can be used to schedule an export job depending on another export
-        job before the first one complete.
+        job before the first one complete. Assets with identical information
+        share the same file.
 
         :param src_path: Path to the media for which transcoding need to be done.
         :param asset_info: Dictionary of attribute passed by Flame's python
@@ -128,100 +251,17 @@ class Transcoder(object):
 
         :returns path: String of the path created, None in case of error.
         """
-        if asset_info["assetType"] not in ["video", "movie"]:
-            self.engine.log_error("Cannot create Open clip for non-video assets")
-            return None
-
-        tmp_fd, path = tempfile.mkstemp(
-            suffix=".clip", dir=self.engine.get_backburner_tmp()
-        )
-
-        metadata = {}
-        metadata["path"] = src_path
-        metadata["height"] = asset_info["height"]
-        metadata["width"] = asset_info["width"]
-        channels_encoding = asset_info.get("channelsEncoding", None)
-        if channels_encoding is None:
-            channels_encoding = "Float" if "fp" in asset_info["depth"] else "Integer"
-        metadata["channelsEncoding"] = channels_encoding
-        metadata["channelsDepth"] = (
-            asset_info["depth"].replace("-bit", "").replace(" fp", "")
-        )
-        metadata["pixelLayout"] = asset_info.get("pixelLayout", "RGB")
-        metadata["nbChannels"] = len(metadata["pixelLayout"])
-        try:
-            metadata["pixelRatio"] = (
-                asset_info.get("aspectRatio", 1.0)
-                * asset_info["height"]
-                / asset_info["width"]
+        if self._open_clip_writer is None:
+            self._open_clip_writer = OpenClipWriter(
+                self.engine.get_backburner_tmp(),
+                create_file=self.engine.temp_artifacts.create_file,
             )
-        except ZeroDivisionError:
-            metadata["pixelRatio"] = 1.0
-
-        scan_format = asset_info.get("scanFormat", "PROGRESSIVE")
-        if scan_format == "FIELD_1":
-            metadata["fieldDominance"] = 0
-        if scan_format == "FIELD_2":
-            metadata["fieldDominance"] = 1
-        else:  # PROGRESSIVE
-            metadata["fieldDominance"] = 2
-        metadata["colourSpace"] = asset_info.get("colourSpace", "Unknown")
 
         try:
-            source_in = int(asset_info.get("sourceIn", 0))
-            source_out = int(asset_info.get("sourceOut", source_in + 1))
-            nb_frames = source_out - source_in
-            metadata["duration"] = "<duration>%d</duration>" % (nb_frames)
-        except:
-            metadata["duration"] = ""
-
-        metadata["sampleRate"] = asset_info.get("fps")
-
-        extension = os.path.splitext(src_path)[1].lower()
-        handlers = {".mov": "Quicktime"}
-        handler = handlers.get(extension, None)
-        if handler is not None:
-            metadata["handler"] = "<handler><name>%s</name></handler>" % handler
-        else:
-            metadata["handler"] = ""
-
-        os.write(
-            tmp_fd,
-            """
-            <clip type=\"clip\" version=\"4\">
-             <tracks type=\"tracks\">
-              <track type=\"track\" uid=\"t0\">
-               <trackType>video</trackType>
-               <feeds currentVersion=\"v0\">
-                <feed type=\"feed\" vuid=\"v0\" uid=\"v0\">
-                 {handler}
-                 <storageFormat type=\"format\">
-                  <type>video</type>
-                  <nbChannels type=\"uint\">{nbChannels}</nbChannels>
-                  <channelsDepth type=\"uint\">{channelsDepth}</channelsDepth>
-                  <channelsEncoding type=\"string\">{channelsEncoding}</channelsEncoding>
-                  <pixelLayout type=\"string\">{pixelLayout}</pixelLayout>
-                  <height type=\"uint\">{height}</height>
-                  <pixelRatio type=\"float\">{pixelRatio}</pixelRatio>
-                  <width type=\"uint\">{width}</width>
-                  <fieldDominance type=\"int\">{fieldDominance}</fieldDominance>
-                  <colourSpace type=\"string\">{colourSpace}</colourSpace>
-                 </storageFormat>
-                 <sampleRate>{sampleRate}</sampleRate>
-                 <spans type=\"spans\">
-                  <span type=\"span\">
-                   {duration}
-                   <path encoding=\"pattern\">{path}</path>
-                  </span>
-                 </spans>
-                </feed>
-               </feeds>
-              </track>
-             </tracks>
-            </clip>""".format(**metadata).encode("utf-8"),
-        )
-        os.close(tmp_fd)
-        return path
+            return self._open_clip_writer.write(src_path, asset_info)
+        except ValueError as e:
+            self.engine.log_error(str(e))
+            return None
 
     def transcode(
         self,
@@ -250,88 +290,268 @@ class Transcoder(object):
             batch render (sg_batch_hooks.py).
         :param dependencies: List of backburner job IDs this thumbnail
             generation job need to wait in order to be started. Can be None if
-            the media is created in foreground.
+            the media is created in foreground. Futures returned by
+            FlameEngine.submit_local_backburner_job are accepted too.
         """
+        return self.transcode_batch(
+            [
+                {
+                    "src_path": src_path,
+                    "dst_path": dst_path,
+                    "extension": extension,
+                    "display_name": display_name,
+                    "job_context": job_context,
+                    "preset_path": preset_path,
+                    "asset_info": asset_info,
+                    "dependencies": dependencies,
+                    "poster_frame": poster_frame,
+                }
+            ]
+        )[0]
+
+    def transcode_batch(self, transcodes):
+        """
+        Transcode several media assets, exporting the ones sharing the same
+        preset and dependencies in a single export and background job.
 
-        import flame
-
-        temp_files = []
+        :param transcodes: List of dictionaries holding the parameters of
+            :meth:`transcode` for each media asset.
+        :returns: List of (transcoded media path, background job ID, temporary
+            files) tuples, in the same order as transcodes.
+        """
+        results = [None] * len(transcodes)
+
+        # Group the media assets that can be exported together.
+        groups = collections.OrderedDict()
+        for index, transcode in enumerate(transcodes):
+            # The Flame exporter needs actual job ids, wait for the jobs still
+            # being submitted in background.
+            dependencies = self.engine.resolve_backburner_dependencies(
+                transcode["dependencies"]
+            )
+            group_key = (
+                transcode["preset_path"],
+                transcode["job_context"],
+                transcode.get("poster_frame") is not None,
+                tuple(dependencies) if isinstance(dependencies, list) else dependencies,
+            )
+            groups.setdefault(group_key, (dependencies, []))[1].append(index)
+
+        for (preset_path, job_context, between_marks, _), (
+            dependencies,
+            indices,
+        ) in groups.items():
+            for index, result in zip(
+                indices,
+                self._export_group(
+                    [transcodes[index] for index in indices],
+                    preset_path,
+                    job_context,
+                    between_marks,
+                    dependencies,
+                ),
+            ):
+                results[index] = result
+
+                # Media transcoded to a temporary file are removed once
+                # uploaded, only the others can be reused.
+                transcode = transcodes[index]
+                if transcode["dst_path"] is not None:
+                    self._transcode_results[
+                        self._get_transcode_result_key(
+                            transcode["src_path"],
+                            preset_path,
+                            transcode["asset_info"],
+                            transcode.get("poster_frame"),
+                        )
+                    ] = result[:2]
+
+        return results
+
+    def _prepare_clip(self, transcode, dependencies, temp_files, exported_clips):
+        """
+        Import the clip of a media asset to transcode.
+
+        :param transcode: Dictionary of the parameters of :meth:`transcode`.
+        :param dependencies: Resolved backburner job IDs the export will depend
+            on.
+        :param temp_files: List the temporary files created are added to.
+        :param exported_clips: Clips already part of the same export.
+        :returns: Tuple (clip, path of the transcoded media).
+        """
+        src_path = transcode["src_path"]
+        asset_info = transcode["asset_info"]
+
+        # Reuse the clip imported by a previous transcode of the same media
+        # unless it is already part of the export being prepared.
+        cache_key = self._get_import_cache_key(src_path, asset_info, dependencies)
+        cached_import = self._import_cache.get(cache_key)
+        if cached_import is not None and cached_import[0] not in exported_clips:
+            clip, clip_name, _ = cached_import
+            clip.name = clip_name
+            self.engine.log_debug("Reusing clip imported for '%s'" % src_path)
+        else:
+            clip = None
 
-        # If we depend on a backburner jobs we cannot reimport the exported
-        # media until it finished exporting, however we would like to send the
-        # transcoding job before that happen. We can however create an Open Clip
-        # file that point to the exported media location with the matching
-        # metadata and import it. Reading the frames on that Open Clip would
-        # fail before the original export job is finished but since the thumbnail
-        # transcoding job depend on it, it will be fine by then.
-        #
-        if dependencies is not None:
-            if os.path.splitext(src_path)[-1].lower() != ".clip":
-                path_to_import = self._create_open_clip_file(
+        if clip is None:
+            # If we depend on a backburner jobs we cannot reimport the exported
+            # media until it finished exporting, however we would like to send the
+            # transcoding job before that happen. We can however create an Open Clip
+            # file that point to the exported media location with the matching
+            # metadata and import it. Reading the frames on that Open Clip would
+            # fail before the original export job is finished but since the thumbnail
+            # transcoding job depend on it, it will be fine by then.
+            #
+            open_clip_path = None
+            path_to_import = src_path
+            if (
+                dependencies is not None
+                and os.path.splitext(src_path)[-1].lower() != ".clip"
+            ):
+                open_clip_path = self._create_open_clip_file(
                     src_path=src_path, asset_info=asset_info
                 )
-                temp_files.append(path_to_import)
-            else:
-                path_to_import = src_path
-        else:
-            path_to_import = src_path
-        clip = self._import_clip(path=path_to_import)
-        if clip is None:
-            raise TankError("%s cannot be imported to be transcoded." % path_to_import)
-
-        if dst_path is None:
-            actual_dst_path = self._create_temporary_file(
-                extension=extension, clip=clip
+                path_to_import = open_clip_path
+
+            try:
+                clip = self._import_clip(path=path_to_import)
+                if clip is None:
+                    raise TankError(
+                        "%s cannot be imported to be transcoded." % path_to_import
+                    )
+            except Exception:
+                # The Open Clip file may be shared with other pending exports,
+                # only stop reusing it.
+                if open_clip_path:
+                    self._open_clip_writer.forget(open_clip_path)
+                raise
+
+            # The Open Clip file is shared by all the transcodes of the media
+            # so it is owned by the cache instead of a single upload job.
+            clip_name = clip.name
+            if hasattr(clip_name, "get_value"):
+                clip_name = clip_name.get_value()
+            self._import_cache[cache_key] = (clip, clip_name, open_clip_path)
+
+        if transcode["dst_path"] is None:
+            dst_path = self._create_temporary_file(
+                extension=transcode["extension"], clip=clip
             )
-            temp_files.append(actual_dst_path)
+            temp_files.append(dst_path)
         else:
-            actual_dst_path = dst_path
-
-        exporter = flame.PyExporter()
-        exporter.foreground_export = False
+            dst_path = transcode["dst_path"]
 
         # FIXME this will work only if out_mark is exclusive which is the default.
+        poster_frame = transcode.get("poster_frame")
         if poster_frame is not None:
             clip.in_mark = poster_frame
             clip.out_mark = poster_frame + 1
-            exporter.export_between_marks = True
 
-        self.engine.log_debug(
-            "Exporting using preset '%s' to '%s' depending on '%s'"
-            % (preset_path, actual_dst_path, dependencies)
-        )
+        return clip, dst_path
 
-        background_job_settings = flame.PyExporter.BackgroundJobSettings()
-        background_job_settings.name = self.engine.sanitize_backburner_job_name(
-            job_name=display_name, job_suffix=" - %s" % job_context
-        )
-        background_job_settings.description = "%s for %s - %s -> %s" % (
-            job_context,
-            display_name,
-            src_path,
-            dst_path,
-        )
-        background_job_settings.dependencies = dependencies
-
-        (
-            completion_handling,
-            completion_handling_delay,
-        ) = self.engine.get_backburner_job_completion()
-        if completion_handling:
-            background_job_settings.completion_handling = completion_handling
-            if completion_handling_delay is not None:
-                background_job_settings.completion_handling_delay = (
-                    completion_handling_delay
+    def _export_group(
+        self, transcodes, preset_path, job_context, between_marks, dependencies
+    ):
+        """
+        Export several media assets with a single Flame exporter.
+
+        :param transcodes: List of dictionaries of the parameters of
+            :meth:`transcode` for each media asset.
+        :param preset_path: The path to the preset to use to export the media.
+        :param job_context: Description of the background job.
+        :param between_marks: True to export the frames between the marks set
+            on the clips only.
+        :param dependencies: Resolved backburner job IDs the export depends on.
+        :returns: List of (transcoded media path, background job ID, temporary
+            files) tuples, in the same order as transcodes.
+        """
+        import flame
+
+        temp_files = []
+        try:
+            clips = []
+            dst_paths = []
+            clip_temp_files = []
+            for transcode in transcodes:
+                files = []
+                clip, dst_path = self._prepare_clip(
+                    transcode, dependencies, files, clips
                 )
+                temp_files.extend(files)
+                clips.append(clip)
+                dst_paths.append(dst_path)
+                clip_temp_files.append(files)
+
+            exporter = flame.PyExporter()
+            exporter.foreground_export = False
+            if between_marks:
+                exporter.export_between_marks = True
+
+            self.engine.log_debug(
+                "Exporting %d clips using preset '%s' to '%s' depending on '%s'"
+                % (len(clips), preset_path, dst_paths, dependencies)
+            )
 
-        hooks_user_data = {}
-        transcoder_job_key = "transcoder_job"
-        exporter.export(
-            sources=clip,
-            preset_path=preset_path,
-            output_directory=self.engine.get_backburner_tmp(),
-            background_job_settings=background_job_settings,
-            hooks=self._build_python_hook_override(transcoder_job_key),
-            hooks_user_data=hooks_user_data,
-        )
-        return (actual_dst_path, hooks_user_data.get(transcoder_job_key), temp_files)
+            display_name = transcodes[0]["display_name"]
+            if len(transcodes) > 1:
+                display_name += " (+%d)" % (len(transcodes) - 1)
+
+            background_job_settings = flame.PyExporter.BackgroundJobSettings()
+            background_job_settings.name = self.engine.sanitize_backburner_job_name(
+                job_name=display_name, job_suffix=" - %s" % job_context
+            )
+            background_job_settings.description = "%s for %s" % (
+                job_context,
+                ", ".join(
+                    "%s - %s -> %s"
+                    % (
+                        transcode["display_name"],
+                        transcode["src_path"],
+                        transcode["dst_path"],
+                    )
+                    for transcode in transcodes
+                ),
+            )
+            background_job_settings.dependencies = dependencies
+
+            (
+                completion_handling,
+                completion_handling_delay,
+            ) = self.engine.get_backburner_job_completion()
+            if completion_handling:
+                background_job_settings.completion_handling = completion_handling
+                if completion_handling_delay is not None:
+                    background_job_settings.completion_handling_delay = (
+                        completion_handling_delay
+                    )
+
+            hooks_user_data = {}
+            transcoder_job_key = "transcoder_job"
+            exporter.export(
+                sources=clips if len(clips) > 1 else clips[0],
+                preset_path=preset_path,
+                output_directory=self.engine.get_backburner_tmp(),
+                background_job_settings=background_job_settings,
+                hooks=self._build_python_hook_override(transcoder_job_key),
+                hooks_user_data=hooks_user_data,
+            )
+        except Exception:
+            # The temporary files are only removed by the upload job, which
+            # will never run.
+            self.engine.temp_artifacts.discard(temp_files)
+            raise
+
+        # All the clips are usually exported by the same background job, use
+        # it for the clips whose asset was not reported.
+        job_id = hooks_user_data.get(transcoder_job_key)
+        asset_job_ids = hooks_user_data.get(transcoder_job_key + "s", {})
+        return [
+            (
+                dst_path,
+                asset_job_ids.get(
+                    os.path.splitext(os.path.basename(dst_path))[0], job_id
+                ),
+                files,
+            )
+            for dst_path, files in zip(dst_paths, clip_temp_files)
+        ]
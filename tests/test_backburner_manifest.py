@@ -0,0 +1,102 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(repo_root, "python", "startup"))
+
+# The bootstrap script of the Backburner jobs, which loads the job manifest
+# module of tk_flame on its own.
+import backburner  # noqa: E402
+
+backburner_manifest = backburner.backburner_manifest
+
+
+class TestBackburnerManifest(unittest.TestCase):
+    """
+    Tests the job manifests written by the engine and read by the Backburner
+    jobs.
+    """
+
+    SESSION_DATA = {"engine_instance": "tk-flame", "flame_version": {"full": "2026"}}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.manifest = backburner_manifest.BackburnerJobManifest(self.directory)
+        self.engine = mock.Mock()
+
+    def _add_jobs(self, nb_jobs):
+        return [
+            self.manifest.add_job(
+                self.SESSION_DATA,
+                {"instance": "backburner_hooks", "args": {"index": index}},
+            )
+            for index in range(nb_jobs)
+        ]
+
+    def test_round_trip(self):
+        """
+        Ensures backburner.py reads back the job and session information of
+        every job, the session being stored only once.
+        """
+        job_references = self._add_jobs(3)
+        self.manifest.add_job(dict(self.SESSION_DATA, user_home="/home"), {})
+
+        for index, job_reference in enumerate(job_references):
+            data = backburner.load_job_data(job_reference)
+            self.assertEqual(
+                data,
+                dict(
+                    self.SESSION_DATA,
+                    instance="backburner_hooks",
+                    args={"index": index},
+                ),
+            )
+        self.assertEqual(
+            len([path for path in os.listdir(self.directory) if "session" in path]),
+            2,
+        )
+
+        with self.assertRaises(IOError):
+            backburner.load_job_data("%s:4" % self.manifest.base_path)
+
+    def test_removal_once_all_jobs_ran(self):
+        """
+        Ensures the manifest is only removed once all its jobs ran and it is
+        closed, whatever the order, and that a retried job is counted once.
+        """
+        job_references = self._add_jobs(3)
+
+        backburner.remove_job_file(self.engine, job_references[0])
+        backburner.remove_job_file(self.engine, job_references[0])
+        backburner.remove_job_file(self.engine, job_references[2])
+        self.manifest.close()
+        self.assertTrue(os.listdir(self.directory))
+
+        backburner.remove_job_file(self.engine, job_references[1])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_removal_on_close(self):
+        """
+        Ensures a manifest whose jobs all ran is removed once closed.
+        """
+        for job_reference in self._add_jobs(2):
+            backburner.remove_job_file(self.engine, job_reference)
+        self.assertTrue(os.listdir(self.directory))
+
+        self.manifest.close()
+        self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,182 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import importlib.util
+import os
+import unittest
+from unittest import mock
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_tk_flame_module(name):
+    """
+    Load a module of the tk_flame package on its own, the package itself
+    needs a running engine.
+    """
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(repo_root, "python", "tk_flame", "%s.py" % name)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+entity_cache = load_tk_flame_module("entity_cache")
+
+
+class StubShotgun(object):
+    """
+    Flow Production Tracking connection returning a new result for every
+    query.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.on_find = None
+
+    def find(self, entity_type, filters, fields=None, order=None, limit=0):
+        self.queries.append((entity_type, filters))
+        if self.on_find is not None:
+            self.on_find()
+        return [{"type": entity_type, "id": len(self.queries)}]
+
+    def create(self, entity_type, data):
+        return dict(data, type=entity_type, id=100)
+
+    def update(self, entity_type, entity_id, data):
+        return dict(data, type=entity_type, id=entity_id)
+
+    def batch(self, requests):
+        return [dict(request["data"], id=100) for request in requests]
+
+
+class TestEntityCache(unittest.TestCase):
+    """
+    Tests the cache of the Flow Production Tracking queries.
+    """
+
+    def setUp(self):
+        self.sg = StubShotgun()
+        self.cache = entity_cache.EntityCache(lambda: self.sg, max_entries=2, ttl=60)
+
+    def test_cached_queries(self):
+        """
+        Ensures identical queries are only sent once, including their fields
+        in any order, and that the cached results cannot be modified.
+        """
+        first = self.cache.find("Shot", [["code", "is", "a"]], ["code", "id"])
+        first[0]["id"] = -1
+        second = self.cache.find("Shot", [["code", "is", "a"]], ["id", "code"])
+        self.assertEqual(second, [{"type": "Shot", "id": 1}])
+        self.assertEqual(len(self.sg.queries), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        self.cache.find("Shot", [["code", "is", "b"]])
+        self.assertEqual(len(self.sg.queries), 2)
+
+    def test_find_one(self):
+        """
+        Ensures find_one returns the first entity and is cached separately
+        from find.
+        """
+        self.assertEqual(
+            self.cache.find_one("Shot", [["code", "is", "a"]]),
+            {"type": "Shot", "id": 1},
+        )
+        self.cache.find("Shot", [["code", "is", "a"]])
+        self.assertEqual(len(self.sg.queries), 2)
+
+    def test_ttl(self):
+        """
+        Ensures the queries expire after the time to live, and that nothing
+        is cached with a time to live of 0.
+        """
+        with mock.patch.object(entity_cache.time, "monotonic", return_value=0):
+            self.cache.find("Shot", [])
+        with mock.patch.object(entity_cache.time, "monotonic", return_value=59):
+            self.cache.find("Shot", [])
+        self.assertEqual(len(self.sg.queries), 1)
+        with mock.patch.object(entity_cache.time, "monotonic", return_value=61):
+            self.cache.find("Shot", [])
+        self.assertEqual(len(self.sg.queries), 2)
+
+        cache = entity_cache.EntityCache(lambda: self.sg, ttl=0)
+        cache.find("Shot", [])
+        cache.find("Shot", [])
+        self.assertEqual(len(self.sg.queries), 4)
+
+    def test_lru_per_entity_type(self):
+        """
+        Ensures the least recently used queries are evicted first and only by
+        the queries of the same entity type.
+        """
+        self.cache.find("Shot", [["code", "is", "a"]])
+        self.cache.find("Shot", [["code", "is", "b"]])
+        self.cache.find("Sequence", [["code", "is", "a"]])
+        self.cache.find("Sequence", [["code", "is", "b"]])
+        self.cache.find("Sequence", [["code", "is", "c"]])
+        # Refresh a, then evict b
+        self.cache.find("Shot", [["code", "is", "a"]])
+        self.cache.find("Shot", [["code", "is", "c"]])
+        self.assertEqual(len(self.sg.queries), 6)
+
+        self.cache.find("Shot", [["code", "is", "a"]])
+        self.assertEqual(len(self.sg.queries), 6)
+        self.cache.find("Shot", [["code", "is", "b"]])
+        self.assertEqual(len(self.sg.queries), 7)
+        self.cache.find("Sequence", [["code", "is", "c"]])
+        self.assertEqual(len(self.sg.queries), 7)
+
+    def test_linked_types_invalidation(self):
+        """
+        Ensures a write forgets the queries of the entity type written and of
+        the types it links to, and only those.
+        """
+        for entity_type in ["CutItem", "Cut", "Shot", "Sequence"]:
+            self.cache.find(entity_type, [])
+
+        self.cache.create(
+            "CutItem",
+            {
+                "cut": {"type": "Cut", "id": 1},
+                "shot": [{"type": "Shot", "id": 2}],
+                "code": "a",
+            },
+        )
+        for entity_type in ["CutItem", "Cut", "Shot", "Sequence"]:
+            self.cache.find(entity_type, [])
+        self.assertEqual(
+            [query[0] for query in self.sg.queries[4:]], ["CutItem", "Cut", "Shot"]
+        )
+
+        self.cache.update("Sequence", 1, {"code": "b"})
+        self.cache.batch([{"request_type": "create", "entity_type": "Cut", "data": {}}])
+        self.cache.invalidate()
+        self.cache.find("Shot", [])
+        self.assertEqual(len(self.sg.queries), 8)
+
+    def test_invalidation_during_query(self):
+        """
+        Ensures the result of a query running while its entity type is
+        invalidated is not cached.
+        """
+        self.sg.on_find = lambda: self.cache.invalidate("Shot")
+        self.cache.find("Shot", [])
+        self.sg.on_find = None
+        self.cache.find("Shot", [])
+        self.cache.find("Shot", [])
+        self.assertEqual(len(self.sg.queries), 2)
+
+        self.sg.on_find = lambda: self.cache.invalidate()
+        self.cache.find("Sequence", [])
+        self.sg.on_find = None
+        self.cache.find("Sequence", [])
+        self.assertEqual(len(self.sg.queries), 4)
@@ -0,0 +1,100 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_tk_flame_module(name):
+    """
+    Load a module of the tk_flame package on its own, the package itself
+    needs a running engine.
+    """
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(repo_root, "python", "tk_flame", "%s.py" % name)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+media_cache = load_tk_flame_module("media_cache")
+
+
+class TestMediaCache(unittest.TestCase):
+    """
+    Tests the index of the media uploaded.
+    """
+
+    ASSET_INFO = {"sourceIn": 0, "sourceOut": 10}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.media_path = os.path.join(self.directory, "shot.mov")
+        with open(self.media_path, "w") as fh:
+            fh.write("frames")
+        os.utime(self.media_path, (1000, 1000))
+        self.cache = media_cache.MediaCache(os.path.join(self.directory, "cache"))
+
+    def _get_key(self, path=None, asset_info=None, settings="preset.xml"):
+        return media_cache.MediaCache.get_key(
+            path or self.media_path, asset_info or self.ASSET_INFO, settings
+        )
+
+    def test_keys(self):
+        """
+        Ensures the key changes with the content, frame range and settings of
+        a media, and only with them.
+        """
+        key = self._get_key()
+        self.assertEqual(key, self._get_key(asset_info=dict(self.ASSET_INFO, fps=24)))
+        self.assertNotEqual(key, self._get_key(settings="other.xml"))
+        self.assertNotEqual(
+            key, self._get_key(asset_info=dict(self.ASSET_INFO, sourceOut=20))
+        )
+
+        os.utime(self.media_path, (2000, 2000))
+        modified_key = self._get_key()
+        self.assertNotEqual(key, modified_key)
+
+        with open(self.media_path, "a") as fh:
+            fh.write("more frames")
+        os.utime(self.media_path, (2000, 2000))
+        self.assertNotEqual(modified_key, self._get_key())
+
+    def test_file_sequence_keys(self):
+        """
+        Ensures the folder of a file sequence is used for its key, and that
+        missing media have no key.
+        """
+        sequence_path = os.path.join(self.directory, "shot.[0001-0010].dpx")
+        self.assertIsNotNone(self._get_key(sequence_path))
+        self.assertIsNone(self._get_key(os.path.join(self.directory, "a", "b.dpx")))
+
+    def test_entries(self):
+        """
+        Ensures the entries are written, read back and removed.
+        """
+        key = self._get_key()
+        self.assertIsNone(self.cache.get(key))
+
+        entry = {"type": "Version", "id": 1, "field_name": "thumb_image"}
+        self.cache.set(key, entry)
+        self.assertEqual(self.cache.get(key), entry)
+        self.assertEqual(os.listdir(self.cache.directory), ["%s.json" % key])
+
+        self.cache.remove(key)
+        self.assertIsNone(self.cache.get(key))
@@ -0,0 +1,116 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+from xml.etree import ElementTree
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_tk_flame_module(name):
+    """
+    Load a module of the tk_flame package on its own, the package itself
+    needs a running engine.
+    """
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(repo_root, "python", "tk_flame", "%s.py" % name)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+open_clip = load_tk_flame_module("open_clip")
+
+
+class TestOpenClip(unittest.TestCase):
+    """
+    Tests the writing and reading of Open Clip files.
+    """
+
+    ASSET_INFO = {
+        "assetType": "video",
+        "width": 1920,
+        "height": 1080,
+        "depth": "16-bit fp",
+        "fps": 24,
+        "sourceIn": 10,
+        "sourceOut": 20,
+        "scanFormat": "FIELD_2",
+    }
+    SRC_PATH = "/mnt/media/shot_<&>.[0010-0019].exr"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.writer = open_clip.OpenClipWriter(self.directory)
+
+    def test_write_and_read(self):
+        """
+        Ensures the Open Clip written is valid XML pointing to the media with
+        the asset metadata, and is read back.
+        """
+        path = self.writer.write(self.SRC_PATH, self.ASSET_INFO)
+
+        root = ElementTree.parse(path).getroot()
+        self.assertEqual(root.find(".//path").text, self.SRC_PATH)
+        self.assertEqual(root.find(".//duration").text, "10")
+        self.assertEqual(root.find(".//channelsEncoding").text, "Float")
+        self.assertEqual(root.find(".//channelsDepth").text, "16")
+        self.assertEqual(root.find(".//fieldDominance").text, "1")
+        self.assertIsNone(root.find(".//handler"))
+
+        self.assertEqual(
+            open_clip.read_open_clip_info(path),
+            {
+                "version": "4",
+                "current_version": "v0",
+                "feeds": [{"vuid": "v0", "uid": "v0", "paths": [self.SRC_PATH]}],
+            },
+        )
+
+    def test_reuse(self):
+        """
+        Ensures identical assets share the same file as long as it exists.
+        """
+        path = self.writer.write(self.SRC_PATH, self.ASSET_INFO)
+        self.assertEqual(self.writer.write(self.SRC_PATH, dict(self.ASSET_INFO)), path)
+        self.assertNotEqual(
+            self.writer.write(self.SRC_PATH, dict(self.ASSET_INFO, width=1280)), path
+        )
+        self.assertEqual((self.writer.hits, self.writer.misses), (1, 2))
+
+        os.remove(path)
+        new_path = self.writer.write(self.SRC_PATH, self.ASSET_INFO)
+        self.assertTrue(os.path.exists(new_path))
+
+        self.writer.forget(new_path)
+        self.assertNotEqual(self.writer.write(self.SRC_PATH, self.ASSET_INFO), new_path)
+
+    def test_invalid(self):
+        """
+        Ensures invalid assets and files are reported.
+        """
+        with self.assertRaises(ValueError):
+            self.writer.write(self.SRC_PATH, dict(self.ASSET_INFO, assetType="audio"))
+        with self.assertRaises(ValueError):
+            self.writer.write(self.SRC_PATH, dict(self.ASSET_INFO, width=0))
+        with self.assertRaises(ValueError):
+            self.writer.write(self.SRC_PATH, dict(self.ASSET_INFO, depth="float"))
+
+        path = os.path.join(self.directory, "invalid.clip")
+        with open(path, "w") as fh:
+            fh.write("<clip")
+        with self.assertRaises(ValueError):
+            open_clip.read_open_clip_info(path)
@@ -0,0 +1,112 @@
+# Copyright (c) 2026 Shotgun Software Inc.
+#
+# CONFIDENTIAL AND PROPRIETARY
+#
+# This work is provided "AS IS" and subject to the Shotgun Pipeline Toolkit
+# Source Code License included in this distribution package. See LICENSE.
+# By accessing, using, copying or modifying this work you indicate your
+# agreement to the Shotgun Pipeline Toolkit Source Code License. All rights
+# not expressly granted therein are reserved by Shotgun Software Inc.
+
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_tk_flame_module(name):
+    """
+    Load a module of the tk_flame package on its own, the package itself
+    needs a running engine.
+    """
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(repo_root, "python", "tk_flame", "%s.py" % name)
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+temp_artifacts = load_tk_flame_module("temp_artifacts")
+
+
+class TestTempArtifacts(unittest.TestCase):
+    """
+    Tests the registry and the sweep of the temporary files.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.registry = temp_artifacts.TempArtifactRegistry(self.directory)
+
+    def _create_file(self, name, age):
+        path = os.path.join(self.directory, name)
+        open(path, "w").close()
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_registry(self):
+        """
+        Ensures the files created are registered until released or discarded.
+        """
+        path = self.registry.create_file(suffix=".mov", label="shot")
+        self.assertTrue(
+            os.path.basename(path).startswith(temp_artifacts.ARTIFACT_PREFIX)
+        )
+        self.assertIn(path, self.registry.artifacts)
+
+        self.registry.release(path)
+        self.assertNotIn(path, self.registry.artifacts)
+        self.assertTrue(os.path.exists(path))
+
+        other_path = self.registry.create_file()
+        self.registry.discard([other_path, None])
+        self.assertNotIn(other_path, self.registry.artifacts)
+        self.assertFalse(os.path.exists(other_path))
+
+    def test_sweep_age_and_prefixes(self):
+        """
+        Ensures only the old files with one of the prefixes are removed.
+        """
+        old = self._create_file(temp_artifacts.ARTIFACT_PREFIX + "old", 100)
+        old_job = self._create_file("tk_backburner_old.jobs", 100)
+        recent = self._create_file(temp_artifacts.ARTIFACT_PREFIX + "recent", 1)
+        other = self._create_file("other", 100)
+
+        self.assertEqual(
+            temp_artifacts.sweep_temp_artifacts(self.directory, 50, dry_run=True),
+            (2, 0),
+        )
+        self.assertTrue(os.path.exists(old))
+
+        temp_artifacts.sweep_temp_artifacts(self.directory, 50)
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted(os.path.basename(path) for path in (recent, other)),
+        )
+        self.assertFalse(os.path.exists(old_job))
+
+        temp_artifacts.sweep_temp_artifacts(self.directory, 50, prefixes=None)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(recent)])
+
+    def test_sweep_keep_paths(self):
+        """
+        Ensures the files still in use are kept whatever their age.
+        """
+        kept = self._create_file(temp_artifacts.ARTIFACT_PREFIX + "kept", 100)
+        removed = self._create_file(temp_artifacts.ARTIFACT_PREFIX + "removed", 100)
+
+        nb_removed, _ = temp_artifacts.sweep_temp_artifacts(
+            self.directory,
+            50,
+            keep_paths=[os.path.join(self.directory, ".", os.path.basename(kept))],
+        )
+        self.assertEqual(nb_removed, 1)
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(removed))